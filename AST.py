@@ -1,17 +1,37 @@
 # AST.py : Abstract Syntax Tree class definitions for use in MicroTree.py
 # This file contains all classes necessary to build an AST for the MicroScala language.
+# Nodes are built once by MicroTree and never modified afterwards, so subtrees may be
+# shared between trees (as MicroIncremental does) without copying.
+# Every node class declares its fields in __slots__, so nodes carry no per-instance __dict__.
 # Author : Jo
 # License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
 
+# Base class of all AST nodes
+class Node(object):
+	__slots__ = ()
+
+# Returns the AST nodes directly below node, in field order
+def children(node):
+	out = []
+	for field in node.__slots__:
+		value = getattr(node, field)
+		if isinstance(value, Node):
+			out.append(value)
+		elif type(value) == list:
+			out.extend(item for item in value if isinstance(item, Node))
+	return out
+
 # Creates an instance of a Program class, used by MicroTree.compilationUnit, MicroTree.mainDef, and
 # MicroTree.functionDef
-class Program(object):
-	def __init__(self, name, stmt, argList = [], funcList=[], decVarList=[]):
+class Program(Node):
+	__slots__ = ('name', 'stmt', 'argList', 'funcList', 'decVarList')
+
+	def __init__(self, name, stmt, argList=None, funcList=None, decVarList=None):
 		self.name = name
 		self.stmt = stmt
-		self.argList = argList
-		self.funcList = funcList
-		self.decVarList = decVarList
+		self.argList = argList if argList != None else []
+		self.funcList = funcList if funcList != None else []
+		self.decVarList = decVarList if decVarList != None else []
 
 	# Creates a string to represent the class instance when printing it out
 	def __repr__(self):
@@ -53,7 +73,9 @@ class Program(object):
 
 # Creates an instance of a DecVar class, used by MicroTree.mainDef, MicroTree.functionDef, and
 # MicroTree.varDef
-class DecVar(object):
+class DecVar(Node):
+	__slots__ = ('name', 'type', 'value')
+
 	def __init__(self, name, typ, value):
 		self.name = name
 		self.type = typ
@@ -63,24 +85,24 @@ class DecVar(object):
 	def __repr__(self):
 		return self.name + ' is type ' + self.type + ' := ' + str(self.value.value)
 
-# Creates an instance of a Statement class, used by MicroTree.statement
-class Statement(object):
-	def __init__(self, stmt, stmt2=None):
-		self.stmt = stmt
-		self.stmt2 = stmt2
+# Creates an instance of a Block class, a flat sequence of statements, used by MicroTree.mainDef,
+# MicroTree.functionDef, and MicroTree.statement
+class Block(Node):
+	__slots__ = ('name', 'stmts')
+
+	def __init__(self, stmts):
+		self.name = 'block'
+		self.stmts = stmts
 
 	# Creates a string to represent the class instance when printing it out
 	def __repr__(self):
-		if self.stmt2 == None:
-			string = '(' + repr(self.stmt) + ')'
-		else:
-			string = '(: ' + repr(self.stmt) + ' ' + repr(self.stmt2) + ')'
-		return string
+		return '(: ' + ' '.join(repr(stmt) for stmt in self.stmts) + ')'
+
+# Creates an instance of an Expr class, used by MicroTree.expr, MicroTree.relExpr,
+# MicroTree.listExpr, and MicroTree.prefixExpr
+class Expr(Node):
+	__slots__ = ('op', 'term1', 'term2')
 
-# Creates an instance of an Expr class, used by MicroTree.expr, MicroTree.andExpr, MicroTree.relExpr,
-# MicroTree.listExpr, MicroTree.addExpr, MicroTree.mulExpr, MicroTree.prefixExpr, and
-# MicroTree.simpleExpr
-class Expr(object):
 	def __init__(self, op, term1, term2=None):
 		self.op = op
 		self.term1 = term1
@@ -98,7 +120,9 @@ class Expr(object):
 		return string
 
 # Creates an instance of an If class, used by MicroTree.statement
-class If(object):
+class If(Node):
+	__slots__ = ('name', 'cond', 'term1', 'term2')
+
 	def __init__(self, cond, term1, term2=None):
 		self.name = 'if'
 		self.cond = cond
@@ -117,7 +141,9 @@ class If(object):
 		return string
 
 # Creates an instance of a While class, used by MicroTree.statement
-class While(object):
+class While(Node):
+	__slots__ = ('name', 'cond', 'statement')
+
 	def __init__(self, cond, statement):
 		self.name = 'while'
 		self.cond = cond
@@ -128,7 +154,9 @@ class While(object):
 		return '(while ' + repr(self.cond) + ' ' + repr(self.statement) + ')'
 
 # Creates an instance of a Return class, used by MicroTree.functionDef
-class Return(object):
+class Return(Node):
+	__slots__ = ('name', 'expr')
+
 	def __init__(self, expr):
 		self.name = 'return'
 		self.expr = expr
@@ -138,7 +166,9 @@ class Return(object):
 		return '(return ' + repr(self.expr) + ')'
 
 # Creates an instance of an Assignment class, used by MicroTree.statement
-class Assignment(object):
+class Assignment(Node):
+	__slots__ = ('name', 'lhs', 'rhs')
+
 	def __init__(self, lhs, rhs):
 		self.name = 'assign'
 		self.lhs = lhs
@@ -149,7 +179,9 @@ class Assignment(object):
 		return '(= ' + repr(self.lhs) + ' ' + repr(self.rhs) + ')'
 
 # Creates an instance of a Println class, used by MicroTree.statement
-class Println(object):
+class Println(Node):
+	__slots__ = ('name', 'expr')
+
 	def __init__(self, expr):
 		self.name = 'println'
 		self.expr = expr
@@ -159,7 +191,9 @@ class Println(object):
 		return '(println ' + repr(self.expr) + ')'
 
 # Creates an instance of a Variable class, used by MicroTree.simpleExpr and MicroTree.statement
-class Variable(object):
+class Variable(Node):
+	__slots__ = ('name',)
+
 	def __init__(self, name):
 		self.name = name
 
@@ -168,17 +202,24 @@ class Variable(object):
 		return '(id ' + repr(self.name) + ')'
 
 # Creates an instance of a FunctionCall class, used by MicroTree.simpleExpr
-class FunctionCall(object):
-	def __init__(self, name, parameterList=[]):
+class FunctionCall(Node):
+	__slots__ = ('name', 'parameterList', 'position')
+
+	# position is (line, position, echo) of the function name in the parse that built the call,
+	# for errors found after parsing, or None
+	def __init__(self, name, parameterList=None, position=None):
 		self.name = name
-		self.parameterList = parameterList
+		self.parameterList = parameterList if parameterList != None else []
+		self.position = position
 
 	# Creates a string to represent the class instance when printing it out
 	def __repr__(self):
 		return '(apply ' + repr(self.name) + ' ' + str(self.parameterList) + ')'
 
 # Creates an instance of an IntValue class, used by MicroTree.literal and MicroTree.functionDef
-class IntValue(object):
+class IntValue(Node):
+	__slots__ = ('name', 'value')
+
 	def __init__(self, value):
 		self.name = 'int'
 		self.value = value
@@ -188,7 +229,9 @@ class IntValue(object):
 		return '(intValue ' + repr(self.value) + ')'
 
 # Creates an instance of a NilValue class, used by MicroTree.literal and MicroTree.functionDef
-class NilValue(object):
+class NilValue(Node):
+	__slots__ = ('name', 'value')
+
 	def __init__(self):
 		self.name = 'nil'
 		self.value = 'Nil'
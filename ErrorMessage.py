@@ -1,17 +1,74 @@
-# ErrorMessage.py : ErrorMessage class for use in the micro Scala project
-# This file contains all classes necessary to build an AST for the MicroScala language.
+# ErrorMessage.py : Error classes for use in the micro Scala project
+# ErrorMessage is the base of every error raised by the lexer, parser and interpreter.
+# An error carries its message and, for errors found in the source, the position of the
+# error on its line, the line number and the echo of the line read so far. Errors are
+# raised; whoever catches one decides whether to report it to a sink and halt.
 # Author : Jo
 # License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
 
-import sys
+from Sink import StreamSink
 
-class ErrorMessage(object):
-	def __init__(self, message, position=None, echo=None):
-		if position == None:
-			print('***** Error {0} *****'.format(message))
-		else:
-			if echo != None:
-				print(echo)
-			print("{0}^\n{1} at pos={2}".format(" "*position, message, position))
+class ErrorMessage(Exception):
+	# kind names the class of error in batch reports
+	kind = 'error'
 
-		sys.exit(0)
+	def __init__(self, message, position=None, echo=None, line=None, filename=None):
+		Exception.__init__(self, message)
+		self.message = message
+		self.position = position
+		self.echo = echo
+		self.line = line
+		self.filename = filename
+
+	# lines() : input: None, output: list of the lines reporting the error
+	def lines(self):
+		if self.position == None:
+			return ['***** Error {0} *****'.format(self.message)]
+
+		lines = []
+		if self.echo != None:
+			lines.append(self.echo)
+		lines.append("{0}^\n{1} at pos={2}".format(" "*self.position, self.message, self.position))
+		return lines
+
+	# report() : input: sink (stdout by default), output: None
+	# Writes the error to the sink as the interpreter has always printed it
+	def report(self, sink=None):
+		if sink == None:
+			sink = StreamSink()
+
+		for line in self.lines():
+			sink.write(line)
+		sink.flush()
+
+	# where() : input: None, output: str() file:line:pos prefix of the error, for batch reports
+	def where(self):
+		parts = [self.filename if self.filename != None else '<input>']
+		if self.line != None:
+			parts.append(str(self.line + 1))
+		if self.position != None:
+			parts.append(str(self.position))
+		return ':'.join(parts)
+
+	def __str__(self):
+		return '{0}: {1}: {2}'.format(self.where(), self.kind, self.message)
+
+# An unrecognized character in the source, raised by MicroScalaLexer
+class LexError(ErrorMessage):
+	kind = 'lex error'
+
+# A token sequence outside the MicroScala grammar, raised by MicroTree
+class ParseError(ErrorMessage):
+	kind = 'parse error'
+
+# A variable declared nowhere, raised by MicroResolve before a program runs
+class ResolveError(ErrorMessage):
+	kind = 'name error'
+
+# A value of the wrong type or a wrong number of arguments, raised by MicroInterp
+class TypeCheckError(ErrorMessage):
+	kind = 'type error'
+
+# Any other failure while running a program, raised by MicroInterp
+class EvaluationError(ErrorMessage):
+	kind = 'runtime error'
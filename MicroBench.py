@@ -0,0 +1,583 @@
+# MicroBench.py : Benchmarks for the MicroScala front end and interpreter
+# MicroBench generates synthetic MicroScala programs of a given size and
+# measures the memory and time spent by the lexer, parser and interpreter
+# on them.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from optparse import OptionParser
+import os, io, sys, time, tempfile, shutil, subprocess, tarfile, atexit
+import tracemalloc
+
+from MicroScalaLexer import MicroScalaLexer
+from MicroTree import MicroTree
+from MicroInterp import MicroInterp, engines
+import MicroMemo, MicroCheck
+from Token import EOF
+from Sink import NullSink, TeeSink
+import AST
+
+# Writes a synthetic program whose main body holds the given number of statements
+# Returns the name of the written file
+def generate(statements, path=None):
+	if path == None:
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+
+	with open(path, 'w') as f:
+		f.write('object Bench {\n')
+		f.write('def main ( args : Array [ String ] ) {\n')
+		f.write('var q : Int = 0 ;\n')
+		f.write('var r : Int = 0 ;\n')
+		for count in range(statements):
+			if count % 2 == 0:
+				f.write('q = q + 1 ; // step\n')
+			else:
+				f.write('r = r + q * 2 ;\n')
+		f.write('println ( q ) ;\n')
+		f.write('}\n}\n')
+
+	return path
+
+# Writes a synthetic program whose main body holds the given number of arithmetic-dense statements
+# Returns the name of the written file
+def generate_expressions(statements, path=None):
+	if path == None:
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+
+	with open(path, 'w') as f:
+		f.write('object Bench {\n')
+		f.write('def main ( args : Array [ String ] ) {\n')
+		f.write('var q : Int = 0 ;\n')
+		f.write('var r : Int = 0 ;\n')
+		for count in range(statements):
+			if count % 2 == 0:
+				f.write('q = ( q + 1 ) * 2 - r / 3 + q * q - - r ;\n')
+			else:
+				f.write('if ( q * 2 + 1 < r - 3 && ! ( r == q ) || q >= 7 ) r = r + q * ( q - 1 ) ;\n')
+		f.write('println ( q ) ;\n')
+		f.write('}\n}\n')
+
+	return path
+
+# Writes a program whose main body runs the division loop of Test1 for the given number of iterations
+# Returns the name of the written file
+def generate_loop(iterations, path=None):
+	if path == None:
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+
+	with open(path, 'w') as f:
+		f.write('object Bench {\n')
+		f.write('def main ( args : Array [ String ] ) {\n')
+		f.write('var q : Int = 0 ;\n')
+		f.write('var r : Int = 0 ;\n')
+		f.write('var x : Int = 0 ;\n')
+		f.write('var y : Int = 0 ;\n')
+		f.write('x = {0} ; y = 5 ;\n'.format(iterations * 5))
+		f.write('r = x ;\n')
+		f.write('while ( r >= y ) {\n')
+		f.write('q = q + 1 ;\n')
+		f.write('r = r - y ;\n')
+		f.write('}\n')
+		f.write('println ( q ) ;\n')
+		f.write('println ( r ) ;\n')
+		f.write('}\n}\n')
+
+	return path
+
+# Writes a program whose main body sums the numbers up to depth with a function recursing depth times
+# Returns the name of the written file
+def generate_recursion(depth, path=None):
+	if path == None:
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+
+	with open(path, 'w') as f:
+		f.write('object Bench {\n')
+		f.write('def sum ( n : Int ) : Int = {\n')
+		f.write('var s : Int = 0 ;\n')
+		f.write('if ( n > 0 ) s = n + sum ( n - 1 ) ;\n')
+		f.write('return s ;\n')
+		f.write('}\n')
+		f.write('def main ( args : Array [ String ] ) {\n')
+		f.write('println ( sum ( {0} ) ) ;\n'.format(depth))
+		f.write('}\n}\n')
+
+	return path
+
+# Writes a program whose main body builds a list of the given length with a function making a
+# tail call of itself for every element, as cons_a_list of Test6
+# Returns the name of the written file
+def generate_tail(depth, path=None):
+	if path == None:
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+
+	with open(path, 'w') as f:
+		f.write('object Bench {\n')
+		f.write('def build ( r : Int , l : List [ Int ] ) : List [ Int ] = {\n')
+		f.write('var my_list : List [ Int ] = Nil ;\n')
+		f.write('my_list = l ;\n')
+		f.write('if ( r != 0 ) {\n')
+		f.write('my_list = r :: my_list ;\n')
+		f.write('my_list = build ( r - 1 , my_list ) ;\n')
+		f.write('}\n')
+		f.write('return my_list ;\n')
+		f.write('}\n')
+		f.write('def main ( args : Array [ String ] ) {\n')
+		f.write('var l : List [ Int ] = Nil ;\n')
+		f.write('l = build ( {0} , l ) ;\n'.format(depth))
+		f.write('println ( l . length ) ;\n')
+		f.write('}\n}\n')
+
+	return path
+
+# Writes a program whose main body builds a list of the given length with :: and walks it
+# with head and tail, summing the elements it passes
+# Returns the name of the written file
+def generate_list(length, path=None):
+	if path == None:
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+
+	with open(path, 'w') as f:
+		f.write('object Bench {\n')
+		f.write('def main ( args : Array [ String ] ) {\n')
+		f.write('var l : List [ Int ] = Nil ;\n')
+		f.write('var i : Int = 0 ;\n')
+		f.write('var s : Int = 0 ;\n')
+		f.write('while ( i < {0} ) {{\n'.format(length))
+		f.write('l = i :: l ;\n')
+		f.write('i = i + 1 ;\n')
+		f.write('}\n')
+		f.write('while ( ! ( l . isEmpty ) ) {\n')
+		f.write('s = s + l . head ;\n')
+		f.write('l = l . tail ;\n')
+		f.write('}\n')
+		f.write('println ( s ) ;\n')
+		f.write('}\n}\n')
+
+	return path
+
+# Writes a program whose main body builds a list of the given length with :: and then sums,
+# measures, reverses and searches it with the bulk list methods
+# Returns the name of the written file
+def generate_methods(length, path=None):
+	if path == None:
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+
+	with open(path, 'w') as f:
+		f.write('object Bench {\n')
+		f.write('def main ( args : Array [ String ] ) {\n')
+		f.write('var l : List [ Int ] = Nil ;\n')
+		f.write('var i : Int = 0 ;\n')
+		f.write('while ( i < {0} ) {{\n'.format(length))
+		f.write('l = i :: l ;\n')
+		f.write('i = i + 1 ;\n')
+		f.write('}\n')
+		f.write('println ( l . length ) ;\n')
+		f.write('println ( l . sum ) ;\n')
+		f.write('println ( l . max - l . min ) ;\n')
+		f.write('println ( l . zipMul ( l . reverse ) . sum ) ;\n')
+		f.write('i = 0 ;\n')
+		f.write('if ( ! ( l . contains ( {0} ) ) ) i = 1 ;\n'.format(length))
+		f.write('println ( i ) ;\n')
+		f.write('}\n}\n')
+
+	return path
+
+# Writes a program whose main body calls a function summing the numbers up to one of twenty
+# arguments, the given number of times, so that most calls repeat an earlier one
+# Returns the name of the written file
+def generate_memo(calls, path=None):
+	if path == None:
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+
+	with open(path, 'w') as f:
+		f.write('object Bench {\n')
+		f.write('def sum ( n : Int ) : Int = {\n')
+		f.write('var s : Int = 0 ;\n')
+		f.write('var i : Int = 0 ;\n')
+		f.write('while ( i < n ) {\n')
+		f.write('i = i + 1 ;\n')
+		f.write('s = s + i ;\n')
+		f.write('}\n')
+		f.write('return s ;\n')
+		f.write('}\n')
+		f.write('def main ( args : Array [ String ] ) {\n')
+		f.write('var s : Int = 0 ;\n')
+		f.write('var i : Int = 0 ;\n')
+		f.write('while ( i < {0} ) {{\n'.format(calls))
+		f.write('s = s + sum ( i - i / 20 * 20 + 10 ) ;\n')
+		f.write('i = i + 1 ;\n')
+		f.write('}\n')
+		f.write('println ( s ) ;\n')
+		f.write('}\n}\n')
+
+	return path
+
+# Writes a program whose main body calls a function running a loop of the given number of
+# iterations that sums products of its counter and expressions of arguments it never changes
+# Returns the name of the written file
+def generate_invariant(iterations, path=None):
+	if path == None:
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+
+	with open(path, 'w') as f:
+		f.write('object Bench {\n')
+		f.write('def run ( a : Int , b : Int , n : Int ) : Int = {\n')
+		f.write('var i : Int = 0 ;\n')
+		f.write('var s : Int = 0 ;\n')
+		f.write('var t : Int = 0 ;\n')
+		f.write('while ( i < n ) {\n')
+		f.write('s = s + i * a + ( a * b - n / 2 ) ;\n')
+		f.write('t = t + i * a * b ;\n')
+		f.write('i = i + 1 ;\n')
+		f.write('}\n')
+		f.write('println ( t ) ;\n')
+		f.write('return s ;\n')
+		f.write('}\n')
+		f.write('def main ( args : Array [ String ] ) {\n')
+		f.write('println ( run ( 3 , 5 , {0} ) ) ;\n'.format(iterations))
+		f.write('}\n}\n')
+
+	return path
+
+# Writes a program whose main body runs a loop of the given number of iterations, calling two
+# small functions in every iteration, one of them calling the other
+# Returns the name of the written file
+def generate_calls(iterations, path=None):
+	if path == None:
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+
+	with open(path, 'w') as f:
+		f.write('object Bench {\n')
+		f.write('def square ( x : Int ) : Int = {\n')
+		f.write('var y : Int = 0 ;\n')
+		f.write('y = x * x ;\n')
+		f.write('return y ;\n')
+		f.write('}\n')
+		f.write('def norm ( a : Int , b : Int ) : Int = {\n')
+		f.write('var n : Int = 0 ;\n')
+		f.write('n = square ( a ) + square ( b ) ;\n')
+		f.write('return n ;\n')
+		f.write('}\n')
+		f.write('def main ( args : Array [ String ] ) {\n')
+		f.write('var s : Int = 0 ;\n')
+		f.write('var i : Int = 0 ;\n')
+		f.write('while ( i < {0} ) {{\n'.format(iterations))
+		f.write('s = s + norm ( i , 3 ) ;\n')
+		f.write('s = s - square ( i ) ;\n')
+		f.write('i = i + 1 ;\n')
+		f.write('}\n')
+		f.write('println ( s ) ;\n')
+		f.write('}\n}\n')
+
+	return path
+
+# Writes a directory of the given number of programs, each with the 200 statements of generate
+# Returns the name of the written directory
+def generate_files(count, path=None):
+	if path == None:
+		path = tempfile.mkdtemp()
+
+	for index in range(count):
+		generate(200, os.path.join(path, 'Bench{0}.scala'.format(index)))
+
+	return path
+
+# Measures the memory held by a list of Token objects against a TokenBuffer for one file
+# Returns (tokens, bytes for Token list, bytes for TokenBuffer)
+def token_memory(file):
+	# today's Token list, built from a lexer that keeps no tokens of its own
+	tracemalloc.start()
+	lexer = MicroScalaLexer(_input=file, stream=True, echo=NullSink())
+	base = tracemalloc.get_traced_memory()[0]
+	token_list = []
+	token = lexer.nextToken()
+	while token.symbol() != 'EOF':
+		token_list.append(token)
+		token = lexer.nextToken()
+	list_bytes = tracemalloc.get_traced_memory()[0] - base
+	tracemalloc.stop()
+	del lexer
+
+	# the compact TokenBuffer kept by a buffered lexer
+	tracemalloc.start()
+	lexer = MicroScalaLexer(_input=file, echo=NullSink())
+	base = tracemalloc.get_traced_memory()[0]
+	while lexer.scan() != EOF:
+		pass
+	buffer_bytes = tracemalloc.get_traced_memory()[0] - base
+	tracemalloc.stop()
+
+	return len(token_list), list_bytes, buffer_bytes
+
+# Measures the time taken to lex and parse one file into an AST
+# Returns the time in seconds
+def parse_time(file):
+	start = time.time()
+	MicroTree(_input=file, echo=NullSink())
+	return time.time() - start
+
+# Measures the memory held by the AST of one file and the time of a walk over every node
+# Returns (nodes, bytes per node, walk time in seconds)
+def ast_size(file):
+	tracemalloc.start()
+	tree = MicroTree(_input=file, echo=NullSink()).tree
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+
+	start = time.time()
+	nodes = 0
+	stack = [tree]
+	while len(stack) > 0:
+		node = stack.pop()
+		nodes += 1
+		stack.extend(AST.children(node))
+
+	return nodes, round(float(size) / nodes, 1), time.time() - start
+
+# BASELINE is the last revision whose MicroTree parsed expressions by recursive descent, one
+# method per precedence level, before precedence climbing replaced it
+BASELINE = 'bad4da7^'
+
+# PARSE_STATS is run by python in the directory of a revision of the project: it prints the
+# best of three CPU times taken to lex and parse the file named by its argument, the best of three
+# CPU times taken to lex it alone, the calls made to parser methods and the tokens of the file;
+# as with timeit, the garbage collector is off while timing, so that its passes over the growing
+# AST are not counted against either parser
+PARSE_STATS = """
+import sys, time, gc
+from MicroTree import MicroTree
+from MicroScalaLexer import MicroScalaLexer
+from Token import EOF
+from Sink import NullSink
+
+file = sys.argv[1]
+
+def best(run):
+	times = []
+	for repeat in range(3):
+		gc.collect()
+		gc.disable()
+		start = time.process_time()
+		run()
+		times.append(time.process_time() - start)
+		gc.enable()
+	return min(times)
+
+def lex():
+	lexer = MicroScalaLexer(_input=file, echo=NullSink())
+	while lexer.scan() != EOF:
+		pass
+
+codes = set()
+for klass in MicroTree.__mro__:
+	for value in vars(klass).values():
+		if hasattr(value, '__code__'):
+			codes.add(value.__code__)
+
+calls = [0]
+def profile(frame, event, arg):
+	if event == 'call' and frame.f_code in codes:
+		calls[0] += 1
+
+sys.setprofile(profile)
+tree = MicroTree(_input=file, echo=NullSink())
+sys.setprofile(None)
+
+print(best(lambda: MicroTree(_input=file, echo=NullSink())), best(lex), calls[0], len(tree.lexer.token_buffer()))
+"""
+
+# checkouts maps each revision extracted by checkout to its directory
+checkouts = {}
+
+# Extracts the files of a revision of the project from git into a temporary directory, removed
+# when the benchmarks end
+# Returns the name of the directory
+def checkout(revision):
+	if revision not in checkouts:
+		directory = tempfile.mkdtemp()
+		atexit.register(shutil.rmtree, directory, True)
+		archive = subprocess.check_output(['git', 'archive', '--format=tar', revision], cwd=os.path.dirname(os.path.abspath(__file__)))
+		tarfile.open(fileobj=io.BytesIO(archive)).extractall(directory)
+		checkouts[revision] = directory
+	return checkouts[revision]
+
+# parse_rounds is the number of times expr_time runs PARSE_STATS for each parser, alternating
+# between them, so that a slow spell of the machine does not fall on one parser alone
+parse_rounds = 3
+
+# Runs PARSE_STATS on one file with the project found in a directory, in a fresh process
+# Returns (parse time, lexing time, parser calls/token)
+def parse_stats(directory, file):
+	output = subprocess.check_output([sys.executable, '-c', PARSE_STATS, os.path.abspath(file)], cwd=directory)
+	parse, lex, calls, tokens = output.split()
+	return (float(parse), float(lex), round(float(calls) / int(tokens), 2))
+
+# Measures the times taken to parse one file by the recursive-descent MicroTree of the BASELINE
+# revision and by the precedence-climbing MicroTree, the times taken by their lexers alone, which
+# both parse times include, and the parser calls made per token by each, keeping the best time of
+# parse_rounds runs of each
+# Returns (descent time, climbing time, descent lexing time, climbing lexing time,
+# descent calls/token, climbing calls/token)
+def expr_time(file):
+	directories = [checkout(BASELINE), os.path.dirname(os.path.abspath(__file__))]
+	best = [None, None]
+	for round in range(parse_rounds):
+		for side, directory in enumerate(directories):
+			stats = parse_stats(directory, file)
+			best[side] = stats if best[side] is None else tuple(min(a, b) for a, b in zip(best[side], stats))
+	descent, climbing = best
+	return (descent[0], climbing[0], descent[1], climbing[1], descent[2], climbing[2])
+
+# optimize_levels lists the optimization levels timed by optimize_time
+optimize_levels = [0, 1, 2, 3]
+
+# run_engines lists the engines timed by run_time, the tree-walker first
+run_engines = ['tree'] + sorted(engines)
+
+# Measures the time taken to lex, parse and run one file with the tree-walker and with every
+# other engine, checking that every engine prints the same output
+# Returns the time in seconds for each engine, in the order of run_engines
+def run_time(file):
+	times = ()
+	outputs = []
+	for engine in run_engines:
+		output = TeeSink(NullSink())
+		start = time.time()
+		MicroInterp(_input=file, echo=NullSink(), output=output, engine=engine, deep=True)
+		times += (time.time() - start,)
+		outputs.append('\n'.join(output.lines))
+
+	if len(set(outputs)) != 1:
+		raise AssertionError('engines disagree on {0}'.format(file))
+
+	return times
+
+# Measures the time taken to lex, parse and run one file with the tree-walker caching the
+# values of pure functions and without, checking that both print the same output
+# Returns the time in seconds with and without the cache
+def memo_time(file):
+	times = ()
+	outputs = []
+	for memo in [MicroMemo.SIZE, 0]:
+		output = TeeSink(NullSink())
+		start = time.time()
+		MicroInterp(_input=file, echo=NullSink(), output=output, memo=memo, deep=True)
+		times += (time.time() - start,)
+		outputs.append('\n'.join(output.lines))
+
+	if outputs[0] != outputs[1]:
+		raise AssertionError('memoization changes the output of {0}'.format(file))
+
+	return times
+
+# Measures the time taken to lex, parse, optimize and run one file with the tree-walker at every
+# optimization level, checking that every level prints the same output
+# Returns the time in seconds at each level
+def optimize_time(file):
+	times = ()
+	outputs = []
+	for level in optimize_levels:
+		output = TeeSink(NullSink())
+		start = time.time()
+		MicroInterp(_input=file, echo=NullSink(), output=output, optimize=level, deep=True)
+		times += (time.time() - start,)
+		outputs.append('\n'.join(output.lines))
+
+	if len(set(outputs)) != 1:
+		raise AssertionError('optimization changes the output of {0}'.format(file))
+
+	return times
+
+# CHECK_JOBS is the default largest number of worker processes timed by check_time
+CHECK_JOBS = 4
+
+# check_jobs lists the numbers of worker processes timed by check_time, from 1 to the number
+# given to main
+check_jobs = list(range(1, CHECK_JOBS + 1))
+
+# Measures the time taken by MicroCheck to check every file of a directory with each number of
+# worker processes, checking that every number finds the same files and errors
+# Returns the time in seconds for each number of workers, in the order of check_jobs
+def check_time(path):
+	times = ()
+	checked = []
+	for jobs in check_jobs:
+		start = time.time()
+		found = sorted((index, file, repr(error)) for index, file, seconds, error in MicroCheck.results([path], jobs=jobs))
+		times += (time.time() - start,)
+		checked.append(found)
+
+	if any(found != checked[0] for found in checked):
+		raise AssertionError('workers disagree on {0}'.format(path))
+
+	return times
+
+# Prints a table with one row per size for a benchmark that takes a generated file or directory
+def table(title, headers, sizes, bench, generator=generate):
+	print(title)
+	print(''.join('{0:>14}'.format(header) for header in ['stmts'] + headers))
+	for size in sizes:
+		path = generator(size)
+		try:
+			row = bench(path)
+		finally:
+			if os.path.isdir(path):
+				shutil.rmtree(path)
+			else:
+				os.remove(path)
+		if type(row) != tuple:
+			row = (row,)
+		print(''.join('{0:>14}'.format(round(value, 4) if type(value) == float else value) for value in (size,) + row))
+	print('')
+
+# benches maps each benchmark name to its title, column headers, function and program generator,
+# the headers being a function returning them when they depend on the options of main
+benches = {
+	'tokens': ('Token memory (bytes)', ['tokens', 'Token list', 'TokenBuffer'], token_memory, generate),
+	'parse':  ('Parse time (s)', ['MicroTree'], parse_time, generate),
+	'ast':    ('AST size', ['nodes', 'bytes/node', 'walk (s)'], ast_size, generate),
+	'expr':   ('Expression parse time (s)', ['descent', 'climbing', 'descent lex', 'climbing lex', 'descent/tok', 'climbing/tok'], expr_time, generate_expressions),
+	'run':    ('Run time of a loop (s)', run_engines, run_time, generate_loop),
+	'recursion': ('Run time of a recursion (s)', run_engines, run_time, generate_recursion),
+	'tail': ('Run time of a tail-recursive function (s)', run_engines, run_time, generate_tail),
+	'list': ('Run time of building and walking a list (s)', run_engines, run_time, generate_list),
+	'methods': ('Run time of building a list and calling list methods (s)', run_engines, run_time, generate_methods),
+	'memo': ('Run time of repeated calls of a pure function (s)', ['memo', 'no memo'], memo_time, generate_memo),
+	'loops': ('Run time of a counting loop by optimization level (s)', ['-O 0', '-O 1', '-O 2', '-O 3'], optimize_time, generate_loop),
+	'invariant': ('Run time of a loop with invariants by optimization level (s)', ['-O 0', '-O 1', '-O 2', '-O 3'], optimize_time, generate_invariant),
+	'inline': ('Run time of a loop calling small functions by optimization level (s)', ['-O 0', '-O 1', '-O 2', '-O 3'], optimize_time, generate_calls),
+	'check': ('Batch check time of a directory of programs by worker processes (s)', lambda: ['-j {0}'.format(jobs) for jobs in check_jobs], check_time, generate_files),
+}
+
+def main(sizes, names, jobs=CHECK_JOBS):
+	check_jobs[:] = range(1, jobs + 1)
+	for name in names:
+		title, headers, bench, generator = benches[name]
+		table(title, headers() if callable(headers) else headers, sizes, bench, generator)
+
+if __name__ == '__main__':
+	usage = "usage: %prog [options]"
+	parser = OptionParser(usage=usage)
+
+	parser.add_option("-n", "--sizes", default="1000,10000,100000",
+					  help="comma separated numbers of statements to benchmark")
+	parser.add_option("-b", "--bench", default="tokens,parse,ast,expr,run",
+					  help="comma separated benchmarks to run: " + ', '.join(sorted(benches)))
+	parser.add_option("-j", "--jobs", type="int", default=CHECK_JOBS,
+					  help="time the check benchmark with 1 to JOBS worker processes [default: %default]")
+
+	(options, args) = parser.parse_args()
+
+	main(sizes=[int(size) for size in options.sizes.split(',')], names=options.bench.split(','), jobs=options.jobs)
@@ -0,0 +1,185 @@
+# MicroCache.py : Persistent on-disk parse cache for the MicroScala project
+# ParseCache stores the AST.Program of every successfully parsed source in a cache
+# directory, keyed by a hash of the source text and the cache format version, so
+# that later runs of the same program skip the lexer and parser entirely. The source
+# listing echoed while parsing is stored alongside and replayed on a hit. Entries are
+# written atomically and the least recently used ones are evicted above a size limit.
+# Entries are pickles, so the directory is created private to the user and an entry
+# owned by anyone else is never loaded.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from optparse import OptionParser
+import os, sys, hashlib, tempfile
+import pickle
+
+from MicroTree import MicroTree
+from Sink import StreamSink, TeeSink
+
+# FORMAT is the version of the cache entry layout; bump it whenever AST classes or the grammar change
+FORMAT = 3
+
+# SUFFIX ends the name of every cache entry file
+SUFFIX = '.mscache'
+
+# Returns the default cache directory, $MICROSCALA_CACHE or ~/.cache/microscala
+def default_directory():
+	return os.environ.get('MICROSCALA_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'microscala'))
+
+# Returns whether the open file is owned by the user running the program, as any file is
+# where there are no user ids
+def owned(f):
+	if not hasattr(os, 'getuid'):
+		return True
+	return os.fstat(f.fileno()).st_uid == os.getuid()
+
+class ParseCache(object):
+	def __init__(self, directory=None, limit=64 * 1024 * 1024):
+		self.directory = directory if directory != None else default_directory()
+		self.limit = limit
+
+	# Returns the path of the cache entry for the given source text
+	def path(self, text):
+		key = hashlib.sha256()
+		key.update('{0} {1} {2}\n'.format(FORMAT, sys.version_info[0], pickle.HIGHEST_PROTOCOL).encode('utf-8'))
+		key.update(text.encode('utf-8'))
+		return os.path.join(self.directory, key.hexdigest() + SUFFIX)
+
+	# Returns (tree, listing) stored for the given source text, or None on a miss
+	def load(self, text):
+		path = self.path(text)
+
+		try:
+			with open(path, 'rb') as f:
+				# unpickling runs code, so an entry written by another user is a miss
+				if not owned(f):
+					return None
+				entry = pickle.load(f)
+		except (IOError, OSError):
+			return None
+		# an unreadable entry is dropped and counts as a miss
+		except Exception:
+			self.remove(path)
+			return None
+
+		# mark the entry as recently used
+		try:
+			os.utime(path, None)
+		except OSError:
+			pass
+
+		return entry
+
+	# Stores the tree and source listing for the given source text
+	def store(self, text, tree, listing):
+		if not os.path.isdir(self.directory):
+			try:
+				os.makedirs(self.directory, 0o700)
+			except OSError:
+				if not os.path.isdir(self.directory):
+					raise
+
+		# write to a temporary file in the cache directory, then move it into place
+		# so that concurrent runners never see a partially written entry
+		fd, temp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+		try:
+			with os.fdopen(fd, 'wb') as f:
+				pickle.dump((tree, listing), f, pickle.HIGHEST_PROTOCOL)
+			getattr(os, 'replace', os.rename)(temp, self.path(text))
+		except Exception:
+			self.remove(temp)
+			raise
+
+		self.evict()
+
+	# Removes the least recently used entries until the cache fits within the size limit
+	def evict(self):
+		entries = []
+		total = 0
+
+		for path in self.entries():
+			try:
+				stat = os.stat(path)
+			except OSError:
+				continue
+			entries.append((stat.st_mtime, stat.st_size, path))
+			total += stat.st_size
+
+		entries.sort()
+		for mtime, size, path in entries:
+			if total <= self.limit:
+				break
+			self.remove(path)
+			total -= size
+
+	# Removes every entry from the cache
+	def clear(self):
+		for path in self.entries():
+			self.remove(path)
+
+	# Returns the paths of all cache entries
+	def entries(self):
+		if not os.path.isdir(self.directory):
+			return []
+		return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(SUFFIX)]
+
+	# Removes one file, ignoring files already removed by another runner
+	def remove(self, path):
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+
+# CachedTree stands in for a MicroTree whose AST was loaded from the cache
+class CachedTree(object):
+	def __init__(self, tree):
+		self.tree = tree
+
+# Parses the given file through the cache
+# Returns a MicroTree on a miss, or a CachedTree on a hit after replaying the source listing
+def parse(_input, cache, echo=None):
+	echo = echo if echo != None else StreamSink()
+
+	with open(_input, 'r') as f:
+		text = f.read()
+
+	entry = cache.load(text)
+	if entry != None:
+		tree, listing = entry
+		if echo.enabled:
+			for line in listing:
+				echo.write(line)
+		return CachedTree(tree)
+
+	# record the listing while parsing so that it can be replayed on later hits
+	tee = TeeSink(echo)
+	tree = MicroTree(text=text, echo=tee, filename=_input)
+	cache.store(text, tree.tree, tee.lines)
+
+	return tree
+
+def main(directory, clear):
+	cache = ParseCache(directory=directory)
+	entries = cache.entries()
+	size = sum(os.path.getsize(path) for path in entries)
+
+	print('{0}: {1} entries, {2} bytes'.format(cache.directory, len(entries), size))
+
+	if clear:
+		cache.clear()
+		print('cleared')
+
+if __name__ == '__main__':
+	usage = "usage: %prog [options]"
+	parser = OptionParser(usage=usage)
+
+	parser.add_option("--cache-dir", default=None, metavar="DIR",
+					  help="cache directory (default $MICROSCALA_CACHE or ~/.cache/microscala)")
+	parser.add_option("--clear", action="store_true", default=False,
+					  help="remove every cache entry")
+
+	(options, args) = parser.parse_args()
+
+	main(directory=options.cache_dir, clear=options.clear)
@@ -0,0 +1,175 @@
+# MicroCheck.py : Batch checker for MicroScala programs
+# MicroCheck lexes, parses, resolves and type checks any number of MicroScala files in one process,
+# optionally running each one as well, and reports every error found once all
+# files have been checked. The exit code is nonzero when any file has an error.
+# With several jobs the files are checked in chunks by a pool of worker processes,
+# and with json a record for every file, holding its index among the files found,
+# is written as soon as its chunk is done.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from optparse import OptionParser
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import os, sys, time, json
+
+from MicroTree import MicroTree
+from MicroInterp import MicroInterp
+from MicroResolve import Resolver
+from MicroTypeCheck import TypeChecker
+from ErrorMessage import ErrorMessage
+from Sink import NullSink
+
+# SUFFIX ends the name of every MicroScala file found in a directory
+SUFFIX = '.scala'
+
+# Returns the files named by paths, with directories searched recursively for MicroScala files
+def files(paths):
+	for path in paths:
+		if os.path.isdir(path):
+			for root, dirs, names in os.walk(path):
+				dirs.sort()
+				for name in sorted(names):
+					if name.endswith(SUFFIX):
+						yield os.path.join(root, name)
+		else:
+			yield path
+
+# Checks one file, parsing, resolving and type checking it or, with run, also running it with all output discarded
+# Returns the ErrorMessage() found in the file, or None
+def check(file, run=False):
+	try:
+		if run:
+			MicroInterp(_input=file, echo=NullSink(), diagnostics=NullSink(), output=NullSink(), deep=True)
+		else:
+			tree = MicroTree(_input=file, echo=NullSink()).tree
+			TypeChecker(tree, Resolver(tree), file)
+	except ErrorMessage as error:
+		if error.filename == None:
+			error.filename = file
+		return error
+	except (IOError, OSError) as error:
+		return ErrorMessage('cannot read file: {0}'.format(error.strerror), filename=file)
+	# Python's recursion limit stops the parser on very deeply nested input, and a run of a
+	# program recursing too deeply
+	except RecursionError:
+		return ErrorMessage('program nested too deeply', filename=file)
+
+	return None
+
+# Checks a chunk of (index, file) pairs in a worker process
+# Returns a list with (index, file, seconds taken, ErrorMessage() or None) for each file
+def check_chunk(chunk, run=False):
+	results = []
+	for index, file in chunk:
+		start = time.time()
+		error = check(file, run)
+		results.append((index, file, time.time() - start, error))
+	return results
+
+# Returns the files split into lists of at most size files
+def chunks(files, size):
+	chunk = []
+	for file in files:
+		chunk.append(file)
+		if len(chunk) == size:
+			yield chunk
+			chunk = []
+	if len(chunk) > 0:
+		yield chunk
+
+# Checks every file, with jobs worker processes given chunksize files at a time when jobs > 1
+# Yields (index, file, seconds taken, ErrorMessage() or None) in the order the files are done,
+# where index is the position of the file among the files found
+def results(paths, run=False, jobs=1, chunksize=16):
+	if jobs <= 1:
+		for result in check_chunk(enumerate(files(paths)), run):
+			yield result
+		return
+
+	pending = chunks(enumerate(files(paths)), chunksize)
+	with ProcessPoolExecutor(max_workers=jobs) as pool:
+		# keep two chunks per worker in flight so that the file list is walked lazily
+		running = set()
+		for chunk in pending:
+			running.add(pool.submit(check_chunk, chunk, run))
+			if len(running) >= 2 * jobs:
+				break
+
+		while len(running) > 0:
+			done, running = wait(running, return_when=FIRST_COMPLETED)
+			for future in done:
+				for result in future.result():
+					yield result
+
+				chunk = next(pending, None)
+				if chunk != None:
+					running.add(pool.submit(check_chunk, chunk, run))
+
+# Returns the JSON line reporting the result of checking one file
+def record(index, file, seconds, error):
+	entry = {'index': index, 'file': file, 'status': 'ok' if error == None else 'error', 'time': round(seconds, 6)}
+	if error != None:
+		entry['error'] = {'kind': error.kind, 'message': error.message,
+			'line': error.line + 1 if error.line != None else None, 'position': error.position}
+	return json.dumps(entry, sort_keys=True)
+
+# Checks every file and prints the errors found, then a summary
+# With as_json prints a JSON line for every file as it is done instead, and the summary on stderr
+# Returns the number of files with an error
+def main(paths, run=False, quiet=False, jobs=1, chunksize=16, as_json=False):
+	errors = []
+	count = 0
+	start = time.time()
+
+	for index, file, seconds, error in results(paths, run, jobs, chunksize):
+		count += 1
+		if as_json:
+			print(record(index, file, seconds, error))
+			sys.stdout.flush()
+		if error != None:
+			errors.append(error)
+
+	summary = '{0} files checked, {1} with errors'.format(count, len(errors))
+	if as_json:
+		sys.stderr.write('{0} in {1:.2f}s\n'.format(summary, time.time() - start))
+		return len(errors)
+
+	for error in errors:
+		print(str(error))
+		if not quiet and error.position != None:
+			for line in error.lines():
+				print(line)
+
+	print(summary)
+
+	return len(errors)
+
+if __name__ == '__main__':
+	usage = "usage: %prog [options] PATH..."
+	parser = OptionParser(usage=usage)
+
+	parser.add_option("-r", "--run", action="store_true", default=False,
+					  help="also run each program to find type and runtime errors")
+	parser.add_option("-q", "--quiet", action="store_true", default=False,
+					  help="print one line per error, without the source line")
+	parser.add_option("-j", "--jobs", type="int", default=1,
+					  help="number of worker processes, 0 for one per CPU (default 1)")
+	parser.add_option("-c", "--chunksize", type="int", default=16,
+					  help="number of files given to a worker at a time (default 16)")
+	parser.add_option("--json", action="store_true", dest="json", default=False,
+					  help="print a JSON line with index, status, time and error for every file as it is done")
+
+	(options, args) = parser.parse_args()
+
+	if len(args) == 0:
+		parser.error("Please provide required arguments: Location of scala files or directories")
+	if options.jobs < 0 or options.chunksize < 1:
+		parser.error("--jobs must be 0 or more and --chunksize 1 or more")
+
+	jobs = options.jobs if options.jobs > 0 else os.cpu_count() or 1
+
+	if main(paths=args, run=options.run, quiet=options.quiet, jobs=jobs,
+			chunksize=options.chunksize, as_json=options.json) > 0:
+		sys.exit(1)
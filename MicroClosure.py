@@ -0,0 +1,540 @@
+# MicroClosure.py : Closure-compiling execution engine for the MicroScala project
+# MicroClosure walks the AST of a program once and turns every node into a Python
+# closure specialized for the kind of node, its operator and its operands, so that
+# running the program is a single call of the root closure with no dispatch on
+# node attributes left. Each closure takes the frame, the dict of local variables
+# of the running function, and reproduces the behaviour of the matching
+# MicroInterp method, printing the same output.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from ErrorMessage import EvaluationError
+from MicroTypeCheck import TypeChecker
+from MicroTailCall import TailCalls
+from Sink import StreamSink
+from MicroList import ConsList, NIL
+from MicroIntrinsics import methods as list_methods
+from MicroRuntime import literal, cons, head, tail, is_empty, divide, equal, not_equal
+from MicroRuntime import declared_type, check_arg, arity_error, function_table
+
+class MicroClosure(object):
+	def __init__(self, tree, output=None, types=None):
+		self.tree = tree
+		self.output = output if output != None else StreamSink()
+
+		# the parameters of calls whose types the TypeChecker proved, which are not checked again
+		self.proven = (types if types != None else TypeChecker(tree)).proven
+
+		# Global variables; the set of names never changes once the globals are declared,
+		# so whether a name is global is known while compiling
+		self.globals = {}
+		self.globalNames = set(var.name for var in tree.decVarList)
+
+		# table maps each function name to its function; functions holds the compiled call of
+		# each function, filled in once every function is compiled so that calls may be recursive
+		self.table = function_table(tree.funcList)
+		self.functions = {}
+
+		# the tail calls of functions of themselves, run as loops; tail holds the call a running
+		# function has left to make when its body finishes
+		self.tails = TailCalls(tree)
+		self.tail = [None]
+
+		self.main = self.Prog(tree)
+
+	# Runs the compiled program
+	def run(self):
+		self.main(self.globals)
+
+	# Returns a closure raising error when run, so that a malformed node halts the program
+	# at the point MicroInterp would find it
+	def fail(self, error):
+		def run(frame):
+			raise error
+		return run
+
+	# Compiles an operator MicroInterp does not support, whose closure evaluates the operands,
+	# as MicroInterp does, before raising the error
+	def Unsupported(self, op, term1, term2):
+		error = EvaluationError('Operand not supported: {0}'.format(repr(op)))
+		def run(frame):
+			term1(frame)
+			term2(frame)
+			raise error
+		return run
+
+	# Compiles AST.Program tree object
+	def Prog(self, tree):
+		if tree.stmt == None:
+			return self.fail(EvaluationError('empty file'))
+
+		inits = [self.InitVar(var) for var in tree.decVarList]
+		main = self.Main(tree.stmt)
+
+		for func in self.table.values():
+			self.functions[func.name] = self.Func(func)
+
+		def run(frame):
+			for init in inits:
+				init(frame)
+			main(frame)
+		return run
+
+	# Compiles AST.Program tree object of main, run in a frame of its own
+	def Main(self, tree):
+		if tree.stmt == None:
+			return self.fail(EvaluationError(repr(tree)))
+
+		inits = [self.InitVar(var) for var in tree.decVarList]
+		stmt = self.Stmt(tree.stmt)
+
+		def run(frame):
+			local = {}
+			for init in inits:
+				init(local)
+			stmt(local)
+		return run
+
+	# Compiles the declaration of a variable, initialized as MicroInterp.InitVar
+	def InitVar(self, tree):
+		store = self.Store(tree.name)
+		value = tree.value
+
+		def run(frame):
+			store(frame, literal(value))
+		return run
+
+	# Compiles a function of funcList into a closure running its body in a new frame
+	# Returns (argument list, initializers of locals, body)
+	def Func(self, tree):
+		inits = [self.InitVar(var) for var in tree.decVarList]
+		return (tree.argList, inits, self.Stmt(tree.stmt))
+
+	# Returns a closure storing a value into the variable name as MicroInterp.update_env:
+	# into the global when there is one, otherwise into the frame, and only an Int or a List,
+	# so that a value of None, True or False leaves the variable unchanged
+	def Store(self, name):
+		g = self.globals
+		isGlobal = name in self.globalNames
+
+		def store(frame, value):
+			if type(value) is not int and type(value) is not ConsList:
+				return
+
+			if isGlobal:
+				g[name] = value
+			else:
+				frame[name] = value
+		return store
+
+	# Compiles a read of a variable or literal as MicroInterp.access_env, the global before the local
+	def Access(self, tree):
+		if tree.name == 'int':
+			value = literal(tree)
+			return lambda frame: value
+
+		name = tree.name
+		if name in self.globalNames:
+			g = self.globals
+			return lambda frame: g[name]
+		return lambda frame: frame.get(name)
+
+	# Compiles a statement tree object, whose closure returns the output of MicroInterp.Stmt
+	def Stmt(self, tree):
+		# Block of statements, run in order; the last statement gives the output
+		if hasattr(tree, 'stmts'):
+			stmts = tuple(self.Stmt(stmt) for stmt in tree.stmts)
+
+			def run(frame):
+				out = None
+				for stmt in stmts:
+					out = stmt(frame)
+				return out
+
+		# Variable assignment
+		elif hasattr(tree, 'lhs'):
+			if tree.lhs != None and tree.rhs != None:
+				run = self.Var(tree)
+			else:
+				run = self.fail(EvaluationError('Broken assignment {0}'.format(repr(tree))))
+
+		# While-loop
+		elif hasattr(tree, 'cond') and tree.name == 'while':
+			if tree.cond != None and tree.statement != None:
+				cond = self.Cond(tree.cond)
+				stmt = self.Stmt(tree.statement)
+
+				def run(frame):
+					out = None
+					while cond(frame) is True:
+						out = stmt(frame)
+					return out
+			else:
+				run = self.fail(EvaluationError('Broken while-loop {0}'.format(repr(tree))))
+
+		# If-statement
+		elif hasattr(tree, 'cond') and tree.name == 'if':
+			if tree.cond != None and tree.term1 != None:
+				cond = self.Cond(tree.cond)
+				term1 = self.Stmt(tree.term1)
+
+				def run(frame):
+					if cond(frame) is True:
+						return term1(frame)
+					return None
+			else:
+				run = self.fail(EvaluationError('Broken if statement {0}'.format(repr(tree))))
+
+		# If-Else-statement
+		elif hasattr(tree, 'cond') and tree.name == 'if-else':
+			if tree.cond != None and tree.term1 != None and tree.term2 != None:
+				cond = self.Cond(tree.cond)
+				term1 = self.Stmt(tree.term1)
+				term2 = self.Stmt(tree.term2)
+
+				def run(frame):
+					if cond(frame) is True:
+						return term1(frame)
+					return term2(frame)
+			else:
+				run = self.fail(EvaluationError('Broken if-else statement {0}'.format(repr(tree))))
+
+		elif hasattr(tree, 'cond'):
+			run = lambda frame: None
+
+		# Expression evaluation
+		elif hasattr(tree, 'op'):
+			run = self.Expr(tree)
+
+		# Println
+		elif hasattr(tree, 'name') and tree.name == 'println':
+			output = self.output
+			expr = self.Param(tree.expr)
+
+			def run(frame):
+				output.write(expr(frame))
+
+		# Return
+		elif hasattr(tree, 'name') and tree.name == 'return':
+			run = self.Expr(tree.expr)
+
+		elif hasattr(tree, 'name'):
+			run = lambda frame: None
+
+		else:
+			run = self.fail(EvaluationError(repr(tree)))
+
+		return run
+
+	# Compiles AST.Assignment tree object
+	def Var(self, tree):
+		if not hasattr(tree.lhs, 'name'):
+			return self.fail(EvaluationError('LHS not a variable: {0}'.format(repr(tree.lhs))))
+
+		# a tail call is left for the call running the function to make once the body has finished
+		if tree in self.tails.sites:
+			return self.TailCall(tree)
+
+		name = tree.lhs.name
+		isGlobal = name in self.globalNames
+		g = self.globals
+
+		# rhs is a value, the empty list for Nil, which is never changed and so shared
+		if hasattr(tree.rhs, 'value'):
+			value = literal(tree.rhs)
+
+			if isGlobal:
+				def run(frame):
+					g[name] = value
+			else:
+				def run(frame):
+					frame[name] = value
+
+		# rhs is a variable, copied from the global before the local, and nothing stored without one
+		elif hasattr(tree.rhs, 'name') and not hasattr(tree.rhs, 'parameterList'):
+			source = tree.rhs.name
+			sourceGlobal = source in self.globalNames
+
+			def run(frame):
+				if sourceGlobal:
+					value = g[source]
+				elif source in frame:
+					value = frame[source]
+				else:
+					return
+
+				if isGlobal:
+					g[name] = value
+				else:
+					frame[name] = value
+
+		# rhs is an expression or a function call, whose value is stored directly when it is an
+		# integer or a list
+		elif hasattr(tree.rhs, 'op') or hasattr(tree.rhs, 'name'):
+			if hasattr(tree.rhs, 'op'):
+				rhs = self.Expr(tree.rhs)
+			else:
+				rhs = self.FuncHead(tree.rhs)
+			store = self.Store(name)
+
+			if isGlobal:
+				def run(frame):
+					value = rhs(frame)
+					if type(value) is int or type(value) is ConsList:
+						g[name] = value
+					else:
+						store(frame, value)
+			else:
+				def run(frame):
+					value = rhs(frame)
+					if type(value) is int or type(value) is ConsList:
+						frame[name] = value
+					else:
+						store(frame, value)
+
+		# rhs is empty
+		else:
+			store = self.Store(name)
+
+			def run(frame):
+				store(frame, None)
+
+		return run
+
+	# Compiles AST.FunctionCall tree object
+	# Each argument is evaluated once, checked against the function declaration unless its type
+	# was proven, and bound in a new frame as MicroInterp.FuncBody
+	def FuncHead(self, tree):
+		name = tree.name
+		called = self.table.get(name)
+		if called == None:
+			return self.fail(EvaluationError('Function not found: {0}'.format(name)))
+
+		error = arity_error(name, called, len(tree.parameterList))
+		if error != None:
+			return self.fail(error)
+
+		bind = self.Bind(tree, called)
+		functions = self.functions
+		funcName = called.name
+
+		if called not in self.tails.loops:
+			def run(frame):
+				local = bind(frame)
+				argList, inits, stmt = functions[funcName]
+				for init in inits:
+					init(local)
+				return stmt(local)
+			return run
+
+		# a function making tail calls of itself runs them one after another, then gives each
+		# call the value of the next as its own assignment would, as MicroInterp.FuncBody
+		g = self.globals
+		tail = self.tail
+
+		def run(frame):
+			local = bind(frame)
+			argList, inits, stmt = functions[funcName]
+			pending = []
+			while True:
+				for init in inits:
+					init(local)
+				out = stmt(local)
+				if tail[0] == None:
+					break
+				(site, first, local) = tail[0]
+				tail[0] = None
+				pending.append((site, first, out))
+
+			for ((isCons, name, isGlobal, store), first, last) in reversed(pending):
+				if isCons:
+					out = cons(first, out)
+
+				stored = {}
+				store(stored, out)
+				if isGlobal:
+					out = g[name]
+				else:
+					out = stored.get(name, last)
+			return out
+		return run
+
+	# Compiles the binding of the arguments of a call of called into a closure returning the
+	# new frame; each argument is evaluated once and checked unless its type was proven
+	def Bind(self, tree, called):
+		name = tree.name
+		binds = []
+		for (param, arg) in zip(tree.parameterList, called.argList):
+			check1 = declared_type(arg) if param not in self.proven else None
+			binds.append((self.Param(param), arg.name, check1, self.Store(arg.name)))
+
+		def bind(frame):
+			local = {}
+			for (param, argName, check1, store) in binds:
+				value = param(frame)
+				if check1 != None:
+					check_arg(name, argName, check1, value)
+				store(local, value)
+			return local
+		return bind
+
+	# Compiles the tail call of an assignment, which evaluates the value put in front by :: and
+	# the arguments and leaves the call to the running call of the function
+	def TailCall(self, tree):
+		isCons = self.tails.sites[tree]
+		call = tree.rhs.term2 if isCons else tree.rhs
+		first = self.Param(tree.rhs.term1) if isCons else None
+		name = tree.lhs.name
+		site = (isCons, name, name in self.globalNames, self.Store(name))
+
+		error = arity_error(call.name, self.table[call.name], len(call.parameterList))
+		if error != None:
+			return self.fail(error)
+
+		bind = self.Bind(call, self.table[call.name])
+		tail = self.tail
+
+		def run(frame):
+			value = first(frame) if isCons else None
+			tail[0] = (site, value, bind(frame))
+		return run
+
+	# Compiles a parameter passed to a function or println, a function call or an expression
+	def Param(self, tree):
+		if hasattr(tree, 'parameterList'):
+			return self.FuncHead(tree)
+		return self.Expr(tree)
+
+	# Compiles an operand of an expression or condition
+	def Term(self, tree, side):
+		# a variable with a stored value
+		if hasattr(tree, 'name') and not hasattr(tree, 'parameterList'):
+			return self.Access(tree)
+
+		# a functionCall
+		elif hasattr(tree, 'name') and hasattr(tree, 'parameterList'):
+			return self.FuncHead(tree)
+
+		# an expression
+		elif hasattr(tree, 'op'):
+			return self.Expr(tree)
+
+		# malformed
+		else:
+			return self.fail(EvaluationError('{0} is malformed: {1}'.format(side, repr(tree))))
+
+	# Compiles AST.Expr tree object which is a conditional statement, whose closure
+	# returns the output of MicroInterp.Cond
+	def Cond(self, tree):
+		if not hasattr(tree, 'term1'):
+			return self.fail(EvaluationError('LHS is malformed: {0}'.format(repr(tree))))
+
+		op = tree.op
+		term1 = self.Term(tree.term1, 'LHS')
+		if tree.term2 != None:
+			term2 = self.Term(tree.term2, 'RHS')
+		elif op != '!':
+			return self.Unsupported(op, term1, lambda frame: None)
+
+		if op == '>=':
+			return lambda frame: term1(frame) >= term2(frame)
+		elif op == '>':
+			return lambda frame: term1(frame) > term2(frame)
+		elif op == '<=':
+			return lambda frame: term1(frame) <= term2(frame)
+		elif op == '<':
+			return lambda frame: term1(frame) < term2(frame)
+		elif op == '==':
+			return lambda frame: equal(term1(frame), term2(frame))
+		elif op == '!=':
+			return lambda frame: not_equal(term1(frame), term2(frame))
+		elif op == '!':
+			if tree.term2 != None:
+				def run(frame):
+					value = term1(frame)
+					term2(frame)
+					return not value
+				return run
+			return lambda frame: not term1(frame)
+		elif op == '&&':
+			def run(frame):
+				value = term1(frame)
+				other = term2(frame)
+				return value and other
+			return run
+		elif op == '||':
+			def run(frame):
+				value = term1(frame)
+				other = term2(frame)
+				return value or other
+			return run
+		else:
+			return self.Unsupported(op, term1, term2)
+
+	# Compiles AST.Expr tree object which is a non-conditional statement, whose closure
+	# returns the output of MicroInterp.Expr
+	def Expr(self, tree):
+		# Expression contains only a single variable, or the name of a function read as one
+		if not hasattr(tree, 'term1'):
+			if hasattr(tree, 'name'):
+				return self.Access(tree)
+			return self.fail(EvaluationError('Expression not supported: {0}'.format(repr(tree))))
+
+		op = tree.op
+		term1 = self.Term(tree.term1, 'LHS') if tree.term1 != None else lambda frame: NIL
+		unary = tree.term2 == None
+		term2 = self.Term(tree.term2, 'RHS') if not unary else lambda frame: NIL
+
+		if op == '+':
+			return lambda frame: term1(frame) + term2(frame)
+		elif op == '-':
+			return lambda frame: term1(frame) - term2(frame)
+		elif op == '*':
+			return lambda frame: term1(frame) * term2(frame)
+		elif op == '/':
+			def run(frame):
+				value = term1(frame)
+				return divide(value, term2(frame), tree)
+			return run
+		elif op == '::':
+			def run(frame):
+				value = term1(frame)
+				return cons(value, term2(frame))
+			return run
+		elif op == '==':
+			return lambda frame: term1(frame) == term2(frame)
+		elif op == '&&':
+			def run(frame):
+				value = term1(frame)
+				other = term2(frame)
+				return value and other
+			return run
+		elif op == '||':
+			def run(frame):
+				value = term1(frame)
+				other = term2(frame)
+				return value or other
+			return run
+
+		elif op in list_methods:
+			function = list_methods[op]
+			def run(frame):
+				value = term1(frame)
+				return function(value, term2(frame))
+			return run
+
+		# unary operators, whose closure evaluates a second operand only for its side effects
+		elif op in ['head', 'tail', 'isEmpty', '!']:
+			function = {'head': head, 'tail': tail, 'isEmpty': is_empty, '!': lambda value: not value}[op]
+			if unary:
+				return lambda frame: function(term1(frame))
+
+			def run(frame):
+				value = term1(frame)
+				term2(frame)
+				return function(value)
+			return run
+		else:
+			return self.Unsupported(op, term1, term2)
@@ -0,0 +1,210 @@
+# MicroIncremental.py : Incremental front end for the MicroScala language
+# IncrementalTree keeps the source lines of a MicroScala program together with the
+# AST of every top-level definition. When lines are edited, only the definitions
+# whose lines were touched are re-lexed and re-parsed; every other definition keeps
+# its AST node, so unchanged entries of funcList are reused by identity.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from optparse import OptionParser
+import bisect
+
+from MicroTree import MicroTree
+from ErrorMessage import ErrorMessage
+from Token import EOF
+from Sink import NullSink
+import AST
+
+# Returns True if node is the AST.Program() of the main definition
+def is_main(node):
+	return type(node) == AST.Program and node.name == 'main'
+
+# Moves the positions of the calls below node, a definition just parsed by a RegionTree whose
+# lines are numbered from 0, down by begin lines to where the region starts in the program
+def offset_calls(node, begin):
+	if type(node) == AST.FunctionCall and node.position != None:
+		line, position, echo = node.position
+		node.position = (line + begin, position, echo)
+	for child in AST.children(node):
+		offset_calls(child, begin)
+
+# RegionTree parses a run of top-level definitions cut out of a program
+# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
+# region ::= {def} [mainDef] EOF
+class RegionTree(MicroTree):
+	def __init__(self, text, name, echo=None):
+		self.name = name
+		MicroTree.__init__(self, text=text, echo=echo if echo != None else NullSink())
+
+	def program(self):
+		symbol = ''
+
+		while self.kind != EOF:
+			# nothing may follow mainDef in a region
+			if symbol == 'main':
+				raise self.error('EOF')
+
+			start = (self.lexer.lineno(), self.lexer.first_on_line())
+			symbol, function = self.functionDef(name = self.name)
+
+			# mainDef
+			if symbol == 'main':
+				function = self.mainDef(symbol)
+			elif function == None:
+				raise self.error('def')
+
+			self.definitions.append(start + (function,))
+
+		return None
+
+# IncrementalTree writes no source listing unless given an echo sink, since it parses again on
+# every edit
+class IncrementalTree(object):
+	def __init__(self, _input=None, text=None, echo=None):
+		self.echo = echo if echo != None else NullSink()
+		self.filename = _input
+
+		if text == None:
+			with open(_input, 'r') as f:
+				text = f.read()
+
+		self.lines = text.split('\n')
+		self.tree = None
+		self.__parse()
+
+	# Parses the whole program and records the line span of every top-level definition
+	def __parse(self):
+		tree = MicroTree(text='\n'.join(self.lines), echo=self.echo, filename=self.filename)
+
+		self.name = tree.tree.name
+		self.starts = [line for line, first, node in tree.definitions]
+		self.firsts = [first for line, first, node in tree.definitions]
+		self.nodes = [node for line, first, node in tree.definitions]
+		self.close = tree.close
+		self.__build()
+
+	# Assembles the AST.Program() from the current definitions, classified as in MicroTree.program
+	def __build(self):
+		funcList = []
+		decVarList = []
+
+		for node in self.nodes[:-1]:
+			if node.name != self.name and type(node) != AST.DecVar:
+				funcList.append(node)
+			else:
+				decVarList.append(node)
+
+		self.tree = AST.Program(name = self.name, stmt = self.nodes[-1], argList = [], funcList = funcList, decVarList = decVarList)
+
+	# Returns the (lo, hi) indices of the definitions an edit of lines [first, last) touches,
+	# or None when the edit reaches the object header or the closing brace
+	def __region(self, first, last):
+		starts = self.starts
+		close = self.close[0]
+
+		if first < starts[0] or last > close or (first == close and last > first):
+			return None
+
+		lo = bisect.bisect_right(starts, first) - 1
+		hi = bisect.bisect_right(starts, max(first, last - 1)) - 1
+
+		# lines inserted at the start of a definition may belong to the previous one
+		if first == last and first == starts[lo] and lo > 0:
+			lo -= 1
+
+		# definitions sharing a line with their neighbour are re-parsed together
+		while lo > 0 and not self.firsts[lo]:
+			lo -= 1
+		while hi + 1 < len(starts) and not self.firsts[hi + 1]:
+			hi += 1
+
+		if not self.firsts[lo] or (hi == len(starts) - 1 and not self.close[1]):
+			return None
+
+		return lo, hi
+
+	# Replaces source lines [first, last) with lines and updates the AST
+	# Returns the updated AST.Program()
+	def edit(self, first, last, lines):
+		region = self.__region(first, last)
+		delta = len(lines) - (last - first)
+		self.lines[first:last] = lines
+
+		if region == None:
+			self.__parse()
+			return self.tree
+
+		lo, hi = region
+		begin = self.starts[lo]
+		if hi + 1 < len(self.starts):
+			end = self.starts[hi + 1] + delta
+		else:
+			end = self.close[0] + delta
+
+		# re-lex and re-parse only the lines of the touched definitions
+		# any error there is raised by a full parse of the program
+		try:
+			region_tree = RegionTree(text = '\n'.join(self.lines[begin:end]), name = self.name, echo = self.echo)
+		except ErrorMessage:
+			self.__parse()
+			return self.tree
+
+		definitions = region_tree.definitions
+
+		# mainDef must remain the last definition of the program
+		if (len(definitions) > 0 and is_main(definitions[-1][2])) != (hi == len(self.starts) - 1):
+			self.__parse()
+			return self.tree
+
+		for i in range(hi + 1, len(self.starts)):
+			self.starts[i] += delta
+		self.close = (self.close[0] + delta, self.close[1])
+
+		for line, first, node in definitions:
+			offset_calls(node, begin)
+
+		self.starts[lo:hi + 1] = [begin + line for line, first, node in definitions]
+		self.firsts[lo:hi + 1] = [first for line, first, node in definitions]
+		self.nodes[lo:hi + 1] = [node for line, first, node in definitions]
+		self.__build()
+
+		return self.tree
+
+	# Replaces the whole source with text, re-parsing only the lines that differ
+	# Returns the updated AST.Program()
+	def update(self, text):
+		lines = text.split('\n')
+		old = self.lines
+		n = min(len(old), len(lines))
+
+		# common leading lines
+		first = 0
+		while first < n and old[first] == lines[first]:
+			first += 1
+
+		if first == len(old) and first == len(lines):
+			return self.tree
+
+		# common trailing lines
+		suffix = 0
+		while suffix < n - first and old[-1 - suffix] == lines[-1 - suffix]:
+			suffix += 1
+
+		return self.edit(first, len(old) - suffix, lines[first:len(lines) - suffix])
+
+def main(file):
+	tree = IncrementalTree(_input=file)
+	print(repr(tree.tree))
+
+if __name__ == '__main__':
+	usage = "usage: %prog SCALA_FILE"
+	parser = OptionParser(usage=usage)
+
+	(options, args) = parser.parse_args()
+
+	if len(args) != 1:
+		parser.error("Please provide required arguments: Location of scala file")
+
+	main(file=args[0])
@@ -0,0 +1,332 @@
+# MicroInline.py : Function inliner for the MicroScala project
+# Inliner replaces a call of a small function that never calls itself, directly or through
+# other functions, by the body of the function, so that the call pushes no frame, binds
+# no arguments and initializes no locals of a frame of its own. Each argument and local of
+# the function becomes a local of the caller, renamed for the call so that it clashes with
+# no variable of the caller and no other inlined call; the arguments are stored in order,
+# the locals set to their initial values, the body runs, and the value of its closing return
+# is left where the call was. An argument passed a literal or a local of the caller, which the
+# body cannot store, is read in place when the body never stores it either. A global, such as h in Test3, keeps its name, as the caller
+# reads and stores the same global. A function binding an argument or a local to a global
+# is never inlined, nor is a call whose arguments the type checker could not prove, as
+# running it checks them. The calls of an assignment or a println are inlined, and only
+# while what is evaluated before each call reads locals and cannot fail, as the bodies run
+# before the statement. Functions are inlined into their callers bottom-up, and the whole
+# program again once typed anew, as a variable that stored the value of a call may have
+# become an Int.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from MicroResolve import Resolver, LOCAL
+from MicroTypeCheck import TypeChecker, preorder, named_type
+from MicroRuntime import function_table
+import AST
+
+# arithmetic holds the operators of an Int expression that cannot fail
+arithmetic = ['+', '-', '*']
+
+# INT and READ are the kinds of operand evaluated before a call that may be inlined: an Int
+# expression that cannot fail, and a read of a local of any type
+(INT, READ) = ('int', 'read')
+
+# SIZE is the largest number of nodes of the body of a function inlined unless told otherwise
+SIZE = 40
+
+# ROUNDS is the largest number of times the calls of a program are inlined
+ROUNDS = 3
+
+class Inliner(object):
+	def __init__(self, tree, resolver=None, size=SIZE):
+		self.size = size
+
+		# inlined counts the calls replaced by the body of their function
+		self.inlined = 0
+
+		self.tree = tree
+		for round in range(ROUNDS):
+			inlined = self.inlined
+			self.tree = self.Prog(self.tree, resolver if round == 0 else None)
+			if self.inlined == inlined:
+				break
+
+	# Returns the program with the calls it makes inlined, into the functions called first
+	def Prog(self, tree, resolver):
+		self.resolver = resolver if resolver != None else Resolver(tree)
+		self.types = TypeChecker(tree, self.resolver)
+		self.functions = function_table(tree.funcList)
+		self.globals = set(var.name for var in tree.decVarList)
+
+		# calls maps each function to the functions it calls
+		self.calls = {}
+		for func in self.functions.values():
+			self.calls[func] = set(self.functions[node.name] for node in self.nodes(func) if type(node) == AST.FunctionCall and node.name in self.functions)
+		self.recursive = self.Recursive()
+
+		# done maps each function, once the calls it makes are inlined, to its new definition
+		self.done = {}
+		for func in self.functions.values():
+			self.Done(func)
+
+		funcList = [self.done.get(func, func) for func in tree.funcList]
+		main = self.Func(tree.stmt) if tree.stmt != None else None
+		return AST.Program(tree.name, main, tree.argList, funcList, tree.decVarList)
+
+	# Returns the nodes of the body of a function
+	def nodes(self, func):
+		return preorder(func.stmt) if func.stmt != None else []
+
+	# Returns the set of functions of the call graph that can call themselves, directly or
+	# through other functions
+	def Recursive(self):
+		recursive = set()
+		for func in self.calls:
+			seen = set()
+			stack = list(self.calls[func])
+			while len(stack) > 0:
+				called = stack.pop()
+				if called is func:
+					recursive.add(func)
+					break
+				if called not in seen:
+					seen.add(called)
+					stack.extend(self.calls[called])
+		return recursive
+
+	# Returns the definition of a function with the calls it makes inlined, inlining into the
+	# functions it calls first; a recursive function is itself never inlined, so the functions
+	# it calls back are left as they are
+	def Done(self, func):
+		if func not in self.done:
+			for called in self.calls[func]:
+				if called not in self.recursive:
+					self.Done(called)
+			self.done[func] = self.Func(func)
+		return self.done[func]
+
+	# Returns the function, or main, with the calls it makes inlined and a local declared for
+	# every argument and local of the calls inlined
+	def Func(self, tree):
+		self.func = tree
+		self.decVarList = tree.decVarList
+		self.temps = []
+		self.names = set(var.name for var in tree.argList + tree.decVarList)
+		stmt = self.Stmt(tree.stmt) if tree.stmt != None else None
+		return AST.Program(tree.name, stmt, tree.argList, tree.funcList, tree.decVarList + self.temps)
+
+	# Returns the statement with its calls inlined
+	def Stmt(self, tree):
+		if type(tree) == AST.Block:
+			stmts = []
+			for stmt in tree.stmts:
+				stmt = self.Stmt(stmt)
+				if type(stmt) == AST.Block:
+					stmts.extend(stmt.stmts)
+				else:
+					stmts.append(stmt)
+			return AST.Block(stmts)
+
+		elif type(tree) == AST.If:
+			term2 = self.Stmt(tree.term2) if tree.term2 != None else None
+			return AST.If(tree.cond, self.Stmt(tree.term1), term2)
+
+		elif type(tree) == AST.While:
+			return AST.While(tree.cond, self.Stmt(tree.statement))
+
+		elif type(tree) == AST.Assignment:
+			(stmts, rhs) = self.Value(tree.rhs)
+			if len(stmts) > 0:
+				return AST.Block(stmts + [AST.Assignment(tree.lhs, rhs)])
+
+		elif type(tree) == AST.Println:
+			(stmts, expr) = self.Value(tree.expr)
+			if len(stmts) > 0:
+				return AST.Block(stmts + [AST.Println(expr)])
+
+		return tree
+
+	# Returns (statements, value) for the rhs of an assignment or the expression of a println:
+	# the statements running the bodies of the calls inlined and the value left to store or print
+	def Value(self, tree):
+		stmts = []
+		if type(tree) == AST.FunctionCall:
+			body = self.Inline(tree, False)
+			if body != None:
+				return body[:2]
+		(value, kind) = self.Operand(tree, stmts)
+		return (stmts, value)
+
+	# Returns an operand with the calls it makes inlined, adding the statements running their
+	# bodies to stmts, and its kind as given by Kind. The bodies run before the whole expression,
+	# so a call is only inlined when every operand evaluated before it has a kind: no body may
+	# change what it reads, and evaluating it cannot fail
+	def Operand(self, tree, stmts):
+		if type(tree) == AST.FunctionCall:
+			body = self.Inline(tree, True)
+			if body != None:
+				(body, value, kind) = body
+				stmts.extend(body)
+				return (value, kind)
+
+			# the arguments of a call to a function that is missing or passed too many or too
+			# few arguments are never evaluated
+			func = self.functions.get(tree.name)
+			if func == None or len(tree.parameterList) != len(func.argList):
+				return (tree, None)
+
+			params = []
+			kind = READ
+			for param in tree.parameterList:
+				if kind != None:
+					(param, kind) = self.Operand(param, stmts)
+				params.append(param)
+			return (AST.FunctionCall(tree.name, params, tree.position), None)
+
+		elif type(tree) == AST.Expr:
+			(term1, kind1) = (tree.term1, READ)
+			if term1 != None:
+				(term1, kind1) = self.Operand(term1, stmts)
+			(term2, kind2) = (tree.term2, None)
+			if kind1 != None and term2 != None:
+				(term2, kind2) = self.Operand(term2, stmts)
+			expr = AST.Expr(tree.op, term1, term2)
+			if tree.op in arithmetic and kind1 == INT and kind2 == INT:
+				return (expr, INT)
+			return (expr, None)
+
+		return (tree, self.Kind(tree, self.func))
+
+	# Returns INT for an arithmetic expression of literals and locals of func that always hold an
+	# Int, which cannot fail; READ for any other local, whose read cannot fail either; and None
+	# for any other expression. A local of the caller can only be stored by the caller
+	def Kind(self, tree, func):
+		if type(tree) == AST.IntValue:
+			return INT
+		elif type(tree) == AST.Variable:
+			binding = self.resolver.bindings.get(tree)
+			if binding == None or binding[0] != LOCAL:
+				return None
+			return INT if self.types.Expr(tree, func) == 'int' else READ
+		elif type(tree) == AST.Expr and tree.op in arithmetic and tree.term2 != None:
+			if self.Kind(tree.term1, func) == INT and self.Kind(tree.term2, func) == INT:
+				return INT
+		return None
+
+	# Returns True when a function that never calls itself can be inlined: it is small enough,
+	# binds no argument or local to a global, reads no argument or local named nil through a
+	# Nil, and its closing return gives a variable, a literal or an expression
+	def Inlinable(self, func):
+		if type(func.stmt) != AST.Block or len(func.stmt.stmts) == 0:
+			return False
+		for var in func.argList + func.decVarList:
+			if var.name in self.globals or var.name == 'nil':
+				return False
+
+		closing = func.stmt.stmts[-1]
+		if type(closing) != AST.Return or type(closing.expr) in [AST.FunctionCall, AST.NilValue]:
+			return False
+		return sum(1 for node in preorder(func.stmt)) <= self.size
+
+	# Returns (statements, value, kind) replacing a call: the statements storing the arguments,
+	# setting the locals and running the body, the value of the closing return and its kind; or
+	# None when the call cannot be inlined. A call inside an expression is only inlined when the
+	# value has a kind, as it is read after the bodies of the calls that follow
+	def Inline(self, tree, inside):
+		func = self.functions.get(tree.name)
+		if func == None or func in self.recursive or len(tree.parameterList) != len(func.argList) or 'nil' in self.names:
+			return None
+		if any(param not in self.types.proven or type(param) == AST.NilValue for param in tree.parameterList):
+			return None
+
+		original = func
+		func = self.done.get(func)
+		if func == None or not self.Inlinable(func):
+			return None
+		kind = self.Kind(func.stmt.stmts[-1].expr, original)
+		if inside and kind == None:
+			return None
+
+		# renames maps each argument and local of the function to the node read in its place: a
+		# new local of the caller, or the argument passed when it is a literal or a local of the
+		# caller the body never stores, as the body cannot store a local of the caller either
+		stored = set(node.lhs.name for node in preorder(func.stmt) if type(node) == AST.Assignment)
+		stored.update(var.name for var in func.decVarList)
+		renames = {}
+		stmts = []
+		for (param, arg) in zip(tree.parameterList, func.argList):
+			if arg.name not in stored and type(param) in [AST.IntValue, AST.Variable] and self.Kind(param, self.func) != None:
+				renames[arg.name] = param
+			else:
+				renames[arg.name] = AST.Variable(self.Temp(func.name, arg))
+				stmts.append(AST.Assignment(renames[arg.name], param))
+
+		# an argument may itself be a call to inline
+		stmts = self.Stmt(AST.Block(stmts)).stmts
+
+		overwritten = self.Overwritten(func)
+		for var in func.decVarList:
+			if var.name not in renames:
+				renames[var.name] = AST.Variable(self.Temp(func.name, var))
+			if var.name not in overwritten:
+				stmts.append(AST.Assignment(renames[var.name], var.value))
+		stmts.extend(self.Rename(stmt, renames) for stmt in func.stmt.stmts[:-1])
+
+		self.inlined += 1
+		return (stmts, self.Rename(func.stmt.stmts[-1].expr, renames), kind)
+
+	# Returns the names of the locals of func whose initial value is never read, as a statement
+	# of the body running on every call first stores into them a literal or the value of an
+	# arithmetic expression, which is an Int or a list unless evaluating it fails
+	def Overwritten(self, func):
+		(overwritten, seen) = (set(), set(var.name for var in func.argList))
+		for stmt in func.stmt.stmts:
+			if type(stmt) == AST.Assignment and type(stmt.lhs) == AST.Variable:
+				reads = set(node.name for node in preorder(stmt.rhs) if type(node) == AST.Variable)
+				if stmt.lhs.name not in seen | reads and (type(stmt.rhs) == AST.IntValue or type(stmt.rhs) == AST.Expr and stmt.rhs.op in arithmetic):
+					overwritten.add(stmt.lhs.name)
+				seen.update(reads | set([stmt.lhs.name]))
+			else:
+				seen.update(node.name for node in preorder(stmt) if type(node) == AST.Variable)
+		return overwritten
+
+	# Returns a new local of the caller for an argument or local var of func, of the same type,
+	# named so that it cannot clash with a variable of the program, as an identifier never
+	# ends with an underscore, nor with another local of the caller, numbered after them all
+	def Temp(self, name, var):
+		temp = '{0}_{1}_{2}_'.format(name, var.name, len(self.decVarList) + len(self.temps))
+		value = AST.NilValue() if named_type(var) == 'list' else AST.IntValue(0)
+		self.temps.append(AST.DecVar(temp, var.type, value))
+		return temp
+
+	# Returns a copy of a statement or an expression of an inlined function with every argument
+	# and local replaced by the node read in its place
+	def Rename(self, tree, renames):
+		if tree == None:
+			return None
+		elif type(tree) == AST.Variable:
+			node = renames.get(tree.name, tree)
+			if type(node) == AST.IntValue:
+				return AST.IntValue(node.value)
+			return AST.Variable(node.name)
+		elif type(tree) == AST.Block:
+			return AST.Block([self.Rename(stmt, renames) for stmt in tree.stmts])
+		elif type(tree) == AST.Assignment:
+			return AST.Assignment(self.Rename(tree.lhs, renames), self.Rename(tree.rhs, renames))
+		elif type(tree) == AST.If:
+			return AST.If(self.Rename(tree.cond, renames), self.Rename(tree.term1, renames), self.Rename(tree.term2, renames))
+		elif type(tree) == AST.While:
+			return AST.While(self.Rename(tree.cond, renames), self.Rename(tree.statement, renames))
+		elif type(tree) == AST.Println:
+			return AST.Println(self.Rename(tree.expr, renames))
+		elif type(tree) == AST.Return:
+			return AST.Return(self.Rename(tree.expr, renames))
+		elif type(tree) == AST.Expr:
+			return AST.Expr(tree.op, self.Rename(tree.term1, renames), self.Rename(tree.term2, renames))
+		elif type(tree) == AST.FunctionCall:
+			return AST.FunctionCall(tree.name, [self.Rename(param, renames) for param in tree.parameterList], tree.position)
+		return tree
+
+	# Returns a line reporting the calls inlined
+	def report(self):
+		return '{0} calls inlined'.format(self.inlined)
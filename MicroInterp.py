@@ -12,72 +12,167 @@
 
 from optparse import OptionParser
 import os, logging, sys
-import math, copy, re
+import math
 
-import MicroScalaLexer
 from MicroTree import MicroTree
-from ErrorMessage import ErrorMessage
-from Token import Token
+from MicroResolve import Resolver, GLOBAL
+from MicroTypeCheck import TypeChecker
+from MicroTailCall import TailCalls
+from MicroRuntime import function_table, run_deep, arity_error, check_arg, declared_type, cons, head, tail
+from MicroList import ConsList, NIL
+from MicroIntrinsics import methods as list_methods
+import MicroCache, MicroMemo, MicroOptimize, MicroInline
+from MicroClosure import MicroClosure
+from MicroVM import MicroVM
+from MicroTranspile import MicroTranspile
+from ErrorMessage import ErrorMessage, EvaluationError
+from Sink import StreamSink, NullSink, BufferedSink, FileSink
+
+# engines maps each execution engine other than the tree-walker to its class, which takes the
+# AST.Program and the output sink and runs the program with run()
+engines = {
+	'closure': MicroClosure,
+	'vm': MicroVM,
+	'python': MicroTranspile,
+}
 
 class MicroInterp(object):
-	def __init__(self, _input):
-		print('\nInput:\n')
-		# Parse file input into AST
-		self.ast = MicroTree(_input=_input)
-
-		# Establish program environment
-		self.env = {}
-
-
-		print('Output:\n')
-		# Interpret the AST
-		self.Prog(self.ast.tree, self.env)
-		
-		# Uncomment to expose the environment after running
-		# print('\nEnvironment: {0}'.format(self.env))
-
-		print('')
-
-		# Destroy program environment
-		del self.env
+	def __init__(self, _input, stream=False, echo=None, diagnostics=None, output=None, cache=None, engine='tree', memo=MicroMemo.SIZE, memo_stats=False, optimize=MicroOptimize.LEVEL, optimize_stats=False, inline=MicroInline.SIZE, deep=False):
+		# Sinks for the source listing, error messages and program output
+		self.echo = echo if echo != None else StreamSink()
+		self.diagnostics = diagnostics if diagnostics != None else StreamSink()
+		self.output = output if output != None else StreamSink()
+
+		try:
+			self.echo.write('\nInput:\n')
+			# Parse file input into AST, through the parse cache when one is given
+			# (streamed input is never cached, since caching needs the whole source)
+			if cache != None and not stream:
+				self.ast = MicroCache.parse(_input, cache, echo=self.echo)
+			else:
+				self.ast = MicroTree(_input=_input, stream=stream, echo=self.echo)
+
+			# Establish program environment: the globals, the call stack of frames and the
+			# table of functions by name
+			self.env = []
+			self.frames = []
+			self.tree = self.ast.tree
+
+			# Bind every variable to its slot and check every function call, reporting undeclared
+			# variables and type errors before anything runs
+			self.resolver = Resolver(self.tree)
+			self.types = TypeChecker(self.tree, self.resolver, _input)
+
+			# Optimize the AST, then bind and check the optimized program that runs instead
+			if optimize > 0:
+				optimizer = MicroOptimize.Optimizer(self.tree, self.resolver, optimize, inline)
+				self.tree = optimizer.tree
+				self.resolver = Resolver(self.tree)
+				self.types = TypeChecker(self.tree, self.resolver, _input)
+				if optimize_stats:
+					self.diagnostics.write(optimizer.report())
+
+			self.functions = function_table(self.tree.funcList)
+			self.bindings = self.resolver.bindings
+			self.proven = self.types.proven
+
+			# Find the tail calls of functions of themselves, run as loops by FuncBody; tail holds
+			# the call a running function has left to make when its body finishes
+			self.tails = TailCalls(self.tree, self.resolver)
+			self.tail = None
+
+			# Cache the values of the calls of pure functions, up to memo values for each function
+			self.memos = {}
+			if memo > 0:
+				purity = MicroMemo.Purity(self.tree, self.resolver)
+				for (func, reads) in purity.reads.items():
+					slots = [self.bindings[arg][1] for arg in func.argList]
+					self.memos[func] = MicroMemo.Memo(func, slots, reads, memo)
+
+			self.echo.write('Output:\n')
+			# Interpret the AST, or run it with another engine, with deep on a thread whose stack is
+			# deep enough for recursion thousands of calls deep, otherwise on the caller's own
+			if engine == 'tree':
+				run = lambda: self.Prog(self.tree, self.env)
+			else:
+				run = engines[engine](self.tree, self.output, self.types).run
+			if deep:
+				run_deep(run)
+			else:
+				run()
+			
+			# Uncomment to expose the environment after running
+			# print('\nEnvironment: {0}'.format(self.env))
+
+			self.echo.write('')
+
+			# Report the hits and misses of the cache of every pure function called
+			if memo_stats and engine == 'tree':
+				for func in self.tree.funcList:
+					if func in self.memos:
+						self.diagnostics.write(self.memos[func].report())
+
+			# Destroy program environment
+			del self.env
+			del self.frames
+
+		# Report errors to the diagnostics sink and pass them on to the caller
+		except ErrorMessage as error:
+			if error.filename == None:
+				error.filename = _input
+			error.report(self.diagnostics)
+			raise
+
+		# Flush buffered sinks, also when an error halts execution
+		finally:
+			self.echo.flush()
+			self.output.flush()
+			self.diagnostics.flush()
 
 	# Processes AST.Program tree object
 	def Prog(self, tree, env):
 		if tree.stmt != None:
-			context = tree.name
-			env[context] = {}
+			env.extend([None] * len(self.resolver.globals))
 			for var in tree.decVarList: # register globals
-				self.InitVar(var, env, context)
+				self.InitVar(var, env, None)
 			self.Main(tree.stmt, env)
 		else:
-			ErrorMessage(message='empty file')
+			raise EvaluationError('empty file')
 
 	# Processes AST.Main tree object
 	def Main(self, tree, env):
 		if tree.stmt != None:
-			context = tree.name
+			frame = [None] * len(self.resolver.scopes[tree])
+			self.frames.append(frame)
 			# print('main: ', tree.decVarList)
 			for var in tree.decVarList: # register locals to main
-				# print(var.__dict__)
-				self.InitVar(var, env, context)
+				# print(repr(var))
+				self.InitVar(var, env, frame)
 
-			self.Stmt(tree.stmt, env, context)
+			self.Stmt(tree.stmt, env, frame)
+			self.frames.pop()
 		else:
-			ErrorMessage(message=tree.__dict__)
+			raise EvaluationError(repr(tree))
 
-	# Initializes a Variable into the Environment with Context
-	def InitVar(self, tree, env, context):
-		# print(tree.__dict__)
-		lhs = self.Id(tree)
+	# Initializes a declared Variable into its slot of the globals or of the frame
+	def InitVar(self, tree, env, frame):
+		# print(repr(tree))
+		self.Id(tree)
 		rhs = self.Val(tree.value)
 
-		self.update_env(env = env, context = context, lhs = lhs, rhs = rhs)
+		self.update_env(env = env, frame = frame, lhs = self.bindings[tree], rhs = rhs)
 
-	# Processes AST.Assignment tree object to place value of rhs into env[context][lhs]
-	def Var(self, tree, env, context):
+	# Processes AST.Assignment tree object to place value of rhs into the slot of lhs
+	def Var(self, tree, env, frame):
 		if tree.name == 'assign':
-			# get ID of lhs variable
-			lhs = self.Id(tree.lhs) 
+			# get the slot of lhs variable
+			self.Id(tree.lhs)
+			lhs = self.bindings[tree.lhs]
+
+			# a tail call is left for FuncBody to make once the body has finished
+			if tree in self.tails.sites:
+				self.tail = self.TailCall(tree, env, frame)
+				return
 
 			# rhs is a value
 			if hasattr(tree.rhs, 'value'):
@@ -85,237 +180,246 @@ class MicroInterp(object):
 
 			# rhs is expression
 			elif hasattr(tree.rhs, 'op'): 
-				rhs = self.Expr(tree.rhs, env, context)
+				rhs = self.Expr(tree.rhs, env, frame)
 
 			# rhs is a variable
 			elif hasattr(tree.rhs, 'name') and not hasattr(tree.rhs, 'parameterList'):	
-				rhs = self.Id(tree.rhs)
+				rhs = self.access_env(tree.rhs, env, frame)
 
 			# rhs is a function
 			elif hasattr(tree.rhs, 'name') and hasattr(tree.rhs, 'parameterList'):	
-				rhs = self.FuncHead(tree.rhs, env, context)
+				rhs = self.FuncHead(tree.rhs, env, frame)
 
 			# rhs is empty
 			else:
 				rhs = None
 
-			self.update_env(env = env, context = context, lhs = lhs, rhs = rhs)
+			self.update_env(env = env, frame = frame, lhs = lhs, rhs = rhs)
 
 	# Processes AST.FunctionCall tree object
-	# Checks arguments passed to function against function declaration parameter list
-	# If okay, then evaluates function in new function context
-	def FuncHead(self, tree, env, context):
-		out = None
+	# Checks the number of arguments passed against the function declaration
+	# If okay, then evaluates function in a new frame
+	def FuncHead(self, tree, env, frame):
+		# Find the function in the table of functions
+		func = self.functions.get(tree.name)
+		if func == None:
+			raise EvaluationError('Function not found: {0}'.format(tree.name))
 
-		# check arguments against function parameters
-		if self.ArgCheck(tree.name, tree.parameterList, env, context) is True:
-			out = self.FuncBody(tree, env, context)
+		# check # of args passed against # of expected args to function
+		error = arity_error(tree.name, func, len(tree.parameterList))
+		if error != None:
+			raise error
 
-		return out
+		return self.FuncBody(tree, func, env, frame)
 
 	# Processes the body of a function call
-	# Establishes new function context distinct from other versions to enable recursion
-	def FuncBody(self, tree, env, context):
+	# Evaluates each argument once, checking its type unless the TypeChecker proved it before
+	# running, then pushes a new frame for the function onto the call stack, distinct from the
+	# frames of other calls to enable recursion, and pops it once the function returns
+	# The value of a call of a pure function is taken from its cache when it was computed before
+	def FuncBody(self, tree, func, env, callerFrame):
 		if tree != None:
-			# Establish new context, save context of calling function
-			callerContext = context
-			context = tree.name
+			frame = self.Bind(tree, func, env, callerFrame)
 
-			# Check environment for existing function environments
-			count = 0
-			for key in env.keys():
-				if key.startswith(context):
-					count += 1
+			memo = self.memos.get(func)
+			key = memo.key(frame, env) if memo != None else None
+			if key != None:
+				out = memo.get(key)
+				if out is not MicroMemo.MISSING:
+					return out
 
-			# Create new context with name as function.name + integer iff integer > 0
-			if count > 0:
-				context += str(count)
+			if func in self.tails.loops:
+				out = self.Loop(func, env, frame)
+			else:
+				out = self.Run(func, env, frame)
 
-			# Create empty context
-			if context not in env:
-				env[context] = {}
+			if key != None:
+				memo.put(key, out)
+			return out
 
-			# Find appropriate function in the AST's list of functions
-			for func in self.ast.tree.funcList:
-				if tree.name.startswith(func.name):
-					# assign value stored in param[i] to arg[i] in env[context]
-					for (param, arg) in zip(tree.parameterList, func.argList):
-						# rhs is variable
-						if hasattr(param, 'name'):
-							rhs = env[callerContext][param.name]
-						# rhs is expression
-						else:
-							rhs = self.Expr(param, env, callerContext)
+		else:
+			raise EvaluationError(repr(tree))
+
+	# Runs a function making tail calls of itself in frame, making the calls one after another
+	# on the same depth of the call stack, then gives each call the value of the next as its own
+	# assignment would
+	def Loop(self, func, env, frame):
+		# pending holds (assignment, value put in front by ::, value of the closing return)
+		# for every call whose tail call is still to return
+		pending = []
+		while True:
+			out = self.Run(func, env, frame)
+			if self.tail == None:
+				break
+			(site, first, frame) = self.tail
+			self.tail = None
+			pending.append((site, first, out))
+
+		# the closing return of each call gives its variable, once the value of the call it
+		# made is stored as MicroInterp.update_env would, read again when it is a global
+		for (site, first, last) in reversed(pending):
+			if self.tails.sites[site]:
+				out = cons(first, out)
+
+			(scope, slot) = lhs = self.bindings[site.lhs]
+			if scope == GLOBAL:
+				self.update_env(env, None, lhs, out)
+				out = env[slot]
+			elif type(out) is not int and type(out) is not ConsList:
+				out = last
 
-						self.update_env(env = env, context = context, lhs = arg.name, rhs = rhs)
+		return out
 
-					# register locals to function
-					for var in func.decVarList:
-						self.InitVar(var, env, context)
+	# Evaluates the arguments of a call into a new frame for func, in order, binding each
+	# before the next is evaluated
+	def Bind(self, tree, func, env, callerFrame):
+		# Create empty frame with a slot for each argument and local
+		frame = [None] * len(self.resolver.scopes[func])
 
-					# evaluate function
-					out = self.Stmt(func.stmt, env, context)
+		# assign value of param[i] to the slot of arg[i]
+		for (param, arg) in zip(tree.parameterList, func.argList):
+			rhs = self.Param(param, env, callerFrame)
 
-					# destroy local function context in env
-					del env[context]
+			if param not in self.proven:
+				check_arg(tree.name, arg.name, declared_type(arg), rhs)
 
-					# restore context
-					context = callerContext
+			self.update_env(env = env, frame = frame, lhs = self.bindings[arg], rhs = rhs)
 
-					break
+		return frame
 
-			return out
+	# Runs the body of func in frame, returning the value of its closing return
+	def Run(self, func, env, frame):
+		# register locals to function
+		for var in func.decVarList:
+			self.InitVar(var, env, frame)
 
-		else:
-			ErrorMessage(message=tree.__dict__)
-
-	# Check the arguments passed to a function against the arguments in function declaration
-	# for correct number of args passed and the correct type of each argument passed
-	def ArgCheck(self, name, parameters, env, context):
-		out = True
-
-		# Find appropriate function in the AST's list of functions
-		for func in self.ast.tree.funcList:
-			if func.name.startswith(name):
-				# check # of args passed against # of expected args to function	
-				if len(func.argList) == len(parameters):
-					# type check param[i] against arg[i]
-					for (param, arg) in zip(parameters, func.argList):
-						check1 = str(arg.type)
-
-						if hasattr(param, 'name'):
-							check2 = str(type(env[context][param.name]).__name__)
-						else:
-							check2 = str(type(self.Expr(param, env, context)).__name__)
-
-						# remove potential issues for List [ type ] checking
-						check1 = re.sub(r'\s+(\[.+)?', '', check1)
-						check2 = re.sub(r'\s+(\[.+)?', '', check2)
-
-						if check1 in ['Int', 'int'] and check2 in ['int', 'Int']:
-							out &= True
-						elif check1 in ['list', 'List'] and check2 in ['list', 'List']:
-							out &= True
-						else:
-							ErrorMessage(message='Data type mismatch in function {0} for {1}: Encountered {2}, Expected {3}'.format(name, arg.name, check1, check2))
-				
-				# too few args passed
-				elif len(func.argList) > len(parameters):
-					ErrorMessage(message='Not enough arguments passed to function {0}: Encountered {1}, Expected {2}'.format(name, len(func.argList), len(parameters)))
-
-				# too many args passed
-				elif len(func.argList) < len(parameters):
-					ErrorMessage(message='Too many arguments passed to function {0}: Encountered {1}, Expected {2}'.format(name, len(func.argList), len(parameters)))
+		# evaluate function
+		self.frames.append(frame)
+		out = self.Stmt(func.stmt, env, frame)
 
-				break
+		# destroy local function frame
+		self.frames.pop()
 
 		return out
 
-	# Processes AST.Statement tree object
-	def Stmt(self, tree, env, context):
+	# Starts the tail call of an assignment as FuncHead, evaluating the value put in front by ::
+	# and then the arguments, and returns (assignment, value put in front, frame of the call)
+	def TailCall(self, tree, env, frame):
+		rhs = tree.rhs
+		first = None
+		if self.tails.sites[tree]:
+			first = self.Param(rhs.term1, env, frame)
+			rhs = rhs.term2
+
+		func = self.functions[rhs.name]
+		error = arity_error(rhs.name, func, len(rhs.parameterList))
+		if error != None:
+			raise error
+
+		return (tree, first, self.Bind(rhs, func, env, frame))
+
+	# Evaluates a parameter of a function call or println: a function call, or an
+	# expression, variable or literal
+	def Param(self, tree, env, frame):
+		if hasattr(tree, 'parameterList'):
+			return self.FuncHead(tree, env, frame)
+		return self.Expr(tree, env, frame)
+
+	# Processes a statement tree object
+	def Stmt(self, tree, env, frame):
 		out = None
 
-		# Recursive calls
-		if hasattr(tree, 'stmt'):
-			# One sub-stmt
-			if tree.stmt != None and tree.stmt2 == None:
-				out = self.Stmt(tree.stmt, env, context)
-			
-			# Two sub-stmts
-			elif tree.stmt != None and tree.stmt2 != None:
-				out = self.Stmt(tree.stmt, env, context)
-				out = self.Stmt(tree.stmt2, env, context)
+		# Block of statements, run in order; the last statement gives the output
+		if hasattr(tree, 'stmts'):
+			for stmt in tree.stmts:
+				out = self.Stmt(stmt, env, frame)
 		
 		# Variable assignment
 		elif hasattr(tree, 'lhs'): 
 			if tree.lhs != None and tree.rhs != None:
-				self.Var(tree, env, context)
+				self.Var(tree, env, frame)
 			else:
-				ErrorMessage(message='Broken assignment {0}'.format(tree.__dict__))
+				raise EvaluationError('Broken assignment {0}'.format(repr(tree)))
 		
 		# Conditional Evaluation -- While-loop, If-statement, If-Else-statement
 		elif hasattr(tree, 'cond'):
 			# While-loop
 			if tree.name == 'while':
 				if tree.cond != None and tree.statement != None:
-					while self.Cond(tree.cond, env, context) is True:
-						out = self.Stmt(tree.statement, env, context)
+					while self.Cond(tree.cond, env, frame) is True:
+						out = self.Stmt(tree.statement, env, frame)
 				else:
-					ErrorMessage(message='Broken while-loop {0}'.format(tree.__dict__))
+					raise EvaluationError('Broken while-loop {0}'.format(repr(tree)))
 
 			# If-statement
 			elif tree.name == 'if':
 				if tree.cond != None and tree.term1 != None:
-					if self.Cond(tree.cond, env, context) is True:
-						out = self.Stmt(tree.term1, env, context)
+					if self.Cond(tree.cond, env, frame) is True:
+						out = self.Stmt(tree.term1, env, frame)
 				else:
-					ErrorMessage(message='Broken if statement {0}'.format(tree.__dict__))
+					raise EvaluationError('Broken if statement {0}'.format(repr(tree)))
 
 			# If-Else-statement
 			elif tree.name == 'if-else':
 				if tree.cond != None and tree.term1 != None and tree.term2 != None:
-					if self.Cond(tree.cond, env, context) is True:
-						out = self.Stmt(tree.term1, env, context)
+					if self.Cond(tree.cond, env, frame) is True:
+						out = self.Stmt(tree.term1, env, frame)
 					else:
-						out = self.Stmt(tree.term2, env, context)
+						out = self.Stmt(tree.term2, env, frame)
 				else:
-					ErrorMessage(message='Broken if-else statement {0}'.format(tree.__dict__))
+					raise EvaluationError('Broken if-else statement {0}'.format(repr(tree)))
 
 		# Expression evaluation
 		elif hasattr(tree, 'op'):
-			out = self.Expr(tree, env, context)
+			out = self.Expr(tree, env, frame)
 
 		# Println or Return
 		elif hasattr(tree, 'name'):
 			# Println
 			if tree.name == 'println':
-				if hasattr(tree.expr, 'name'):
-					lhs = env[context][self.Id(tree.expr)]
-				else:
-					lhs = self.Expr(tree.expr, env, context)
-				print(lhs)
+				self.output.write(self.Param(tree.expr, env, frame))
 
 			# Return
 			elif tree.name == 'return':
-				out = self.Expr(tree.expr, env, context)
+				out = self.Expr(tree.expr, env, frame)
 		else:
-			ErrorMessage(message=tree.__dict__)
+			raise EvaluationError(repr(tree))
 
 		return out
 
 	# Processes AST.Expr tree object which is a conditional statement
 	# Returns a boolean value
-	def Cond(self, tree, env, context):
+	def Cond(self, tree, env, frame):
 		# Default output to False to reduce logical assignments
 		out = False
 		
 		# Term1 is a variable with a stored value
 		if hasattr(tree.term1, 'name') and not hasattr(tree.term1, 'parameterList'):
-			term1 = self.access_env(tree.term1, env, context)
+			term1 = self.access_env(tree.term1, env, frame)
 
 		# Term1 is a functionCall
 		elif hasattr(tree.term1, 'name') and hasattr(tree.term1, 'parameterList'):	
-			term1 = self.FuncHead(tree.term1, env, context)
+			term1 = self.FuncHead(tree.term1, env, frame)
 
 		# Term1 is an expression
 		elif hasattr(tree.term1, 'op'):
-			term1 = self.Expr(tree.term1, env, context)
+			term1 = self.Expr(tree.term1, env, frame)
 
 		# Term1 is malformed
 		else:
-			ErrorMessage(message='LHS is malformed: {0}'.format(repr(tree.term1)))
+			raise EvaluationError('LHS is malformed: {0}'.format(repr(tree.term1)))
 
 		# Term2 is a variable with a stored value
 		if hasattr(tree.term2, 'name') and not hasattr(tree.term2, 'parameterList'):
-			term2 = self.access_env(tree.term2, env, context)
+			term2 = self.access_env(tree.term2, env, frame)
 
 		# Term2 is a functionCall
 		elif hasattr(tree.term2, 'name') and hasattr(tree.term2, 'parameterList'):	
-			term2 = self.FuncHead(tree.term2, env, context)
+			term2 = self.FuncHead(tree.term2, env, frame)
 
 		# Term2 is an expression
 		elif hasattr(tree.term2, 'op'):
-			term2 = self.Expr(tree.term2, env, context)
+			term2 = self.Expr(tree.term2, env, frame)
 
 		# The operation is unary
 		elif tree.term2 == None:
@@ -323,7 +427,7 @@ class MicroInterp(object):
 
 		# Term2 is malformed
 		else:
-			ErrorMessage(message='RHS is malformed: {0}'.format(tree.__dict__))
+			raise EvaluationError('RHS is malformed: {0}'.format(repr(tree)))
 
 		# Evaluate the conditional by appropriate operand
 		if tree.op == '>=':
@@ -352,17 +456,9 @@ class MicroInterp(object):
 
 				# Both terms are lists
 				else:
-					# Check lengths
+					# Check lengths, then each pair x[i], y[i] for equality
 					if len(term1) == len(term2):
-						out = True
-						# Check each pair x[i], y[i] for equality
-						for (x, y) in zip(term1, term2):
-							if x == y:
-								out &= True
-
-							else:
-								out &= False
-								break
+						out = term1 == term2
 
 		elif tree.op == '!=':
 			# Type check for both types the same
@@ -377,10 +473,7 @@ class MicroInterp(object):
 					# Check lengths
 					if len(term1) == len(term2):
 						# Check each pair x[i], y[i] for inequality
-						for (x, y) in zip(term1, term2):
-							if x != y:
-								out = True
-								break
+						out = term1 != term2
 
 					# Different list lengths
 					else:
@@ -399,58 +492,58 @@ class MicroInterp(object):
 			out = term1 or term2
 
 		else:
-			ErrorMessage(message='Operand not supported: {0}'.format(repr(tree.op)))
+			raise EvaluationError('Operand not supported: {0}'.format(repr(tree.op)))
 
 		return out
 
 	# Processes AST.Expr tree object which is a non-conditional statement
 	# Returns an integer value or list
-	def Expr(self, tree, env, context):
-		out = []
-		term1 = []
-		term2 = []
+	def Expr(self, tree, env, frame):
+		out = NIL
+		term1 = NIL
+		term2 = NIL
 
 		# Term1 is a long expression
 		if hasattr(tree, 'term1'):
 			# Term1 is a variable
 			if hasattr(tree.term1, 'name') and not hasattr(tree.term1, 'parameterList'):
-				term1 = self.access_env(tree.term1, env, context)
+				term1 = self.access_env(tree.term1, env, frame)
 
 			# Term1 is a functionCall
 			elif hasattr(tree.term1, 'name') and hasattr(tree.term1, 'parameterList'):	
-				term1 = self.FuncHead(tree.term1, env, context)
+				term1 = self.FuncHead(tree.term1, env, frame)
 
 			# Term1 is an expression
 			elif hasattr(tree.term1, 'op'):
-				term1 = self.Expr(tree.term1, env, context)
+				term1 = self.Expr(tree.term1, env, frame)
 
 			# Term1 is empty
 			elif tree.term1 == None:
-				term1 = []
+				term1 = NIL
 
 			# Term1 is malformed
 			else:
-				ErrorMessage(message='LHS is malformed: {0}'.format(repr(tree.term1)))
+				raise EvaluationError('LHS is malformed: {0}'.format(repr(tree.term1)))
 
 			# Term2 is a variable
 			if hasattr(tree.term2, 'name') and not hasattr(tree.term2, 'parameterList'):
-				term2 = self.access_env(tree.term2, env, context)
+				term2 = self.access_env(tree.term2, env, frame)
 
 			# Term2 is a functionCall
 			elif hasattr(tree.term2, 'name') and hasattr(tree.term2, 'parameterList'):	
-				term2 = self.FuncHead(tree.term2, env, context)
+				term2 = self.FuncHead(tree.term2, env, frame)
 
 			# Term2 is an expression
 			elif hasattr(tree.term2, 'op'):
-				term2 = self.Expr(tree.term2, env, context)
+				term2 = self.Expr(tree.term2, env, frame)
 
 			# Operand is unary, not binary
 			elif tree.term2 == None:
-				term2 = []
+				term2 = NIL
 
 			# Term2 is malformed
 			else:
-				ErrorMessage(message='RHS is malformed: {0}'.format(tree.__dict__))
+				raise EvaluationError('RHS is malformed: {0}'.format(repr(tree)))
 
 			# Evaluate the expression by appropriate operand
 			if tree.op == '+':
@@ -467,84 +560,19 @@ class MicroInterp(object):
 				if term2 != 0:
 					out = term1 // term2
 				else:
-					ErrorMessage(message='Divide by zero error: {0}'.format(tree.__dict__))
+					raise EvaluationError('Divide by zero error: {0}'.format(repr(tree)))
 
 			elif tree.op == '::':
-				# Term1 is an integer
-				if type(term1) is type(int()):
-					# Term2 is empty
-					if term2 == None:
-						out = [term1]
-
-					# Term2 is a non-empty list
-					elif type(term2) is type(list()) and len(term2) > 0:
-						out = [term1]
-						out.extend(term2)
-
-					# Term2 is an empty list
-					elif type(term2) is type(list()) and len(term2) == 0:
-						out = [term1]
-
-					# Term2 is an integer
-					else:
-						out = [term1].append(term2)
-
-				# Term1 is a list
-				elif type(term1) is type(list()):
-					# Term2 is empty
-					if term2 == None:
-						out = term1
-
-					# Term2 is a non-empty list
-					elif type(term2) is type(list()) and len(term2) > 0:
-						out = term1
-						out.extend(term2)
-
-					# Term2 is an empty list
-					elif type(term2) is type(list()) and len(term2) == 0:
-						out = term1
-
-					# Term2 is an integer
-					else:
-						out = term1.append(term2)
+				out = cons(term1, term2)
 
 			elif tree.op == 'head':
-				# Term1 is a list
-				if type(term1) == type(list()):
-					# Term1 is not empty
-					if len(term1) > 0:
-						out = term1[0]
-
-					# Term1 is empty
-					else:
-						ErrorMessage(message='Head: List is empty')
-
-				# Term1 is an integer
-				elif type(term1) == type(int()):
-					out = term1
-
-				# Term1 is empty
-				else:
-					out = []
+				out = head(term1)
 
 			elif tree.op == 'tail':
-				# Term1 is a list
-				if type(term1) == type(list()):
-					# Term1 is not empty
-					if len(term1) > 0:
-						out = term1[1:-1]
+				out = tail(term1)
 
-					# Term1 is empty
-					else:
-						ErrorMessage(message='Tail: List is empty')
-
-				# Term1 is an integer
-				elif type(term1) == type(int()):
-					out = term1
-
-				# Term1 is empty
-				else:
-					out = []
+			elif tree.op in list_methods:
+				out = list_methods[tree.op](term1, term2)
 
 			elif tree.op == 'isEmpty':
 				if len(term1) == 0:
@@ -567,14 +595,14 @@ class MicroInterp(object):
 				else:
 					out = False
 			else:
-				ErrorMessage(message='Operand not supported: {0}'.format(repr(tree.op)))
+				raise EvaluationError('Operand not supported: {0}'.format(repr(tree.op)))
 
 		# Expression contains only a single variable
 		elif hasattr(tree, 'name'):
-			out = self.access_env(tree, env, context)
+			out = self.access_env(tree, env, frame)
 
 		else:
-			ErrorMessage(message='Expression not supported: {0}'.format(repr(tree)))
+			raise EvaluationError('Expression not supported: {0}'.format(repr(tree)))
 
 		return out
 
@@ -584,75 +612,46 @@ class MicroInterp(object):
 		if hasattr(tree, 'name'):
 			return tree.name
 		else:
-			ErrorMessage(message='LHS not a variable: {0}'.format(repr(tree)))
+			raise EvaluationError('LHS not a variable: {0}'.format(repr(tree)))
 
 	# Processes AST.IntValue tree object
 	# Returns the integer value stored in the object
+	# A literal decoded by MicroOptimize already holds its integer
 	def Val(self, tree):
 		if tree.name in ['int', 'Int']:
+			if type(tree.value) is int:
+				return tree.value
 			return int(tree.value)
 		else: # is an empty list
-			return []
-
-	# Updates or inserts the value of the rhs into the variable name in lhs
-	# Checks the global context first before the local context
-	def update_env(self, env, context, lhs, rhs):
-		lhs = lhs
-		rhs = rhs
-
-		# If context does not exist in env, create it
-		if context not in env:
-			env[context] = {}
-		
-		# Check if the rhs is a valid identifier
-		if MicroScalaLexer.tokens['identifier'].match(str(rhs)):
-			# Check global context for existing entry of variable-name given by rhs
-			if rhs in env[self.ast.tree.name]:
-				# Check global context for existing entry in variable-name given by lhs
-				if lhs in env[self.ast.tree.name]:
-					env[self.ast.tree.name][lhs] = env[self.ast.tree.name][rhs]
-				
-				# No global context for lhs, use local context variable-name given by lhs
-				# and global context for variable-name given by rhs
-				else:
-					env[context][lhs] = env[self.ast.tree.name][rhs]
-
-			# No global context for rhs, check for existing variable-name in local context 
-			elif rhs in env[context]:
-				# Check global context for existing entry in variable-name given by lhs
-				if lhs in env[self.ast.tree.name]:
-					env[self.ast.tree.name][lhs] = env[context][rhs]
-
-				# No global context for lhs, use local context variable-name given by lhs
-				# and local context for variable-name given by rhs
-				else:
-					env[context][lhs] = env[context][rhs]
-
-		# rhs is an integer value or list
-		else:
-			# Check global context for existing entry in variable-name given by lhs
-			if lhs in env[self.ast.tree.name]:
-				env[self.ast.tree.name][lhs] = rhs
-			# No global context for lhs, use local context variable-name given by lhs
+			return NIL
+
+	# Stores the value rhs into the slot lhs is bound to, a global slot of env or a slot of frame
+	# Only an integer or a list is stored, so that no variable ever holds None, True or False
+	def update_env(self, env, frame, lhs, rhs):
+		if type(rhs) is int or type(rhs) is ConsList:
+			(scope, slot) = lhs
+			if scope == GLOBAL:
+				env[slot] = rhs
 			else:
-				env[context][lhs] = rhs
+				frame[slot] = rhs
 
 	# Accesses the value stored in the variable tree object or Int/NilValue tree object
-	# Returns an integer, Nil, or list
-	# Checks the global context first before the local context
-	def access_env(self, tree, env, context):
+	# Returns an integer, Nil, or list, or None for a variable never stored to
+	# A name bound to no variable, as a function name read as a variable, is None
+	def access_env(self, tree, env, frame):
 		out = None
 
 		# Tree object is a variable
 		if tree.name != 'int':
-			v_id = self.Id(tree)
+			self.Id(tree)
+			binding = self.bindings.get(tree)
 
-			# Check for existence of variable name in global context
-			if v_id in env[self.ast.tree.name]:
-				out = env[self.ast.tree.name][v_id]
-			# No global context exists, access value stored in local context variable name
-			elif v_id in env[context]:
-				out = env[context][v_id]
+			if binding != None:
+				(scope, slot) = binding
+				if scope == GLOBAL:
+					out = env[slot]
+				else:
+					out = frame[slot]
 
 		# Tree object is a value
 		else:
@@ -661,9 +660,28 @@ class MicroInterp(object):
 		return out
 
 # Runs the proggram when called by itself from command-line
-def main(file):
-	# Create an instance of MicroInterp class with given input file
-	interp = MicroInterp(_input=file)
+def main(file, stream=False, quiet=False, buffered=False, output=None, cache=None, engine='tree', memo=MicroMemo.SIZE, memo_stats=False, optimize=MicroOptimize.LEVEL, optimize_stats=False, inline=MicroInline.SIZE):
+	# with buffering, the channels written to stdout share one sink so that lines keep their order
+	shared = BufferedSink() if buffered else None
+
+	# quiet mode drops the source listing and banners
+	echo = NullSink() if quiet else shared
+	out = FileSink(output) if output != None else shared
+	diagnostics = shared
+
+	try:
+		# Create an instance of MicroInterp class with given input file
+		interp = MicroInterp(_input=file, stream=stream, echo=echo, diagnostics=diagnostics, output=out, cache=cache, engine=engine, memo=memo, memo_stats=memo_stats, optimize=optimize, optimize_stats=optimize_stats, inline=inline, deep=True)
+	# the error has already been reported, halt with a failure exit code
+	except ErrorMessage:
+		sys.exit(1)
+	# a program recursing deeper than the Python stack allows is a runtime error of the program
+	except RecursionError as error:
+		EvaluationError('{0}: {1}'.format(type(error).__name__, error), filename=file).report(diagnostics)
+		sys.exit(1)
+	finally:
+		if out != None:
+			out.close()
 
 if __name__ == '__main__':
 	usage = "usage: %prog [options] SCALA_FILE"
@@ -671,9 +689,48 @@ if __name__ == '__main__':
 
 	parser.add_option("-d", "--debug", action="store_true",
 					  help="turn on debug mode")
+	parser.add_option("-s", "--stream", action="store_true", default=False,
+					  help="read the source lazily, one line at a time")
+	parser.add_option("-q", "--quiet", action="store_true", default=False,
+					  help="do not echo the source or print the Input/Output banners")
+	parser.add_option("-b", "--buffered", action="store_true", default=False,
+					  help="buffer output and write it out in large blocks")
+	parser.add_option("-o", "--output", default=None, metavar="FILE",
+					  help="write program output to FILE")
+	parser.add_option("-e", "--engine", type="choice", choices=['tree'] + sorted(engines), default='tree',
+					  help="execution engine: tree (walk the AST, the default) or " + ', '.join(sorted(engines)))
+	parser.add_option("-m", "--memo", type="int", default=MicroMemo.SIZE, metavar="SIZE",
+					  help="values cached for each pure function by the tree engine, 0 to cache none (default %default)")
+	parser.add_option("--memo-stats", action="store_true", default=False,
+					  help="report the hits and misses of the cache of every pure function")
+	parser.add_option("-O", "--optimize", type="int", default=MicroOptimize.LEVEL, metavar="LEVEL",
+					  help="optimization level: 0 runs the AST as parsed (the default), 1 folds constants and drops dead code, 2 also optimizes loops, 3 also inlines small functions")
+	parser.add_option("--optimize-stats", action="store_true", default=False,
+					  help="report what the optimizer changed and how many nodes it removed")
+	parser.add_option("--inline-size", type="int", dest="inline", default=MicroInline.SIZE, metavar="N",
+					  help="largest number of AST nodes of a function inlined at -O 3 (default %default)")
+	parser.add_option("--cache", action="store_true", default=False,
+					  help="parse through the on-disk parse cache, reusing the AST of an unchanged program")
+	parser.add_option("--no-cache", action="store_false", dest="cache",
+					  help="parse without the parse cache (the default)")
+	parser.add_option("--clear-cache", action="store_true", default=False,
+					  help="remove every parse cache entry before running")
+	parser.add_option("--cache-dir", default=None, metavar="DIR",
+					  help="parse cache directory (default $MICROSCALA_CACHE or ~/.cache/microscala)")
 
 	(options, args) = parser.parse_args()
 
+	cache = None
+	if options.cache:
+		cache = MicroCache.ParseCache(directory=options.cache_dir)
+
+	if options.clear_cache:
+		MicroCache.ParseCache(directory=options.cache_dir).clear()
+
+		# clearing alone does not run a program
+		if len(args) == 0:
+			sys.exit(0)
+
 	if len(args) == 0:
 		file = './Test1.scala'
 	elif len(args) != 1:
@@ -681,4 +738,4 @@ if __name__ == '__main__':
 	else:
 		file = args[0]
 
-	main(file=file)
\ No newline at end of file
+	main(file=file, stream=options.stream, quiet=options.quiet, buffered=options.buffered, output=options.output, cache=cache, engine=options.engine, memo=options.memo, memo_stats=options.memo_stats, optimize=options.optimize, optimize_stats=options.optimize_stats, inline=options.inline)
\ No newline at end of file
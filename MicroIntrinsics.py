@@ -0,0 +1,204 @@
+# MicroIntrinsics.py : Built-in list methods for the MicroScala project
+# The list methods length, sum, min, max, reverse, contains, take, drop and the
+# element-wise zipAdd, zipSub and zipMul run in bulk over the elements of a list packed
+# into one contiguous buffer: a NumPy int64 array when NumPy is installed, an array('q')
+# otherwise, or a plain Python list when an element does not fit in 64 bits. A list is
+# packed once and keeps its buffer, since lists never change. Whenever a result could
+# overflow 64 bits it is computed with Python integers instead, so every method gives
+# exactly the value an interpreted loop over the list would.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from array import array
+import operator
+from ErrorMessage import EvaluationError
+from MicroList import ConsList, NIL, from_values
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+# LIMIT bounds the magnitude of every 64-bit integer
+LIMIT = 2 ** 63
+
+# Returns the elements of values, a ConsList, packed into a contiguous buffer
+def pack(values):
+	try:
+		buffer = array('q', values)
+	except OverflowError:
+		return list(values)
+	if numpy != None and len(buffer) > 0:
+		return numpy.frombuffer(buffer, dtype=numpy.int64)
+	return buffer
+
+# Returns the buffer of values, packing it the first time
+def packed(values):
+	if values.packed is None:
+		values.packed = pack(values)
+	return values.packed
+
+# Returns True for a NumPy buffer
+def is_array(buffer):
+	return numpy != None and type(buffer) is numpy.ndarray
+
+# Returns the largest magnitude of an element of a NumPy buffer
+def bound(buffer):
+	if len(buffer) == 0:
+		return 0
+	return max(-int(buffer.min()), int(buffer.max()))
+
+# Returns the ConsList of the elements of a buffer, which keeps the buffer
+def unpack(buffer):
+	values = buffer.tolist() if is_array(buffer) or type(buffer) is array else buffer
+	out = from_values(values)
+	if out is not NIL and type(buffer) is not list:
+		out.packed = buffer
+	return out
+
+# Raises an EvaluationError unless term1, the list a method is called on, is a list
+def need_list(name, term1):
+	if type(term1) is not ConsList:
+		raise EvaluationError('{0}: {1!r} is not a List'.format(name, term1))
+
+# Raises an EvaluationError unless term2, the argument of a method, is an integer
+def need_int(name, term2):
+	if type(term2) is not int:
+		raise EvaluationError('{0}: {1!r} is not an Int'.format(name, term2))
+
+# Returns term1.length
+def length(term1, term2):
+	need_list('Length', term1)
+	return len(term1)
+
+# Returns term1.sum, 0 for the empty list
+def total(term1, term2):
+	need_list('Sum', term1)
+	buffer = packed(term1)
+	if is_array(buffer):
+		if bound(buffer) * len(buffer) < LIMIT:
+			return int(buffer.sum())
+		return sum(buffer.tolist())
+	return sum(buffer)
+
+# Returns term1.min
+def minimum(term1, term2):
+	need_list('Min', term1)
+	if len(term1) == 0:
+		raise EvaluationError('Min: List is empty')
+	buffer = packed(term1)
+	return int(buffer.min()) if is_array(buffer) else min(buffer)
+
+# Returns term1.max
+def maximum(term1, term2):
+	need_list('Max', term1)
+	if len(term1) == 0:
+		raise EvaluationError('Max: List is empty')
+	buffer = packed(term1)
+	return int(buffer.max()) if is_array(buffer) else max(buffer)
+
+# Returns term1.reverse
+def reverse(term1, term2):
+	need_list('Reverse', term1)
+	if len(term1) < 2:
+		return term1
+	return unpack(packed(term1)[::-1])
+
+# Returns term1.contains(term2)
+def contains(term1, term2):
+	need_list('Contains', term1)
+	need_int('Contains', term2)
+	buffer = packed(term1)
+	if is_array(buffer):
+		return -LIMIT <= term2 < LIMIT and bool((buffer == term2).any())
+	return term2 in buffer
+
+# Returns term1.take(term2), the first term2 elements
+def take(term1, term2):
+	need_list('Take', term1)
+	need_int('Take', term2)
+	if term2 <= 0:
+		return NIL
+	if term2 >= len(term1):
+		return term1
+	return unpack(packed(term1)[:term2])
+
+# Returns term1.drop(term2), the list without its first term2 elements, which shares
+# the cells of term1
+def drop(term1, term2):
+	need_list('Drop', term1)
+	need_int('Drop', term2)
+	if term2 <= 0:
+		return term1
+	if term2 >= len(term1):
+		return NIL
+
+	cells = term1.cells
+	for count in range(term2):
+		cells = cells[1]
+	out = ConsList(cells, len(term1) - term2)
+	if term1.packed is not None and type(term1.packed) is not list:
+		out.packed = term1.packed[term2:]
+	return out
+
+# Returns the list of function(x, y) over the pairs of elements of term1 and term2, as
+# long as the shorter list; fits tells whether the 64-bit result cannot overflow given
+# the largest magnitudes of the elements of both lists
+def zipped(name, function, fits, term1, term2):
+	need_list(name, term1)
+	need_list(name, term2)
+	count = min(len(term1), len(term2))
+	if count == 0:
+		return NIL
+
+	buffer1 = packed(term1)[:count]
+	buffer2 = packed(term2)[:count]
+	if is_array(buffer1) and is_array(buffer2) and fits(bound(buffer1), bound(buffer2)):
+		return unpack(function(buffer1, buffer2))
+	return from_values(list(map(function, buffer1.tolist() if is_array(buffer1) else buffer1,
+		buffer2.tolist() if is_array(buffer2) else buffer2)))
+
+# Returns term1.zipAdd(term2), the sums of the pairs of elements
+def zip_add(term1, term2):
+	return zipped('ZipAdd', operator.add, lambda a, b: a + b < LIMIT, term1, term2)
+
+# Returns term1.zipSub(term2), the differences of the pairs of elements
+def zip_sub(term1, term2):
+	return zipped('ZipSub', operator.sub, lambda a, b: a + b < LIMIT, term1, term2)
+
+# Returns term1.zipMul(term2), the products of the pairs of elements
+def zip_mul(term1, term2):
+	return zipped('ZipMul', operator.mul, lambda a, b: a * b < LIMIT, term1, term2)
+
+# methods maps the name of each list method to its function of the list and the argument,
+# the empty list for a method without one
+methods = {
+	'length': length,
+	'sum': total,
+	'min': minimum,
+	'max': maximum,
+	'reverse': reverse,
+	'contains': contains,
+	'take': take,
+	'drop': drop,
+	'zipAdd': zip_add,
+	'zipSub': zip_sub,
+	'zipMul': zip_mul,
+}
+
+# results maps the name of each list method to the type of its value, named as in MicroTypeCheck
+results = {
+	'length': 'int',
+	'sum': 'int',
+	'min': 'int',
+	'max': 'int',
+	'reverse': 'list',
+	'contains': 'bool',
+	'take': 'list',
+	'drop': 'list',
+	'zipAdd': 'list',
+	'zipSub': 'list',
+	'zipMul': 'list',
+}
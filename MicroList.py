@@ -0,0 +1,126 @@
+# MicroList.py : Persistent list values for the MicroScala project
+# A ConsList is an immutable list built from cells shared between every list made from
+# it, so that :: onto a list, head, tail and isEmpty take constant time and no list is
+# ever changed through another variable holding it. A list is a chain of cells of
+# (value, next cell) with the number of its elements: tail drops the first and the last
+# element of a list, as it always has, by taking the next cell and two elements fewer,
+# so a list may end before the end of its chain of cells. Lists print and compare as
+# Python lists of their elements. A list may also keep its elements packed in one
+# contiguous buffer, built the first time a bulk list method needs it (MicroIntrinsics).
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+class ConsList(object):
+	__slots__ = ('cells', 'length', 'packed')
+
+	def __init__(self, cells=None, length=0):
+		self.cells = cells
+		self.length = length
+		self.packed = None
+
+	# Returns value :: self
+	def prepend(self, value):
+		return ConsList((value, self.cells), self.length + 1)
+
+	# Returns the list of the elements of self followed by the elements of other
+	def concat(self, other):
+		if self.length == 0:
+			return other
+
+		cells = other.cells
+		for value in reversed(list(self)):
+			cells = (value, cells)
+		return ConsList(cells, self.length + other.length)
+
+	# Returns the first element
+	def head(self):
+		return self.cells[0]
+
+	# Returns the list without its first and last elements
+	def tail(self):
+		if self.length <= 2:
+			return NIL
+		return ConsList(self.cells[1], self.length - 2)
+
+	def __len__(self):
+		return self.length
+
+	def __iter__(self):
+		cells = self.cells
+		for count in range(self.length):
+			yield cells[0]
+			cells = cells[1]
+
+	# Two lists are equal when they have the same length and equal elements; the walk stops
+	# as soon as both lists reach the same cell, since they share every element from there
+	def __eq__(self, other):
+		if type(other) is not ConsList:
+			return NotImplemented
+		if self.length != other.length:
+			return False
+
+		a, b = self.cells, other.cells
+		for count in range(self.length):
+			if a is b:
+				return True
+			if a[0] != b[0]:
+				return False
+			a, b = a[1], b[1]
+		return True
+
+	def __ne__(self, other):
+		equal = self.__eq__(other)
+		if equal is NotImplemented:
+			return equal
+		return not equal
+
+	__hash__ = None
+
+	# Lists order, concatenate and repeat as Python lists
+	def __lt__(self, other):
+		if type(other) is not ConsList:
+			return NotImplemented
+		return list(self) < list(other)
+
+	def __le__(self, other):
+		if type(other) is not ConsList:
+			return NotImplemented
+		return list(self) <= list(other)
+
+	def __gt__(self, other):
+		if type(other) is not ConsList:
+			return NotImplemented
+		return list(self) > list(other)
+
+	def __ge__(self, other):
+		if type(other) is not ConsList:
+			return NotImplemented
+		return list(self) >= list(other)
+
+	def __add__(self, other):
+		if type(other) is not ConsList:
+			return NotImplemented
+		return self.concat(other)
+
+	def __mul__(self, count):
+		if type(count) is not int:
+			return NotImplemented
+		return from_values(list(self) * count)
+
+	__rmul__ = __mul__
+
+	def __repr__(self):
+		return repr(list(self))
+
+	def __reduce__(self):
+		return (from_values, (list(self),))
+
+# NIL is the empty list
+NIL = ConsList()
+
+# Returns the ConsList of the given values, in order
+def from_values(values):
+	cells = None
+	for value in reversed(values):
+		cells = (value, cells)
+	return ConsList(cells, len(values)) if len(values) > 0 else NIL
@@ -0,0 +1,376 @@
+# MicroLoop.py : Loop optimizer for the MicroScala project
+# Loops rewrites the while statements of a resolved program so that each iteration does
+# less work. A while whose body only adds to or subtracts from Int variables amounts that
+# do not change in it, and whose condition compares one of them with a bound that does not
+# change either, is a counting loop: it is replaced by the number of iterations computed
+# once and one store of the final value of each variable. In any other loop, a product of
+# an induction variable, stored once per iteration as i = i + c, and an invariant is kept
+# in a variable of its own, moved by c times the invariant as i moves, and every arithmetic
+# expression of invariants is computed once before the loop. A value is invariant when no
+# statement of the loop stores it and no function called in the loop can store it, as a
+# global. Only Int values are moved, so that no moved expression can fail or change type.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from MicroResolve import Resolver, GLOBAL
+from MicroTypeCheck import TypeChecker, preorder
+from MicroRuntime import function_table
+import AST
+
+# arithmetic lists the operators of the expressions moved out of loops
+arithmetic = ['+', '-', '*', '/']
+
+# USES is the number of times a product must be evaluated in one iteration to be reduced,
+# as moving its variable costs about as much as evaluating it once
+USES = 3
+
+# flipped maps each comparison to the comparison with its operands swapped
+flipped = {'<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+# Returns the statements of a loop body
+def statements(tree):
+	return tree.stmts if type(tree) == AST.Block else [tree]
+
+class Loops(object):
+	def __init__(self, tree, resolver=None, types=None):
+		self.resolver = resolver if resolver != None else Resolver(tree)
+		self.types = types if types != None else TypeChecker(tree, self.resolver)
+		self.bindings = self.resolver.bindings
+		self.functions = function_table(tree.funcList)
+
+		# counts of the expressions computed once before a loop, the products kept up to date
+		# instead, and the counting loops replaced by their final stores
+		self.hoisted = 0
+		self.reduced = 0
+		self.closed = 0
+
+		# writes maps each function to the slots of the globals a call of it may store
+		self.writes = self.Writes()
+
+		funcList = [self.Func(func) for func in tree.funcList]
+		main = self.Func(tree.stmt) if tree.stmt != None else None
+		self.tree = AST.Program(tree.name, main, tree.argList, funcList, tree.decVarList)
+
+	# Returns the slots of the globals each function stores, itself or through the functions it
+	# calls, binding an argument or local named like a global included
+	def Writes(self):
+		writes = {}
+		calls = {}
+		for func in self.functions.values():
+			writes[func] = set(self.bindings[var][1] for var in func.argList + func.decVarList if self.bindings[var][0] == GLOBAL)
+			calls[func] = set()
+			for node in preorder(func.stmt) if func.stmt != None else []:
+				if type(node) == AST.Assignment and self.bindings.get(node.lhs, (None,))[0] == GLOBAL:
+					writes[func].add(self.bindings[node.lhs][1])
+				elif type(node) == AST.FunctionCall and node.name in self.functions:
+					calls[func].add(self.functions[node.name])
+
+		changed = True
+		while changed:
+			changed = False
+			for func in writes:
+				for called in calls[func]:
+					if not writes[called] <= writes[func]:
+						writes[func] |= writes[called]
+						changed = True
+		return writes
+
+	# Returns the function, or main, with its loops optimized and a local declared for every
+	# value they keep
+	def Func(self, tree):
+		self.func = tree
+		self.temps = []
+		stmt = self.Stmt(tree.stmt) if tree.stmt != None else None
+		return AST.Program(tree.name, stmt, tree.argList, tree.funcList, tree.decVarList + self.temps)
+
+	# Returns a new Int local of the function, named so that it cannot clash with a variable
+	# of the program, as an identifier never ends with an underscore
+	def Temp(self, prefix):
+		name = '{0}{1}_'.format(prefix, len(self.temps))
+		self.temps.append(AST.DecVar(name, 'Int', AST.IntValue(0)))
+		return name
+
+	# Returns the statement with its loops optimized, inner loops first
+	def Stmt(self, tree):
+		if type(tree) == AST.Block:
+			stmts = []
+			for stmt in tree.stmts:
+				stmt = self.Stmt(stmt)
+				if type(stmt) == AST.Block:
+					stmts.extend(stmt.stmts)
+				else:
+					stmts.append(stmt)
+			return AST.Block(stmts)
+
+		elif type(tree) == AST.If:
+			term2 = self.Stmt(tree.term2) if tree.term2 != None else None
+			return AST.If(tree.cond, self.Stmt(tree.term1), term2)
+
+		elif type(tree) == AST.While:
+			return self.Loop(AST.While(tree.cond, self.Stmt(tree.statement)))
+
+		return tree
+
+	# Returns the optimized loop, preceded by the statements computing what it keeps
+	def Loop(self, tree):
+		variant = self.Variant(tree)
+
+		closed = self.Closed(tree, variant)
+		if closed != None:
+			self.closed += 1
+			return closed
+
+		before = []
+		tree = self.Reduce(tree, variant, before)
+		tree = self.Hoist(tree, variant, before)
+		if len(before) > 0:
+			return AST.Block(before + [tree])
+		return tree
+
+	# Returns the variables a loop may store, as the bindings of MicroResolve: every variable
+	# assigned in it and every global a function called in it may store
+	def Variant(self, tree):
+		variant = set()
+		for node in preorder(tree):
+			if type(node) == AST.Assignment:
+				variant.add(self.bindings.get(node.lhs))
+			elif type(node) == AST.FunctionCall and node.name in self.functions:
+				for slot in self.writes[self.functions[node.name]]:
+					variant.add((GLOBAL, slot))
+		return variant
+
+	# Returns True for an Int literal or an Int variable
+	def Int(self, tree):
+		if type(tree) == AST.IntValue:
+			return type(tree.value) is int or tree.value.lstrip('-').isdigit()
+		if type(tree) == AST.Variable and tree in self.bindings:
+			return self.types.Expr(tree, self.func) == 'int'
+		return False
+
+	# Returns True for an Int literal, or an Int variable the loop does not store
+	def Atom(self, tree, variant):
+		if type(tree) == AST.Variable:
+			return self.Int(tree) and self.bindings[tree] not in variant
+		return self.Int(tree)
+
+	# Returns True for an arithmetic expression of invariant Int values that cannot fail: it
+	# divides by nothing but literals other than 0
+	def Invariant(self, tree, variant):
+		if type(tree) != AST.Expr:
+			return self.Atom(tree, variant)
+		if tree.op not in arithmetic or tree.term2 == None:
+			return False
+		if tree.op == '/' and (type(tree.term2) != AST.IntValue or int(tree.term2.value) == 0):
+			return False
+		return self.Invariant(tree.term1, variant) and self.Invariant(tree.term2, variant)
+
+	# Returns (variable, operator, step) for an assignment v = v + step, v = step + v or
+	# v = v - step of an Int variable by an invariant step, or None
+	def Step(self, tree, variant):
+		if type(tree) != AST.Assignment or tree.lhs not in self.bindings or not self.Int(tree.lhs):
+			return None
+
+		rhs = tree.rhs
+		if type(rhs) != AST.Expr or rhs.op not in ['+', '-']:
+			return None
+
+		binding = self.bindings[tree.lhs]
+		if type(rhs.term1) == AST.Variable and self.bindings.get(rhs.term1) == binding and self.Atom(rhs.term2, variant):
+			return (binding, rhs.op, rhs.term2)
+		if rhs.op == '+' and type(rhs.term2) == AST.Variable and self.bindings.get(rhs.term2) == binding and self.Atom(rhs.term1, variant):
+			return (binding, rhs.op, rhs.term1)
+		return None
+
+	# Returns the statements replacing a counting loop, or None for any other loop
+	# The loop runs count = D / m + 1 times when its condition holds on entry, where m is the
+	# step of the variable x of the condition and D how far x is from the last value it is
+	# compared with, and then every variable v has moved by count times its step; a step m
+	# that is not a literal is tested as the loop would only end if it were above 0
+	def Closed(self, tree, variant):
+		cond = tree.cond
+		if type(cond) != AST.Expr or cond.op not in flipped:
+			return None
+
+		steps = {}
+		stores = []
+		for stmt in statements(tree.statement):
+			step = self.Step(stmt, variant)
+			if step == None or step[0] in steps:
+				return None
+			steps[step[0]] = step
+			stores.append((stmt.lhs, step))
+
+		# x op bound, with x a variable the loop steps towards the bound
+		(op, x, bound) = (cond.op, cond.term1, cond.term2)
+		if type(x) != AST.Variable or self.bindings.get(x) not in steps:
+			(op, x, bound) = (flipped[op], bound, x)
+		if type(x) != AST.Variable or self.bindings.get(x) not in steps or not self.Atom(bound, variant):
+			return None
+
+		(binding, direction, m) = steps[self.bindings[x]]
+		if direction != ('+' if op in ['<', '<='] else '-'):
+			return None
+		if type(m) == AST.IntValue and int(m.value) <= 0:
+			return None
+
+		one = AST.IntValue(1)
+		distance = AST.Expr('-', bound, x) if op in ['<', '<='] else AST.Expr('-', x, bound)
+		if op in ['<', '>']:
+			distance = AST.Expr('-', distance, one)
+		if type(m) == AST.IntValue and int(m.value) == 1:
+			count = AST.Expr('+', distance, one)
+		else:
+			count = AST.Expr('+', AST.Expr('/', distance, m), one)
+
+		trips = self.Temp('trips')
+		stmts = [AST.Assignment(AST.Variable(trips), count)]
+		for (var, (binding, direction, step)) in stores:
+			if type(step) == AST.IntValue and int(step.value) == 1:
+				moved = AST.Variable(trips)
+			else:
+				moved = AST.Expr('*', AST.Variable(trips), step)
+			stmts.append(AST.Assignment(var, AST.Expr(direction, var, moved)))
+
+		closed = AST.If(AST.Expr(op, x, bound), AST.Block(stmts))
+		if type(m) != AST.IntValue:
+			closed = AST.If(AST.Expr('>', m, AST.IntValue(0)), closed, tree)
+		return closed
+
+	# Returns the loop with every product of an induction variable and an invariant read from a
+	# variable of its own, set before the loop and moved right after the induction variable
+	def Reduce(self, tree, variant, before):
+		# inductions maps the binding of each variable stored once, by a statement of the body
+		# itself, to (its statement, operator, step); a global a function called in the loop may
+		# store is stored by that call too
+		inductions = {}
+		counts = {}
+		for node in preorder(tree):
+			if type(node) == AST.Assignment:
+				binding = self.bindings.get(node.lhs)
+				counts[binding] = counts.get(binding, 0) + 1
+			elif type(node) == AST.FunctionCall and node.name in self.functions:
+				for slot in self.writes[self.functions[node.name]]:
+					counts[(GLOBAL, slot)] = counts.get((GLOBAL, slot), 0) + 1
+		for stmt in statements(tree.statement):
+			step = self.Step(stmt, variant)
+			if step != None and counts[step[0]] == 1:
+				inductions[step[0]] = (stmt,) + step[1:]
+
+		if len(inductions) == 0:
+			return tree
+
+		# Returns (induction variable, invariant factor, key) for a product of both, or None
+		def factors(expr):
+			if type(expr) != AST.Expr or expr.op != '*':
+				return None
+			for (var, factor) in [(expr.term1, expr.term2), (expr.term2, expr.term1)]:
+				if type(var) == AST.Variable and self.bindings.get(var) in inductions and self.Atom(factor, variant):
+					return (var, factor, (self.bindings[var], repr(factor)))
+			return None
+
+		# uses counts the evaluations of each product in one iteration
+		uses = {}
+		def count(expr):
+			found = factors(expr)
+			if found != None:
+				uses[found[2]] = uses.get(found[2], 0) + 1
+			return None
+		self.Rewrite(tree, count)
+
+		# products maps each product reduced, by its key, to its variable
+		products = {}
+		updates = {}
+
+		def product(expr):
+			found = factors(expr)
+			if found == None or uses[found[2]] < USES:
+				return None
+
+			(var, factor, key) = found
+			if key not in products:
+				(stmt, direction, step) = inductions[self.bindings[var]]
+				name = self.Temp('product')
+				products[key] = name
+				before.append(AST.Assignment(AST.Variable(name), AST.Expr('*', var, factor)))
+
+				# moved by step * factor, a literal or computed once before the loop
+				if type(step) == AST.IntValue and type(factor) == AST.IntValue:
+					delta = AST.IntValue(int(step.value) * int(factor.value))
+				elif type(step) == AST.IntValue and int(step.value) == 1:
+					delta = factor
+				else:
+					delta = AST.Variable(self.Temp('invariant'))
+					before.append(AST.Assignment(delta, AST.Expr('*', step, factor)))
+				updates.setdefault(stmt, []).append(AST.Assignment(AST.Variable(name), AST.Expr(direction, AST.Variable(name), delta)))
+			self.reduced += 1
+			return AST.Variable(products[key])
+
+		rewritten = self.Rewrite(tree, product)
+		if len(updates) == 0:
+			return rewritten
+
+		# the body is rewritten statement by statement, so each statement keeps its place
+		stmts = []
+		for (stmt, new) in zip(statements(tree.statement), statements(rewritten.statement)):
+			stmts.append(new)
+			stmts.extend(updates.get(stmt, []))
+		return AST.While(rewritten.cond, AST.Block(stmts))
+
+	# Returns the loop with every invariant arithmetic expression read from a variable set
+	# before the loop, one variable for equal expressions
+	def Hoist(self, tree, variant, before):
+		temps = {}
+
+		def invariant(expr):
+			if type(expr) != AST.Expr or not self.Invariant(expr, variant):
+				return None
+			key = repr(expr)
+			if key not in temps:
+				temps[key] = self.Temp('invariant')
+				before.append(AST.Assignment(AST.Variable(temps[key]), expr))
+			self.hoisted += 1
+			return AST.Variable(temps[key])
+
+		return self.Rewrite(tree, invariant)
+
+	# Returns a statement with every expression it evaluates rewritten: replace returns the
+	# node replacing an expression, or None to rewrite the operands of the expression instead
+	# The condition of an if or while is kept, only its operands are rewritten
+	def Rewrite(self, tree, replace):
+		def expr(tree):
+			if tree == None:
+				return None
+			node = replace(tree)
+			if node != None:
+				return node
+			if type(tree) == AST.Expr:
+				return AST.Expr(tree.op, expr(tree.term1), expr(tree.term2))
+			if type(tree) == AST.FunctionCall:
+				return AST.FunctionCall(tree.name, [expr(param) for param in tree.parameterList], tree.position)
+			return tree
+
+		def cond(tree):
+			if type(tree) == AST.Expr:
+				return AST.Expr(tree.op, expr(tree.term1), expr(tree.term2))
+			return tree
+
+		def stmt(tree):
+			if type(tree) == AST.Block:
+				return AST.Block([stmt(item) for item in tree.stmts])
+			elif type(tree) == AST.Assignment:
+				return AST.Assignment(tree.lhs, expr(tree.rhs))
+			elif type(tree) == AST.If:
+				return AST.If(cond(tree.cond), stmt(tree.term1), stmt(tree.term2) if tree.term2 != None else None)
+			elif type(tree) == AST.While:
+				return AST.While(cond(tree.cond), stmt(tree.statement))
+			elif type(tree) == AST.Println:
+				return AST.Println(expr(tree.expr))
+			return tree
+
+		return stmt(tree)
+
+	# Returns a line reporting what was done to loops
+	def report(self):
+		return '{0} loops closed, {1} products reduced, {2} invariants hoisted'.format(self.closed, self.reduced, self.hoisted)
@@ -0,0 +1,143 @@
+# MicroMemo.py : Memoization of pure functions for the MicroScala project
+# Purity finds the functions whose value depends on nothing but their arguments and
+# the globals they read: a pure function assigns no global, binds no argument or local
+# to a global, prints nothing and calls only pure functions. Memo caches the values of
+# the calls of one pure function, keyed by the values of its arguments and of every
+# global it or a function it calls reads, and keeps only the most recently used values.
+# Lists are keyed by the tuple of their elements; a call passing a list longer than
+# KEY_LENGTH elements is not cached, as building its key would cost as much as a call.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+import collections
+from MicroResolve import Resolver, GLOBAL
+from MicroRuntime import function_table
+from MicroList import ConsList
+from MicroTypeCheck import preorder
+import AST
+
+# SIZE is the number of values cached for each pure function unless told otherwise
+SIZE = 256
+
+# KEY_LENGTH is the length of the longest list a cached call may be passed
+KEY_LENGTH = 64
+
+# MISSING is returned for a call whose value is not cached
+MISSING = object()
+
+class Purity(object):
+	def __init__(self, tree, resolver=None):
+		self.resolver = resolver if resolver != None else Resolver(tree)
+		self.functions = function_table(tree.funcList)
+
+		# reads maps each pure function to the slots of the globals it and the functions it
+		# calls read, in order
+		self.reads = {}
+
+		# calls maps each function to the functions it calls
+		calls = {}
+		for func in self.functions.values():
+			reads = self.Func(func)
+			if reads != None:
+				self.reads[func] = reads
+				calls[func] = set(self.functions.get(node.name) for node in self.nodes(func) if type(node) == AST.FunctionCall)
+
+		# drop every function calling a function that is not pure, and add the globals read by
+		# the functions called to the globals read, until nothing changes
+		changed = True
+		while changed:
+			changed = False
+			for func in list(self.reads):
+				if any(called not in self.reads for called in calls[func]):
+					del self.reads[func]
+					changed = True
+					continue
+
+				reads = set(self.reads[func])
+				for called in calls[func]:
+					reads.update(self.reads[called])
+				if len(reads) != len(self.reads[func]):
+					self.reads[func] = sorted(reads)
+					changed = True
+
+	# Returns the nodes of the body of a function
+	def nodes(self, func):
+		return preorder(func.stmt) if func.stmt != None else []
+
+	# Returns the slots of the globals a function reads itself, or None when it assigns a
+	# global or prints
+	def Func(self, tree):
+		bindings = self.resolver.bindings
+		for var in tree.argList + tree.decVarList:
+			if bindings[var][0] == GLOBAL:
+				return None
+
+		reads = set()
+		for node in self.nodes(tree):
+			if type(node) == AST.Println:
+				return None
+			elif type(node) == AST.Assignment and type(node.lhs) == AST.Variable:
+				binding = bindings.get(node.lhs)
+				if binding != None and binding[0] == GLOBAL:
+					return None
+			elif type(node) in [AST.Variable, AST.NilValue]:
+				binding = bindings.get(node)
+				if binding != None and binding[0] == GLOBAL:
+					reads.add(binding[1])
+		return sorted(reads)
+
+# Returns the key of a value, a list keyed by its elements, or None for a list too long to key
+def value_key(value):
+	if type(value) is ConsList:
+		if len(value) > KEY_LENGTH:
+			return None
+		return (ConsList, tuple(value))
+	return (type(value), value)
+
+class Memo(object):
+	def __init__(self, func, slots, reads, size=SIZE):
+		self.name = func.name
+		self.slots = slots
+		self.reads = reads
+		self.size = size
+		self.values = collections.OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	# Returns the key of a call from the frame its arguments are bound in and the globals,
+	# or None for a call that is not cached
+	def key(self, frame, env):
+		key = []
+		for slot in self.slots:
+			item = value_key(frame[slot])
+			if item == None:
+				return None
+			key.append(item)
+		for slot in self.reads:
+			item = value_key(env[slot])
+			if item == None:
+				return None
+			key.append(item)
+		return tuple(key)
+
+	# Returns the cached value of a call, or MISSING
+	def get(self, key):
+		value = self.values.get(key, MISSING)
+		if value is MISSING:
+			self.misses += 1
+		else:
+			self.hits += 1
+			self.values.move_to_end(key)
+		return value
+
+	# Caches the value of a call, dropping the least recently used value when full
+	def put(self, key, value):
+		self.values[key] = value
+		if len(self.values) > self.size:
+			self.values.popitem(last=False)
+
+	# Returns a line reporting the hits and misses of the cache
+	def report(self):
+		return 'Memo {0}: {1} hits, {2} misses, {3} cached'.format(self.name, self.hits, self.misses, len(self.values))
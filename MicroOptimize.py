@@ -0,0 +1,296 @@
+# MicroOptimize.py : AST optimizer for the MicroScala project
+# Optimizer rewrites the AST of a resolved program into a smaller AST computing the same
+# output, before any engine runs it. Integer literals are decoded once, arithmetic on
+# literals is folded, and the integer value of a local is propagated into the reads of it
+# that follow in straight-line code. An if whose condition compares literals keeps only the
+# branch that runs, a while whose condition is false when it is first reached is dropped,
+# and a function main never reaches is dropped. Only locals are propagated: a global may be
+# changed by any function call. The nodes of the original AST are never changed, as they
+# may be shared, so the optimized AST is resolved and type checked again before it runs.
+# From level 2, the while statements left are then optimized by MicroLoop.Loops. At level 3,
+# small functions are first inlined into their callers by MicroInline.Inliner, so that the
+# values of the arguments are propagated into the bodies inlined.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from MicroResolve import Resolver, LOCAL
+from MicroRuntime import function_table
+from MicroTypeCheck import preorder
+from MicroLoop import Loops
+from MicroInline import Inliner, SIZE
+import AST
+
+# LEVEL is the optimization level used unless told otherwise, 0 for none
+LEVEL = 0
+
+# arithmetic maps each arithmetic operator folded on two integer literals to its function
+arithmetic = {
+	'+': lambda a, b: a + b,
+	'-': lambda a, b: a - b,
+	'*': lambda a, b: a * b,
+	'/': lambda a, b: a // b,
+}
+
+# relations maps each comparison folded on two integer literals to its function
+relations = {
+	'<': lambda a, b: a < b,
+	'<=': lambda a, b: a <= b,
+	'>': lambda a, b: a > b,
+	'>=': lambda a, b: a >= b,
+	'==': lambda a, b: a == b,
+	'!=': lambda a, b: a != b,
+}
+
+# Returns the number of nodes of an AST
+def size(tree):
+	return sum(1 for node in preorder(tree))
+
+# Returns the integer of a decoded integer literal, or None for any other node
+def constant(tree):
+	if type(tree) == AST.IntValue and type(tree.value) is int:
+		return tree.value
+	return None
+
+class Optimizer(object):
+	def __init__(self, tree, resolver=None, level=LEVEL, inline=SIZE):
+		self.resolver = resolver if resolver != None else Resolver(tree)
+		self.level = level
+
+		# counts of the literals decoded, expressions folded, reads of locals replaced by their
+		# value, if and while statements dropped or cut down to a branch, and functions dropped
+		self.decoded = 0
+		self.folded = 0
+		self.propagated = 0
+		self.branches = 0
+		self.functions = 0
+
+		self.before = size(tree)
+
+		# at level 3 small functions are inlined first, and the program inlined resolved again
+		self.inliner = None
+		if level > 2:
+			self.inliner = Inliner(tree, self.resolver, inline)
+			tree = self.inliner.tree
+			self.resolver = Resolver(tree)
+		self.bindings = self.resolver.bindings
+
+		self.tree = self.Prog(tree) if level > 0 else tree
+
+		# from level 2 the loops of the program left are optimized too
+		self.loops = None
+		if level > 1:
+			self.loops = Loops(self.tree)
+			self.tree = self.loops.tree
+		self.after = size(self.tree)
+
+	# Returns the optimized program, without the functions main never reaches
+	def Prog(self, tree):
+		decVarList = [self.DecVar(var) for var in tree.decVarList]
+		funcList = [self.Func(func) for func in tree.funcList]
+		main = self.Func(tree.stmt) if tree.stmt != None else None
+
+		if main != None:
+			reached = self.Reached(main, funcList)
+			self.functions = len(funcList) - len(reached)
+			funcList = [func for func in funcList if func in reached]
+
+		return AST.Program(tree.name, main, tree.argList, funcList, decVarList)
+
+	# Returns the set of functions of funcList called from main, directly or through other calls
+	def Reached(self, main, funcList):
+		functions = function_table(funcList)
+		reached = set()
+		stack = [main]
+		while len(stack) > 0:
+			func = stack.pop()
+			for node in preorder(func):
+				if type(node) == AST.FunctionCall:
+					called = functions.get(node.name)
+					if called != None and called not in reached:
+						reached.add(called)
+						stack.append(called)
+		return reached
+
+	# Returns the declaration of a variable with its initial value decoded
+	def DecVar(self, tree):
+		value = self.Value(tree.value, {})
+		if value is tree.value:
+			return tree
+		return AST.DecVar(tree.name, tree.type, value)
+
+	# Returns the optimized function, or main, starting with the integer value of every local
+	# it declares known
+	def Func(self, tree):
+		decVarList = [self.DecVar(var) for var in tree.decVarList]
+
+		# known maps the slot of each local whose integer value is known to that value
+		known = {}
+		for (var, decVar) in zip(tree.decVarList, decVarList):
+			slot = self.local(var)
+			if slot != None:
+				if constant(decVar.value) != None:
+					known[slot] = decVar.value.value
+				else:
+					known.pop(slot, None)
+
+		stmt = self.Stmt(tree.stmt, known) if tree.stmt != None else None
+		return AST.Program(tree.name, stmt, tree.argList, tree.funcList, decVarList)
+
+	# Returns the frame slot a variable or declaration is bound to, or None for a global
+	def local(self, tree):
+		binding = self.bindings.get(tree)
+		if binding != None and binding[0] == LOCAL:
+			return binding[1]
+		return None
+
+	# Returns the optimized statement, updating known with the values of the locals it stores
+	def Stmt(self, tree, known):
+		if type(tree) == AST.Block:
+			stmts = []
+			for stmt in tree.stmts:
+				stmt = self.Stmt(stmt, known)
+				# a block left inside a block runs its statements in place
+				if type(stmt) == AST.Block:
+					stmts.extend(stmt.stmts)
+				else:
+					stmts.append(stmt)
+			return AST.Block(stmts)
+
+		elif type(tree) == AST.Assignment:
+			rhs = self.Value(tree.rhs, known)
+			slot = self.local(tree.lhs)
+			if slot != None:
+				if constant(rhs) != None:
+					known[slot] = rhs.value
+				else:
+					known.pop(slot, None)
+			return AST.Assignment(tree.lhs, rhs)
+
+		elif type(tree) == AST.If:
+			(cond, value) = self.Cond(tree.cond, known)
+			if value != None:
+				self.branches += 1
+				if value:
+					return self.Stmt(tree.term1, known)
+				elif tree.term2 != None:
+					return self.Stmt(tree.term2, known)
+				return AST.Block([])
+
+			# a local keeps its value past the if when both branches leave it the same
+			other = dict(known)
+			term1 = self.Stmt(tree.term1, known)
+			term2 = self.Stmt(tree.term2, other) if tree.term2 != None else None
+			for slot in list(known):
+				if other.get(slot) != known[slot]:
+					del known[slot]
+			return AST.If(cond, term1, term2)
+
+		elif type(tree) == AST.While:
+			# a loop whose condition is false the first time never runs
+			if self.Test(tree.cond, known) == False:
+				self.branches += 1
+				return AST.Block([])
+
+			# no local stored in the loop is known in it or after it
+			for node in preorder(tree.statement):
+				if type(node) == AST.Assignment:
+					known.pop(self.local(node.lhs), None)
+
+			(cond, value) = self.Cond(tree.cond, known)
+			return AST.While(cond, self.Stmt(tree.statement, dict(known)))
+
+		elif type(tree) == AST.Println:
+			return AST.Println(self.Value(tree.expr, known))
+
+		elif type(tree) == AST.Return:
+			return AST.Return(self.Value(tree.expr, known))
+
+		return tree
+
+	# Returns the optimized condition of an if or while, and True or False when it compares
+	# two integer literals, None otherwise
+	def Cond(self, tree, known):
+		if type(tree) != AST.Expr:
+			return (tree, None)
+
+		cond = self.Operands(tree, known)
+		(term1, term2) = (constant(cond.term1), constant(cond.term2))
+		if cond.op in relations and term1 != None and term2 != None:
+			return (cond, relations[cond.op](term1, term2))
+		return (cond, None)
+
+	# Returns True or False when a condition compares two expressions whose integer values are
+	# known, None otherwise, leaving the condition as it is
+	def Test(self, tree, known):
+		if type(tree) != AST.Expr or tree.op not in relations:
+			return None
+
+		(term1, term2) = (self.Known(tree.term1, known), self.Known(tree.term2, known))
+		if term1 != None and term2 != None:
+			return relations[tree.op](term1, term2)
+		return None
+
+	# Returns the integer value of an expression of literals and known locals, or None
+	def Known(self, tree, known):
+		if type(tree) == AST.IntValue:
+			return int(tree.value)
+
+		elif type(tree) == AST.Variable:
+			return known.get(self.local(tree))
+
+		elif type(tree) == AST.Expr and tree.op in arithmetic and tree.term2 != None:
+			(term1, term2) = (self.Known(tree.term1, known), self.Known(tree.term2, known))
+			if term1 != None and term2 != None and (tree.op != '/' or term2 != 0):
+				return arithmetic[tree.op](term1, term2)
+
+		return None
+
+	# Returns the optimized value of an expression, an argument or the rhs of an assignment
+	def Value(self, tree, known):
+		if type(tree) == AST.IntValue:
+			if type(tree.value) is int:
+				return tree
+			self.decoded += 1
+			return AST.IntValue(int(tree.value))
+
+		elif type(tree) == AST.Variable:
+			slot = self.local(tree)
+			if slot in known:
+				self.propagated += 1
+				return AST.IntValue(known[slot])
+			return tree
+
+		elif type(tree) == AST.FunctionCall:
+			return AST.FunctionCall(tree.name, [self.Value(param, known) for param in tree.parameterList], tree.position)
+
+		elif type(tree) == AST.Expr:
+			expr = self.Operands(tree, known)
+			(term1, term2) = (constant(expr.term1), constant(expr.term2))
+			if expr.op in arithmetic and term1 != None and term2 != None:
+				# division by zero is left to fail when it runs
+				if expr.op != '/' or term2 != 0:
+					self.folded += 1
+					return AST.IntValue(arithmetic[expr.op](term1, term2))
+			return expr
+
+		return tree
+
+	# Returns an expression with its operands optimized
+	def Operands(self, tree, known):
+		term1 = self.Value(tree.term1, known) if tree.term1 != None else None
+		term2 = self.Value(tree.term2, known) if tree.term2 != None else None
+		return AST.Expr(tree.op, term1, term2)
+
+	# Returns a line reporting what was optimized and how many nodes were removed
+	def report(self):
+		line = 'Optimized at -O {0}: {1} literals decoded, {2} expressions folded, {3} reads propagated, {4} branches and {5} functions dropped'.format(
+			self.level, self.decoded, self.folded, self.propagated, self.branches, self.functions)
+		if self.inliner != None:
+			line += ', ' + self.inliner.report()
+		if self.loops != None:
+			line += ', ' + self.loops.report()
+		if self.after > self.before:
+			return line + ', {0} nodes added to {1}'.format(self.after - self.before, self.before)
+		return line + ', {0} of {1} nodes removed'.format(self.before - self.after, self.before)
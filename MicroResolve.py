@@ -0,0 +1,90 @@
+# MicroResolve.py : Static variable resolution for the MicroScala project
+# Resolver binds every variable named in a program, before it runs, to a slot of the
+# global variables or to a slot of the frame of the function naming it. A name that
+# is a global is bound to the global, even inside a function declaring an argument or
+# local of the same name, as MicroInterp has always looked up the global first. A
+# variable neither declared as a global nor as an argument or local of its function
+# is reported with a ResolveError before the program starts.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+from ErrorMessage import ResolveError
+import AST
+
+# GLOBAL and LOCAL tell whether a variable is bound to a global slot or a frame slot
+GLOBAL, LOCAL = 0, 1
+
+# The variables of one scope, the globals or the arguments and locals of one function,
+# each with the index of its slot
+class Scope(object):
+	def __init__(self, name):
+		self.name = name
+		self.names = []
+		self.slots = {}
+
+	# Adds a variable, returning its slot
+	def add(self, name):
+		if name not in self.slots:
+			self.slots[name] = len(self.names)
+			self.names.append(name)
+		return self.slots[name]
+
+	def __len__(self):
+		return len(self.names)
+
+class Resolver(object):
+	def __init__(self, tree):
+		self.tree = tree
+		self.globals = Scope(tree.name)
+		for var in tree.decVarList:
+			self.globals.add(var.name)
+
+		# scopes maps each function of funcList, and main, to the Scope of its frame
+		self.scopes = {}
+
+		# bindings maps each AST.Variable and each declaration, an AST.DecVar, to (GLOBAL or
+		# LOCAL, slot); Nil read as an expression is bound like a variable named nil when there is one
+		self.bindings = {}
+
+		# unresolved lists (name, function) for every variable declared nowhere
+		self.unresolved = []
+
+		for var in tree.decVarList:
+			self.bindings[var] = (GLOBAL, self.globals.slots[var.name])
+
+		for func in tree.funcList:
+			self.Func(func, func.argList + func.decVarList)
+		if tree.stmt != None:
+			self.Func(tree.stmt, tree.stmt.decVarList)
+
+		if len(self.unresolved) > 0:
+			names = ', '.join('{0} in {1}'.format(name, func) for name, func in self.unresolved)
+			raise ResolveError('Undeclared variables: {0}'.format(names))
+
+	# Builds the Scope of a function from its declarations and binds the variables of its body
+	def Func(self, tree, declarations):
+		scope = Scope(tree.name)
+		for var in declarations:
+			if var.name not in self.globals.slots:
+				scope.add(var.name)
+			self.bind(var, var.name, scope, tree.name)
+		self.scopes[tree] = scope
+
+		stack = [tree.stmt] if tree.stmt != None else []
+		while len(stack) > 0:
+			node = stack.pop()
+			if type(node) == AST.Variable:
+				self.bind(node, node.name, scope, tree.name)
+			elif type(node) == AST.NilValue:
+				self.bind(node, 'nil', scope, None)
+			stack.extend(AST.children(node))
+
+	# Binds node to the variable name of the globals or of scope, recording an unresolved
+	# name for function when there is neither
+	def bind(self, node, name, scope, function):
+		if name in self.globals.slots:
+			self.bindings[node] = (GLOBAL, self.globals.slots[name])
+		elif name in scope.slots:
+			self.bindings[node] = (LOCAL, scope.slots[name])
+		elif function != None and (name, function) not in self.unresolved:
+			self.unresolved.append((name, function))
@@ -0,0 +1,173 @@
+# MicroRuntime.py : Run-time value operations shared by the MicroScala execution engines
+# The compiled engines evaluate the same operators as MicroInterp.Expr and MicroInterp.Cond.
+# The functions here reproduce those operators exactly, including the way they treat Nil,
+# integers used as lists and values of mixed types, so that every engine prints the same
+# output as the tree-walking MicroInterp.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+import re, sys, threading
+
+from ErrorMessage import TypeCheckError, EvaluationError
+from MicroList import ConsList, NIL
+
+# Returns the value of an AST.IntValue or AST.NilValue literal, as MicroInterp.Val
+def literal(tree):
+	if tree.name in ['int', 'Int']:
+		return int(tree.value)
+	else:
+		return NIL
+
+# Returns the name of the type of a value as argument type errors print it, list for a ConsList
+def type_name(value):
+	if type(value) is ConsList:
+		return 'list'
+	return type(value).__name__
+
+# Returns term1 :: term2 as MicroInterp.Expr
+def cons(term1, term2):
+	out = NIL
+
+	# Term1 is an integer
+	if type(term1) is int:
+		if type(term2) is ConsList:
+			out = term2.prepend(term1)
+		elif term2 != None:
+			out = None
+		else:
+			out = NIL.prepend(term1)
+
+	# Term1 is a list
+	elif type(term1) is ConsList:
+		out = term1
+		if type(term2) is ConsList:
+			out = term1.concat(term2)
+		elif term2 != None:
+			out = None
+
+	return out
+
+# Returns term1.head as MicroInterp.Expr
+def head(term1):
+	if type(term1) is ConsList:
+		if term1.length > 0:
+			return term1.head()
+		raise EvaluationError('Head: List is empty')
+	elif type(term1) == int:
+		return term1
+	return NIL
+
+# Returns term1.tail as MicroInterp.Expr, which also drops the last element
+def tail(term1):
+	if type(term1) is ConsList:
+		if term1.length > 0:
+			return term1.tail()
+		raise EvaluationError('Tail: List is empty')
+	elif type(term1) == int:
+		return term1
+	return NIL
+
+# Returns term1.isEmpty as MicroInterp.Expr
+def is_empty(term1):
+	return len(term1) == 0
+
+# Returns term1 / term2 rounded down, raising the error of MicroInterp.Expr for tree on a zero divisor
+def divide(term1, term2, tree):
+	if term2 != 0:
+		return term1 // term2
+	raise EvaluationError('Divide by zero error: {0}'.format(repr(tree)))
+
+# Returns term1 == term2 as a condition of MicroInterp.Cond, False for values of different types
+def equal(term1, term2):
+	if type(term1) != type(term2):
+		return False
+	if type(term1) == int:
+		return term1 == term2
+	if len(term1) != len(term2):
+		return False
+	return term1 == term2
+
+# Returns term1 != term2 as a condition of MicroInterp.Cond, True for values of different types
+def not_equal(term1, term2):
+	if type(term1) != type(term2):
+		return True
+	if type(term1) == int:
+		return term1 != term2
+	if len(term1) != len(term2):
+		return True
+	return term1 != term2
+
+# Returns the declared type of a function argument as MicroInterp.ArgCheck compares it
+def declared_type(arg):
+	return re.sub(r'\s+(\[.+)?', '', str(arg.type))
+
+# Returns the TypeCheckError of MicroInterp.ArgCheck for a value of the type named check2 passed
+# to an argument declared as check1, or None when the types agree
+def arg_type_error(name, argName, check1, check2):
+	if check1 in ['Int', 'int'] and check2 in ['int', 'Int']:
+		return None
+	if check1 in ['list', 'List'] and check2 in ['list', 'List']:
+		return None
+
+	return TypeCheckError('Data type mismatch in function {0} for {1}: Encountered {2}, Expected {3}'.format(name, argName, check1, check2))
+
+# Checks a value passed to a function against the declared type of the argument,
+# raising the TypeCheckError of MicroInterp.ArgCheck on a mismatch
+def check_arg(name, argName, check1, value):
+	error = arg_type_error(name, argName, check1, type_name(value))
+	if error != None:
+		raise error
+
+# Returns the TypeCheckError of MicroInterp.ArgCheck for a call passing count arguments to func,
+# or None when the count is right
+def arity_error(name, func, count):
+	if len(func.argList) > count:
+		return TypeCheckError('Not enough arguments passed to function {0}: Encountered {1}, Expected {2}'.format(name, len(func.argList), count))
+	if len(func.argList) < count:
+		return TypeCheckError('Too many arguments passed to function {0}: Encountered {1}, Expected {2}'.format(name, len(func.argList), count))
+	return None
+
+# Returns a dict mapping each function name of funcList to its function, the first declared
+# when there are several of the same name, for MicroInterp.ArgCheck and MicroInterp.FuncBody
+def function_table(funcList):
+	functions = {}
+	for func in funcList:
+		if func.name not in functions:
+			functions[func.name] = func
+	return functions
+
+# RECURSION_LIMIT bounds the Python frames of a running program, enough for the Python
+# recursion of thousands of nested MicroScala calls in the tree-walker and closure engines
+RECURSION_LIMIT = 200000
+
+# STACK_SIZE is the size in bytes of the stack of the thread a program runs on, large enough
+# for RECURSION_LIMIT Python frames
+STACK_SIZE = 512 * 1024 * 1024
+
+# Calls run() on a thread with a stack of STACK_SIZE under a recursion limit of RECURSION_LIMIT,
+# so that deep recursion in a program does not overflow the stack of the main thread, then puts
+# back the recursion limit and the stack size of new threads as they were, even when setting
+# them fails
+# Raises any exception raised by run()
+def run_deep(run):
+	errors = []
+	def target():
+		try:
+			run()
+		except BaseException as error:
+			errors.append(error)
+
+	limit = sys.getrecursionlimit()
+	size = threading.stack_size()
+	try:
+		threading.stack_size(STACK_SIZE)
+		sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+		thread = threading.Thread(target=target)
+		thread.start()
+		thread.join()
+	finally:
+		sys.setrecursionlimit(limit)
+		threading.stack_size(size)
+
+	if len(errors) > 0:
+		raise errors[0]
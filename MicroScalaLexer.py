@@ -11,157 +11,356 @@
 from optparse import OptionParser
 import os, logging, sys
 import math, re, collections
-from ErrorMessage import ErrorMessage
-from Token import Token
-
-# tokens is an OrderedDictionary where entry is preserved
-# -- e.g. first key, val pair input into the dictionary is
-# the first pair checked every time; similarly, last is last.
-tokens = collections.OrderedDict()
-tokens['comment']     = re.compile(r'^\/\/.*')
-tokens['semicolon']   = re.compile(r'^;')
-tokens['cons']        = re.compile(r'^::')
-tokens['colon']       = re.compile(r'^:')
-tokens['period']      = re.compile(r'^\.')
-tokens['comma']       = re.compile(r'^,')
-tokens['leftbrace']   = re.compile(r'^\{')
-tokens['rightbrace']  = re.compile(r'^\}')
-tokens['leftbracket'] = re.compile(r'^\[')
-tokens['rightbracket']= re.compile(r'^\]')
-tokens['or']    	  = re.compile(r'^\|\|')
-tokens['and']         = re.compile(r'^&&')
-tokens['relop'] 	  = re.compile(r'^(<=|<|>=|>|==|!=)')
-tokens['not']         = re.compile(r'^!')
-tokens['leftparen']   = re.compile(r'^\(')
-tokens['rightparen']  = re.compile(r'^\)')
-tokens['addop'] 	  = re.compile(r'^(\+|\-)')
-tokens['multop']      = re.compile(r'^(\*|\/)')
-tokens['assign']      = re.compile(r'^=')
-tokens['args']        = re.compile(r'^args')
-tokens['array']	      = re.compile(r'^Array')
-tokens['def']   	  = re.compile(r'^def')
-tokens['else']  	  = re.compile(r'^else')
-tokens['listop']      = re.compile(r'^(head|isEmpty|tail)')
-tokens['if']    	  = re.compile(r'^if')
-tokens['int']   	  = re.compile(r'^Int')
-tokens['list']  	  = re.compile(r'^List')
-tokens['main']  	  = re.compile(r'^main')
-tokens['nil']   	  = re.compile(r'^Nil')
-tokens['object']	  = re.compile(r'^object')
-tokens['println']     = re.compile(r'^println')
-tokens['return']	  = re.compile(r'^return')
-tokens['string']	  = re.compile(r'^String')
-tokens['var'] 	      = re.compile(r'^var')
-tokens['while'] 	  = re.compile(r'^while')
-tokens['identifier']  = re.compile(r'^[a-zA-Z](_?[a-zA-Z0-9]+)*')
-tokens['integer']     = re.compile(r'^[0-9]+')
-tokens['space']	      = re.compile(r'^[ \t\n]+')
-tokens['e']           = re.compile(r'')
+from ErrorMessage import LexError
+from Token import Token, TokenBuffer, SYMBOLS, KINDS
+from Sink import StreamSink
+from Token import EOF, UNK, EPSILON, COMMENT, IDENTIFIER, PERIOD, LISTOP
+
+# patterns holds the non-word token kinds in order of priority; they are joined into one
+# master regex of named groups so that a single match at the current offset selects the
+# token kind, the first alternative matching winning
+patterns = [
+	('comment',      r'//.*'),
+	('semicolon',    r';'),
+	('cons',         r'::'),
+	('colon',        r':'),
+	('period',       r'\.'),
+	('comma',        r','),
+	('leftbrace',    r'\{'),
+	('rightbrace',   r'\}'),
+	('leftbracket',  r'\['),
+	('rightbracket', r'\]'),
+	('or',           r'\|\|'),
+	('and',          r'&&'),
+	('relop',        r'<=|<|>=|>|==|!='),
+	('not',          r'!'),
+	('leftparen',    r'\('),
+	('rightparen',   r'\)'),
+	('addop',        r'\+|\-'),
+	('multop',       r'\*|\/'),
+	('assign',       r'='),
+	('word',         r'[a-zA-Z](?:_?[a-zA-Z0-9]+)*'),
+	('integer',      r'[0-9]+'),
+	('space',        r'[ \t]+'),
+]
+master = re.compile('|'.join('(?P<{0}>{1})'.format(k, v) for k, v in patterns))
+
+# group_kinds maps the index of each master regex group to its token kind code
+group_kinds = [None] + [KINDS.get(k) for k, v in patterns]
+WORD = master.groupindex['word']
+
+# keywords maps each reserved word to its token symbol, in the order of tokens
+keywords = collections.OrderedDict()
+keywords['args']    = 'args'
+keywords['Array']   = 'array'
+keywords['def']     = 'def'
+keywords['else']    = 'else'
+keywords['head']    = 'listop'
+keywords['isEmpty'] = 'listop'
+keywords['tail']    = 'listop'
+keywords['if']      = 'if'
+keywords['Int']     = 'int'
+keywords['List']    = 'list'
+keywords['main']    = 'main'
+keywords['Nil']     = 'nil'
+keywords['object']  = 'object'
+keywords['println'] = 'println'
+keywords['return']  = 'return'
+keywords['String']  = 'string'
+keywords['var']     = 'var'
+keywords['while']   = 'while'
+
+# list_methods maps each bulk list method to the number of arguments it takes; a method name
+# is a listop only right after a period, so that it stays free as an identifier elsewhere
+list_methods = collections.OrderedDict()
+list_methods['length']   = 0
+list_methods['sum']      = 0
+list_methods['min']      = 0
+list_methods['max']      = 0
+list_methods['reverse']  = 0
+list_methods['contains'] = 1
+list_methods['take']     = 1
+list_methods['drop']     = 1
+list_methods['zipAdd']   = 1
+list_methods['zipSub']   = 1
+list_methods['zipMul']   = 1
+
+# keyword_prefix matches a reserved word at the start of a longer word; the ordered
+# table split such words (e.g. iffy -> if, fy), so the same split is kept here
+keyword_prefix = re.compile('|'.join(re.escape(k) for k in keywords))
+whitespace = re.compile(r'\s+')
+
+# words caches the (kind code, length) classification of every word seen so far
+words = {}
+
+# classify a word matched by the master regex as a keyword, a keyword prefix, or an identifier
+def classify(word):
+	kind = words.get(word)
+	if kind is None:
+		if word in keywords:
+			kind = (KINDS[keywords[word]], len(word))
+		else:
+			m = keyword_prefix.match(word)
+			if m:
+				kind = (KINDS[keywords[m.group(0)]], len(m.group(0)))
+			else:
+				kind = (IDENTIFIER, len(word))
+		words[word] = kind
+	return kind
 
 class MicroScalaLexer(object):
-	def __init__(self, _input):
+	def __init__(self, _input=None, stream=False, text=None, echo=None, filename=None):
 		self.__position = 0
-		self.__text = []
-		self.__len = 0
-		self.__tokens = []
-		self.__line = ''
+		self.__lineno = 0
+		self.__tokens = None
+		self.__line = []
 		self.__leading_space = ''
+		self.__done = False
+		self.__stream = stream
+		self.__file = None
+		self.__filename = filename if filename != None else _input
+
+		# the source listing is written to the echo sink, line by line
+		self.__echo = echo if echo != None else StreamSink()
 
-		# parse input file into array broken up by line
-		with open(_input, 'r') as f:
-			self.__text = f.read().split('\n')
+		# the current token as a kind code and start/end offsets into its source buffer
+		self.__kind = None
+		self.__source = ''
+		self.__start = self.__end = 0
+		self.__token_line = 0
+		self.__token_first = True
+
+		# the kind of the last token other than an epsilon or a comment
+		self.__last = None
+
+		# in stream mode only the current line is held in the buffer and lines are
+		# read lazily; otherwise the whole input file (or the given text) is one
+		# buffer scanned by offset
+		if stream and text == None:
+			self.__file = open(_input, 'r')
+			self.__read_line()
+		else:
+			self.__stream = False
+			if text != None:
+				self.__buffer = text
+			else:
+				with open(_input, 'r') as f:
+					self.__buffer = f.read()
 
-		self.__len = len(self.__text)
+			self.__size = len(self.__buffer)
+			self.__offset = 0
+			self.__eol = self.__find_eol(0)
+			self.__more = self.__eol != self.__size
 
-	# print the current line and remaining text of that line
+			# tokens are kept in a compact buffer over the source
+			self.__tokens = TokenBuffer(self.__buffer)
+
+		# whitespace before the first token is skipped as after any other token
+		self.__skip_space()
+
+	# return the current line and remaining text of that line, for error messages
 	def echo(self):
-		print(self.__line, self.__text[0])
+		return '{0} {1}'.format(self.__joined_line(), self.__buffer[self.__offset:self.__eol])
 
 	# return current position of lexer as an integer
 	def position(self):
 		return int(self.__position)
 
+	# return the line number (from 0) of the current token
+	def lineno(self):
+		return self.__token_line
+
+	# return true if the current token is the first token on its line
+	def first_on_line(self):
+		return self.__token_first
+
+	# close the input file of stream mode, if still open; it is otherwise closed once its last
+	# line is read
+	def close(self):
+		if self.__file is not None:
+			self.__file.close()
+
+	# return the TokenBuffer of tokens scanned so far, or None in stream mode
+	def token_buffer(self):
+		return self.__tokens
+
 	# return a list of tokens as (symbol, lexeme), one per line
+	# tokens are not kept in stream mode, so nothing is printed there
 	def token_list(self):
-		for token in self.__tokens:
-			print(repr(token))
+		if self.__tokens is not None:
+			for token in self.__tokens:
+				print(repr(token))
 
 	# return true if more tokens remain, false if input file is fully parsed
 	def tokens_remain(self):
-		if self.__len != 0:
-			return True
+		return not self.__done
+
+	# return the lexeme of the current token, sliced from its source buffer
+	def lexeme(self):
+		return self.__source[self.__start:self.__end]
+
+	# generate kind codes lazily until end-of-file, skipping epsilon and comment tokens
+	# the EOF kind is repeated once the input is exhausted
+	def kinds(self):
+		kind = self.scan()
+		while kind != EOF:
+			if kind != EPSILON and kind != COMMENT:
+				yield kind
+			kind = self.scan()
+
+		while True:
+			yield kind
+
+	# generate Token objects lazily until end-of-file, skipping epsilon and comment tokens
+	# the EOF token is repeated once the input is exhausted
+	def generate(self):
+		token = self.nextToken()
+		while token.symbol() != 'EOF':
+			if token.symbol() != 'e' and token.symbol() != 'comment':
+				yield token
+			token = self.nextToken()
+
+		while True:
+			yield token
+
+	# return the offset of the end of the line starting at offset
+	def __find_eol(self, offset):
+		eol = self.__buffer.find('\n', offset)
+		if eol < 0:
+			eol = self.__size
+		return eol
+
+	# read the next line of the input file into the buffer (stream mode)
+	def __read_line(self):
+		line = self.__file.readline()
+
+		# a line ending in a newline is always followed by another, possibly empty, line
+		self.__more = line.endswith('\n')
+		if self.__more:
+			line = line[:-1]
+		else:
+			self.__file.close()
+
+		self.__buffer = line
+		self.__offset = 0
+		self.__eol = len(line)
+
+	# move past the end of the current line
+	def __next_line(self):
+		self.__lineno += 1
+		if self.__stream:
+			self.__read_line()
 		else:
-			return False
+			self.__offset = self.__eol + 1
+			self.__eol = self.__find_eol(self.__offset)
+			self.__more = self.__eol != self.__size
+
+	# return the lexemes of the current line as they are echoed
+	def __joined_line(self):
+		buf = self.__buffer
+		return ''.join(' ' + buf[start:end] for start, end in self.__line)
+
+	# skip whitespace at the current offset, remembering it for pretty printing
+	def __skip_space(self):
+		m = whitespace.match(self.__buffer, self.__offset, self.__eol)
+		if m:
+			self.__leading_space = m.group(0)
+			self.__offset = m.end()
+		else:
+			self.__leading_space = ''
 
 	# bookkeeping of the line to allow pretty printing
-	def __update_line(self, string):
-		self.__position += len(string)
-		self.__line += ' ' + string
+	def __update_line(self, start, end):
+		self.__position += end - start
+		self.__line.append((start, end))
+		self.__offset = offset = end
+
+		eol = self.__eol
 
-		# remove the leading captured lexeme from current input line
-		self.__text[0] = re.sub('^{0}'.format(re.escape(string)), '', self.__text[0])
-		
 		# if current line has no more tokens to parse
-		if (self.__text[0] == '') or (self.__text[0] == '\n') or (self.__text[0] == ' '):
-			# remove the line from remaining text array
-			self.__text.pop(0)
+		if offset == eol or (offset + 1 == eol and self.__buffer[offset] == ' '):
+			# echo the fully parsed input line
+			if self.__echo.enabled:
+				self.__echo.write('{0}{1}'.format(self.__leading_space, self.__joined_line()))
 
-			# reset the lexer line position
+			# reset the lexer line position and the text holder
 			self.__position = 0
+			self.__line = []
+			self.__leading_space = ''
 
-			# print the fully parsed input line
-			print('{0}{1}'.format(self.__leading_space, self.__line))
+			# move to the next line, if any
+			if not self.__more:
+				self.__done = True
+				return
 
-			# reset the text holder
-			self.__line = ''
+			self.__next_line()
 
-			# update the line length
-			self.__len = len(self.__text)
+		self.__skip_space()
 
-		tmp = None
-		# if the length is not zero
-		if self.__len > 0:
-			# match the leading spaces
-			tmp = re.match(r'^\s+', self.__text[0])
+	# scan the next token and return its kind code
+	# the lexeme of the scanned token is available through lexeme()
+	def scan(self):
+		# if input remains
+		if not self.__done:
+			start = end = self.__offset
 
-			# before stripping them from the text line
-			self.__text[0] = self.__text[0].lstrip()
+			# an empty remainder of a line is an epsilon token
+			if start == self.__eol:
+				kind = EPSILON
+			else:
+				m = master.match(self.__buffer, start, self.__eol)
 
-		# if leading spaces exist
-		if tmp != None:
-			# capture them
-			self.__leading_space = tmp.group(0)
+				# a character that starts no token is a lexical error
+				if m is None:
+					self.__kind = UNK
+					self.__source = ''
+					self.__start = self.__end = 0
+					self.close()
+					raise LexError('unknown symbol {0}'.format(self.__buffer[start]), self.position(), self.echo(), self.__lineno, self.__filename)
+
+				kind = group_kinds[m.lastindex]
+				end = m.end()
+
+				# look words up in the keyword table; a list method follows a period
+				if m.lastindex == WORD:
+					word = m.group(0)
+					if self.__last == PERIOD and word in list_methods:
+						kind = LISTOP
+					else:
+						kind, length = classify(word)
+						end = start + length
+
+			self.__kind = kind
+			self.__source = self.__buffer
+			self.__start = start
+			self.__end = end
+			self.__token_line = self.__lineno
+			self.__token_first = not self.__line
+
+			# if the key is not epsilon and tokens are being kept
+			if kind != EPSILON and self.__tokens is not None:
+				self.__tokens.append(kind, start, end)
+
+			if kind != EPSILON and kind != COMMENT:
+				self.__last = kind
+
+			# update line with captured lexeme
+			self.__update_line(start, end)
+
+			return kind
+
+		# an EOF token when end-of-file has been reached
 		else:
-			self.__leading_space = ''
-				
-	# get the next token
+			self.__kind = EOF
+			self.__source = 'EOF'
+			self.__start = 0
+			self.__end = 3
+			return EOF
+
+	# get the next token as a Token object
 	def nextToken(self):
-		# if length is non-zero of current line
-		if self.__len > 0:
-			# iterate through OrderedDict of tokens (where order is preserved)
-			for k, v in tokens.items():
-				# if the regex value matches the beginning of the line
-				if v.match(self.__text[0]):
-					# capture it into string
-					string = v.match(self.__text[0]).group(0)
-
-					# if the key is not epsilon
-					if k != 'e':
-						# append a new token pair (symbol = k, lexeme = string)
-						self.__tokens.append(Token(symbol=k, lexeme=string))
-
-					# update line with captured lexeme
-					self.__update_line(string)
-
-					# return the token captured
-					return Token(symbol=k, lexeme=string)
-
-			# return an unknown token if not in token dictionary
-			return Token(symbol='UNK', lexeme=None)
-
-		# return an EOF token when end-of-file has been reached
-		else:
-			return Token(symbol='EOF', lexeme='EOF')
+		kind = self.scan()
+		return Token(symbol=SYMBOLS[kind], lexeme=self.lexeme())
 
 # Runs the program when called by itself from command-line
 def main(file):
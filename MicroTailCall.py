@@ -0,0 +1,73 @@
+# MicroTailCall.py : Tail-call analysis for the MicroScala project
+# A function body always ends with return expr, and the value of that closing return is
+# the value of the call. When it returns a variable v, an assignment v = f(...) calling
+# the function f itself is a tail call if nothing but the closing return runs after it:
+# it is the last statement before the return, or the last statement of a block or of a
+# branch of an if that is. v = x :: f(...) is a tail call modulo cons, whose value is the
+# value of the inner call with x put in front. TailCalls finds every such call so that
+# MicroInterp can run the calls of a function one after another in a loop, keeping only
+# what each call still has to do once the next returns, instead of nesting them.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from MicroResolve import Resolver
+from MicroRuntime import function_table
+import AST
+
+class TailCalls(object):
+	def __init__(self, tree, resolver=None):
+		self.resolver = resolver if resolver != None else Resolver(tree)
+		self.functions = function_table(tree.funcList)
+
+		# sites maps each assignment making a tail call to True when the call is the right
+		# operand of ::, False when its value is stored as it is
+		self.sites = {}
+
+		# loops holds every function making a tail call of itself
+		self.loops = set()
+
+		for func in self.functions.values():
+			self.Func(func)
+
+	# Finds the tail calls of a function returning a variable
+	def Func(self, tree):
+		if type(tree.stmt) != AST.Block or len(tree.stmt.stmts) < 2:
+			return
+
+		closing = tree.stmt.stmts[-1]
+		if type(closing) != AST.Return or type(closing.expr) != AST.Variable:
+			return
+
+		binding = self.resolver.bindings.get(closing.expr)
+		if binding != None:
+			self.Tail(tree.stmt.stmts[-2], tree, binding)
+
+	# Finds the tail calls of func in a statement that runs last before its closing return,
+	# which returns the variable bound to binding
+	def Tail(self, tree, func, binding):
+		if type(tree) == AST.Block:
+			if len(tree.stmts) > 0:
+				self.Tail(tree.stmts[-1], func, binding)
+
+		elif type(tree) == AST.If:
+			self.Tail(tree.term1, func, binding)
+			if tree.name == 'if-else':
+				self.Tail(tree.term2, func, binding)
+
+		elif type(tree) == AST.Assignment and tree.name == 'assign' and type(tree.lhs) == AST.Variable:
+			if self.resolver.bindings.get(tree.lhs) != binding:
+				return
+
+			rhs = tree.rhs
+			if self.calls(rhs, func):
+				self.sites[tree] = False
+				self.loops.add(func)
+			elif type(rhs) == AST.Expr and rhs.op == '::' and self.calls(rhs.term2, func):
+				self.sites[tree] = True
+				self.loops.add(func)
+
+	# Returns True when tree is a call of func
+	def calls(self, tree, func):
+		return type(tree) == AST.FunctionCall and self.functions.get(tree.name) is func
@@ -0,0 +1,459 @@
+# MicroTranspile.py : Translation of MicroScala programs to Python for the MicroScala project
+# Transpiler turns an AST.Program into the source of a Python module: every MicroScala
+# function becomes a Python function, main becomes _main, while and if become Python
+# while and if, and variables become Python variables, the globals of the program
+# module globals and the locals of a function locals of its Python function. The
+# module is compiled with compile() and run by CPython itself, printing the same
+# output as the tree-walking MicroInterp. A variable holding None has no value yet;
+# no MicroScala variable is ever given None.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from optparse import OptionParser
+import sys
+
+from MicroTree import MicroTree
+from ErrorMessage import ErrorMessage, EvaluationError
+from Sink import StreamSink, NullSink
+import MicroRuntime
+from MicroRuntime import literal, arity_error, function_table, declared_type, check_arg
+from MicroTypeCheck import TypeChecker
+from MicroList import ConsList, NIL
+from MicroIntrinsics import methods as list_methods
+
+# Returns the Python source of the value of an Int or Nil literal, _nil for the empty list
+def constant(tree):
+	value = literal(tree)
+	if type(value) is ConsList:
+		return '_nil'
+	return repr(value)
+
+# Returns value once it is checked against the declared type check1 of an argument
+def checked(name, argName, check1, value):
+	check_arg(name, argName, check1, value)
+	return value
+
+# Returns a and b once both are evaluated, as && in MicroInterp.Expr and MicroInterp.Cond
+def both(a, b):
+	return a and b
+
+# Returns a or b once both are evaluated, as || in MicroInterp.Expr and MicroInterp.Cond
+def either(a, b):
+	return a or b
+
+# Returns a / b rounded down, raising EvaluationError(message) on a zero divisor
+def divide(a, b, message):
+	if b != 0:
+		return a // b
+	raise EvaluationError(message)
+
+# Returns the first of two values, for a unary operator given a second operand
+def first(a, b):
+	return a
+
+class Transpiler(object):
+	def __init__(self, tree, types=None):
+		self.tree = tree
+
+		# the parameters of calls whose types the TypeChecker proved, which are not checked again
+		self.proven = (types if types != None else TypeChecker(tree)).proven
+		self.globalNames = set(var.name for var in tree.decVarList)
+
+		# table maps each function name to the function a call runs
+		self.table = function_table(tree.funcList)
+
+		# errors holds the errors raised by the generated code for malformed nodes
+		self.errors = []
+
+		# the locals of the function being translated, and whether its globals are written
+		self.locals = None
+
+		self.lines = []
+		self.Prog(tree)
+
+	# Returns the generated Python source
+	def source(self):
+		return '\n'.join(self.lines) + '\n'
+
+	# Returns the Python name of the variable name
+	def var(self, name):
+		if name not in self.globalNames:
+			self.locals.add(name)
+		return 'v_' + name
+
+	# Returns an expression raising error, after evaluating the expressions of operands
+	def fail(self, error, operands=()):
+		self.errors.append(error)
+		return '_raise({0})'.format(', '.join([str(len(self.errors) - 1)] + list(operands)))
+
+	# Returns an expression raising the error of an operator MicroInterp does not support,
+	# after evaluating its operands as MicroInterp does
+	def Unsupported(self, tree):
+		operands = []
+		if tree.term1 != None:
+			operands.append(self.Term(tree.term1, 'LHS'))
+		if tree.term2 != None:
+			operands.append(self.Term(tree.term2, 'RHS'))
+		return self.fail(EvaluationError('Operand not supported: {0}'.format(repr(tree.op))), operands)
+
+	# Translates AST.Program tree object into the functions of the module and _program,
+	# which declares the globals and runs main
+	def Prog(self, tree):
+		for func in self.table.values():
+			self.Func(func)
+
+		if tree.stmt == None:
+			body = [self.fail(EvaluationError('empty file'))]
+		else:
+			self.Main(tree.stmt)
+			body = ['v_{0} = {1}'.format(var.name, constant(var.value)) for var in tree.decVarList]
+			body.append('_main()')
+
+		self.function('_program', [], body, set())
+
+	# Translates AST.Program tree object of main into _main
+	def Main(self, tree):
+		self.locals = set()
+
+		if tree.stmt == None:
+			body = [self.fail(EvaluationError(repr(tree)))]
+		else:
+			body = [self.InitVar(var) for var in tree.decVarList]
+			body.extend(self.Stmt(tree.stmt))
+
+		self.function('_main', [], body, self.locals)
+
+	# Translates a function of funcList, returning the value of its closing return statement
+	# The arguments arrive as evaluated by the caller, and a value update_env would not store
+	# leaves its argument without a value
+	def Func(self, tree):
+		self.locals = set()
+		args = []
+		body = []
+		for arg in tree.argList:
+			if arg.name in self.globalNames:
+				args.append('a_' + arg.name)
+			else:
+				name = self.var(arg.name)
+				args.append(name)
+				body.append('if {0}.__class__ is not int and {0}.__class__ is not _list: {0} = None'.format(name))
+
+		body.extend(self.InitVar(var) for var in tree.decVarList)
+
+		stmts = tree.stmt.stmts if hasattr(tree.stmt, 'stmts') else [tree.stmt]
+		for stmt in stmts[:-1]:
+			body.extend(self.Stmt(stmt))
+
+		if len(stmts) > 0 and hasattr(stmts[-1], 'name') and stmts[-1].name == 'return':
+			body.append('return ' + self.Expr(stmts[-1].expr))
+		elif len(stmts) > 0:
+			body.extend(self.Stmt(stmts[-1]))
+
+		self.function('f_' + tree.name, args, body, self.locals - set(arg.name for arg in tree.argList))
+
+	# Appends a Python function with the given body, declaring the globals and giving
+	# every local no value to start with
+	def function(self, name, args, body, locals):
+		self.lines.append('def {0}({1}):'.format(name, ', '.join(args)))
+		if len(self.globalNames) > 0:
+			self.lines.append('\tglobal ' + ', '.join('v_' + name for name in sorted(self.globalNames)))
+		for local in sorted(locals):
+			self.lines.append('\tv_{0} = None'.format(local))
+		for line in body:
+			self.lines.append('\t' + line)
+		if len(body) == 0:
+			self.lines.append('\tpass')
+		self.lines.append('')
+
+	# Translates the declaration of a variable, initialized as MicroInterp.InitVar
+	def InitVar(self, tree):
+		return '{0} = {1}'.format(self.var(tree.name), constant(tree.value))
+
+	# Returns the lines storing the value of expr into the variable name, unless it is a value
+	# update_env would look up as a name; certain tells that expr is always an integer or a list
+	def Store(self, name, expr, certain=False):
+		if certain:
+			return ['{0} = {1}'.format(self.var(name), expr)]
+		return ['_t = ' + expr,
+			'if _t.__class__ is int or _t.__class__ is _list: {0} = _t'.format(self.var(name))]
+
+	# Translates a read of a variable or literal as MicroInterp.access_env
+	def Access(self, tree):
+		if tree.name == 'int':
+			return constant(tree)
+		return self.var(tree.name)
+
+	# Returns the lines of a statement tree object
+	def Stmt(self, tree):
+		# Block of statements, run in order
+		if hasattr(tree, 'stmts'):
+			lines = []
+			for stmt in tree.stmts:
+				lines.extend(self.Stmt(stmt))
+			return lines
+
+		# Variable assignment
+		elif hasattr(tree, 'lhs'):
+			if tree.lhs != None and tree.rhs != None:
+				return self.Var(tree)
+			return [self.fail(EvaluationError('Broken assignment {0}'.format(repr(tree))))]
+
+		# While-loop
+		elif hasattr(tree, 'cond') and tree.name == 'while':
+			if tree.cond != None and tree.statement != None:
+				return ['while ' + self.Test(tree.cond) + ':'] + self.Indent(self.Stmt(tree.statement))
+			return [self.fail(EvaluationError('Broken while-loop {0}'.format(repr(tree))))]
+
+		# If-statement
+		elif hasattr(tree, 'cond') and tree.name == 'if':
+			if tree.cond != None and tree.term1 != None:
+				return ['if ' + self.Test(tree.cond) + ':'] + self.Indent(self.Stmt(tree.term1))
+			return [self.fail(EvaluationError('Broken if statement {0}'.format(repr(tree))))]
+
+		# If-Else-statement
+		elif hasattr(tree, 'cond') and tree.name == 'if-else':
+			if tree.cond != None and tree.term1 != None and tree.term2 != None:
+				lines = ['if ' + self.Test(tree.cond) + ':'] + self.Indent(self.Stmt(tree.term1))
+				return lines + ['else:'] + self.Indent(self.Stmt(tree.term2))
+			return [self.fail(EvaluationError('Broken if-else statement {0}'.format(repr(tree))))]
+
+		elif hasattr(tree, 'cond'):
+			return []
+
+		# Expression evaluation
+		elif hasattr(tree, 'op'):
+			return [self.Expr(tree)]
+
+		# Println
+		elif hasattr(tree, 'name') and tree.name == 'println':
+			return ['_write({0})'.format(self.Param(tree.expr))]
+
+		# Return, which does not end the function
+		elif hasattr(tree, 'name') and tree.name == 'return':
+			return [self.Expr(tree.expr)]
+
+		elif hasattr(tree, 'name'):
+			return []
+
+		return [self.fail(EvaluationError(repr(tree)))]
+
+	# Returns lines indented one level, with pass for an empty block
+	def Indent(self, lines):
+		if len(lines) == 0:
+			return ['\tpass']
+		return ['\t' + line for line in lines]
+
+	# Returns the test of a while or if statement on a condition, true only when it is True
+	def Test(self, tree):
+		cond = self.Cond(tree)
+		if hasattr(tree, 'op') and tree.op in ['>=', '>', '<=', '<', '==', '!=', '!']:
+			return cond
+		return '({0}) is True'.format(cond)
+
+	# Returns the lines of AST.Assignment tree object
+	def Var(self, tree):
+		if not hasattr(tree.lhs, 'name'):
+			return [self.fail(EvaluationError('LHS not a variable: {0}'.format(repr(tree.lhs))))]
+
+		name = tree.lhs.name
+
+		# rhs is a value
+		if hasattr(tree.rhs, 'value'):
+			return ['{0} = {1}'.format(self.var(name), constant(tree.rhs))]
+
+		# rhs is a variable, copied from the global before the local, and nothing stored without one
+		elif hasattr(tree.rhs, 'name') and not hasattr(tree.rhs, 'parameterList'):
+			source = self.var(tree.rhs.name)
+			if tree.rhs.name in self.globalNames:
+				return ['{0} = {1}'.format(self.var(name), source)]
+			return ['if {0} is not None: {1} = {0}'.format(source, self.var(name))]
+
+		# rhs is an expression, an integer or a list whenever it is arithmetic
+		elif hasattr(tree.rhs, 'op'):
+			certain = tree.rhs.op in ['+', '-', '*', '/', 'tail']
+			return self.Store(name, self.Expr(tree.rhs), certain)
+
+		# rhs is a function
+		elif hasattr(tree.rhs, 'name'):
+			return self.Store(name, self.FuncHead(tree.rhs))
+
+		# rhs is empty
+		return []
+
+	# Returns the expression of AST.FunctionCall tree object
+	# Each argument is evaluated once, checked against the function declaration unless its type
+	# was proven, and passed to the Python function as MicroInterp.FuncBody
+	def FuncHead(self, tree):
+		name = tree.name
+		called = self.table.get(name)
+		if called == None:
+			return self.fail(EvaluationError('Function not found: {0}'.format(name)))
+
+		error = arity_error(name, called, len(tree.parameterList))
+		if error != None:
+			return self.fail(error)
+
+		# an argument named as a global is bound to the global before the next is evaluated
+		params = []
+		for (param, arg) in zip(tree.parameterList, called.argList):
+			value = self.Param(param)
+			if param not in self.proven:
+				value = '_checked({0!r}, {1!r}, {2!r}, {3})'.format(name, arg.name, declared_type(arg), value)
+			if arg.name in self.globalNames:
+				value = '_bind({0!r}, {1})'.format('v_' + arg.name, value)
+			params.append(value)
+		params.extend('None' for arg in called.argList[len(params):])
+
+		return 'f_{0}({1})'.format(called.name, ', '.join(params))
+
+	# Returns a parameter passed to a function or println, a function call or an expression
+	def Param(self, tree):
+		if hasattr(tree, 'parameterList'):
+			return self.FuncHead(tree)
+		return self.Expr(tree)
+
+	# Returns an operand of an expression or condition
+	def Term(self, tree, side):
+		# a variable with a stored value
+		if hasattr(tree, 'name') and not hasattr(tree, 'parameterList'):
+			return self.Access(tree)
+
+		# a functionCall
+		elif hasattr(tree, 'name') and hasattr(tree, 'parameterList'):
+			return self.FuncHead(tree)
+
+		# an expression
+		elif hasattr(tree, 'op'):
+			return self.Expr(tree)
+
+		# malformed
+		return self.fail(EvaluationError('{0} is malformed: {1}'.format(side, repr(tree))))
+
+	# Returns the expression of AST.Expr tree object which is a conditional statement,
+	# with the value of MicroInterp.Cond
+	def Cond(self, tree):
+		if not hasattr(tree, 'term1'):
+			return self.fail(EvaluationError('LHS is malformed: {0}'.format(repr(tree))))
+
+		op = tree.op
+		if op == '!':
+			term1 = self.Term(tree.term1, 'LHS')
+			if tree.term2 != None:
+				return '(not _first({0}, {1}))'.format(term1, self.Term(tree.term2, 'RHS'))
+			return '(not {0})'.format(term1)
+
+		if tree.term2 == None or op not in ['>=', '>', '<=', '<', '==', '!=', '&&', '||']:
+			return self.Unsupported(tree)
+
+		term1 = self.Term(tree.term1, 'LHS')
+		term2 = self.Term(tree.term2, 'RHS')
+		if op == '==':
+			return '_equal({0}, {1})'.format(term1, term2)
+		elif op == '!=':
+			return '_not_equal({0}, {1})'.format(term1, term2)
+		elif op == '&&':
+			return '_both({0}, {1})'.format(term1, term2)
+		elif op == '||':
+			return '_either({0}, {1})'.format(term1, term2)
+		return '({0} {1} {2})'.format(term1, op, term2)
+
+	# Returns the expression of AST.Expr tree object which is a non-conditional statement,
+	# with the value of MicroInterp.Expr
+	def Expr(self, tree):
+		# Expression contains only a single variable, or the name of a function read as one
+		if not hasattr(tree, 'term1'):
+			if hasattr(tree, 'name'):
+				return self.Access(tree)
+			return self.fail(EvaluationError('Expression not supported: {0}'.format(repr(tree))))
+
+		op = tree.op
+		unary = {'head': '_head', 'tail': '_tail', 'isEmpty': '_is_empty', '!': 'not '}
+		if op not in ['+', '-', '*', '/', '::', '==', '&&', '||'] and op not in unary and op not in list_methods:
+			return self.Unsupported(tree)
+
+		term1 = self.Term(tree.term1, 'LHS') if tree.term1 != None else '_nil'
+
+		# unary operators evaluate a second operand only for its side effects
+		if op in unary:
+			if tree.term2 != None:
+				term1 = '_first({0}, {1})'.format(term1, self.Term(tree.term2, 'RHS'))
+			if op == '!':
+				return '(not {0})'.format(term1)
+			return '{0}({1})'.format(unary[op], term1)
+
+		term2 = self.Term(tree.term2, 'RHS') if tree.term2 != None else '_nil'
+		if op == '/':
+			return '_divide({0}, {1}, {2!r})'.format(term1, term2, 'Divide by zero error: {0}'.format(repr(tree)))
+		elif op == '::':
+			return '_cons({0}, {1})'.format(term1, term2)
+		elif op in list_methods:
+			return '_method_{0}({1}, {2})'.format(op, term1, term2)
+		elif op == '&&':
+			return '_both({0}, {1})'.format(term1, term2)
+		elif op == '||':
+			return '_either({0}, {1})'.format(term1, term2)
+		return '({0} {1} {2})'.format(term1, op, term2)
+
+class MicroTranspile(object):
+	def __init__(self, tree, output=None, types=None):
+		self.output = output if output != None else StreamSink()
+		self.transpiler = Transpiler(tree, types)
+		self.source = self.transpiler.source()
+
+		self.namespace = {
+			'_write': self.output.write,
+			'_raise': self.fail,
+			'_bind': self.bind,
+			'_checked': checked,
+			'_nil': NIL,
+			'_list': ConsList,
+			'_cons': MicroRuntime.cons,
+			'_head': MicroRuntime.head,
+			'_tail': MicroRuntime.tail,
+			'_is_empty': MicroRuntime.is_empty,
+			'_equal': MicroRuntime.equal,
+			'_not_equal': MicroRuntime.not_equal,
+			'_divide': divide,
+			'_both': both,
+			'_either': either,
+			'_first': first,
+		}
+		self.namespace.update(('_method_' + name, function) for name, function in list_methods.items())
+		exec(compile(self.source, '<{0}>'.format(tree.name), 'exec'), self.namespace)
+
+	# Raises the error of a malformed node, once the operands passed with it are evaluated
+	def fail(self, index, *operands):
+		raise self.transpiler.errors[index]
+
+	# Stores a value passed for an argument named as a global into the global
+	def bind(self, name, value):
+		if type(value) is int or type(value) is ConsList:
+			self.namespace[name] = value
+
+	# Runs the program
+	def run(self):
+		self.namespace['_program']()
+
+# Prints the Python source generated for a file
+def main(file):
+	try:
+		tree = MicroTree(_input=file, echo=NullSink()).tree
+		sys.stdout.write(Transpiler(tree).source())
+	except ErrorMessage as error:
+		if error.filename == None:
+			error.filename = file
+		error.report()
+		sys.exit(1)
+
+if __name__ == '__main__':
+	usage = "usage: %prog SCALA_FILE"
+	parser = OptionParser(usage=usage)
+
+	(options, args) = parser.parse_args()
+
+	if len(args) != 1:
+		parser.error("Please provide required arguments: Location of scala file")
+
+	main(file=args[0])
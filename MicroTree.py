@@ -12,33 +12,64 @@
 
 from optparse import OptionParser
 import os, logging, sys
-import math, copy
-from MicroScalaLexer import MicroScalaLexer
-from ErrorMessage import ErrorMessage
-from Token import Token, UNDEFINED
+import math
+from MicroScalaLexer import MicroScalaLexer, list_methods
+from ErrorMessage import ParseError
+from Token import UNDEFINED, SYMBOLS
+from Token import ADDOP, AND, ARGS, ARRAY, ASSIGN, COLON, COMMA, CONS, DEF, ELSE, EOF
+from Token import IDENTIFIER, IF, INT, INTEGER, LEFTBRACE, LEFTBRACKET, LEFTPAREN, LIST, LISTOP
+from Token import MAIN, MULTOP, NIL, NOT, OBJECT, OR, PERIOD, PRINTLN, RELOP, RETURN
+from Token import RIGHTBRACE, RIGHTBRACKET, RIGHTPAREN, SEMICOLON, STRING, VAR, WHILE
 import AST
 
+# Statement sequences are flat AST.Block lists, but every MicroScala function call
+# still nests several Python frames in MicroInterp
 sys.setrecursionlimit(10000)
 
-class MicroTree(object):
-	def __init__(self, _input):
-		self.token = Token(symbol='start', lexeme='start')
-		self.lexer = MicroScalaLexer(_input=_input)
+# Precedence levels of the binary operators, loosest first, for precedence climbing
+OR_LEVEL, AND_LEVEL, CONS_LEVEL, ADD_LEVEL, MUL_LEVEL = 1, 2, 4, 5, 6
 
-		self.getToken()
-		self.tree = self.program()
+# precedence maps each kind code to the level of the binary operator it is in listExpr,
+# or 0 for kinds that end a listExpr
+precedence = [0] * len(SYMBOLS)
+precedence[CONS] = CONS_LEVEL
+precedence[ADDOP] = ADD_LEVEL
+precedence[MULTOP] = MUL_LEVEL
+
+class MicroTree(object):
+	def __init__(self, _input=None, stream=False, text=None, echo=None, filename=None):
+		self.kind = None
+		self.definitions = []
+		self.close = None
+		self.filename = filename if filename != None else _input
+		self.lexer = MicroScalaLexer(_input=_input, stream=stream, text=text, echo=echo, filename=self.filename)
+		self.kinds = self.lexer.kinds()
+
+		# in stream mode the lexer holds the input file open until its last line is read, so
+		# it is closed here when an error stops the parse before then
+		try:
+			self.getToken()
+			self.tree = self.program()
+		finally:
+			self.lexer.close()
 
 	# getToken() : input: None, output: None
-	# Obtains the next token from the lexer
+	# Obtains the kind code of the next token from the lexer, which skips epsilon and comment tokens
 	def getToken(self):
-		self.token = self.lexer.nextToken()
+		self.kind = next(self.kinds)
 
-		# Skips epsilon and comment tokens
-		while(self.token.symbol() == 'e' or self.token.symbol() == 'comment'):
+	# error() : input: str() what was expected, output: instance of ErrorMessage.ParseError()
+	# Builds the error for the current token, to be raised by the caller
+	def error(self, expected):
+		return ParseError('{0} expected'.format(expected), self.lexer.position(), self.lexer.echo(), self.lexer.lineno(), self.filename)
 
-			self.token = self.lexer.nextToken()
+	# lexeme() : input: None, output: str() lexeme of the current token
+	def lexeme(self):
+		return self.lexer.lexeme()
 
 	# program() : input: None, output: instance of AST.Program()
+	# Each top-level definition is also recorded in self.definitions as (line, first-on-line, node),
+	# and the closing brace in self.close as (line, first-on-line), for MicroIncremental
 	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
 	# EOF was added to represent the end-of-file -- returned by lexer when input file is fully parsed
 	# compilationUnit ::= object id _{ {def} mainDef _} EOF
@@ -51,30 +82,34 @@ class MicroTree(object):
 		name = ''
 
 		# object
-		if self.token.symbol() != 'object':
-			ErrorMessage('{0} expected'.format('object'), self.lexer.position(), self.lexer.echo())
+		if self.kind != OBJECT:
+			raise self.error('object')
 		
 		self.getToken()
 		
 		# identifier
-		if self.token.symbol() != 'identifier':
-			ErrorMessage('{0} expected'.format('id'), self.lexer.position(), self.lexer.echo())
+		if self.kind != IDENTIFIER:
+			raise self.error('id')
 
 		# store identifer in name
-		name = self.token.lexeme()
+		name = self.lexeme()
 		self.getToken()
 		
 		# _{
-		if self.token.symbol() != 'leftbrace':
-			ErrorMessage('{0} expected'.format('{'), self.lexer.position(), self.lexer.echo())
+		if self.kind != LEFTBRACE:
+			raise self.error('{')
 		
 		self.getToken()
 		
 		# {def}
 		# Cycles through optional function and global variable declarations until 'def main' is reached
 		while symbol != 'main':
+			# line and first-on-line flag where the definition starts
+			start = (self.lexer.lineno(), self.lexer.first_on_line())
 			symbol, function = self.functionDef(name = name)
 			if symbol != 'main' and function != None:
+				self.definitions.append(start + (function,))
+
 				# Check type of function
 				if function.name != name and type(function) != type(AST.DecVar(name='',typ='',value='')):
 					# function is a function AST.Program()
@@ -85,19 +120,21 @@ class MicroTree(object):
 
 		# mainDef
 		main = self.mainDef(symbol)
+		self.definitions.append(start + (main,))
 
 		# _}
-		if self.token.symbol() != 'rightbrace':
-			ErrorMessage('{0} expected'.format('}'), self.lexer.position(), self.lexer.echo())
+		if self.kind != RIGHTBRACE:
+			raise self.error('}')
 		
+		self.close = (self.lexer.lineno(), self.lexer.first_on_line())
 		self.getToken()
 
 		# EOF
-		if self.token.symbol() != 'EOF':
-			ErrorMessage('{0} expected'.format('EOF'), self.lexer.position(), self.lexer.echo())			
+		if self.kind != EOF:
+			raise self.error('EOF')			
 		
 		# Create new instance of class AST.Program()
-		prgm = AST.Program(name = name, stmt = copy.deepcopy(main), argList = copy.deepcopy(argList), funcList = copy.deepcopy(funcList), decVarList = copy.deepcopy(decVarList))
+		prgm = AST.Program(name = name, stmt = main, argList = argList, funcList = funcList, decVarList = decVarList)
 		
 		return prgm
 
@@ -106,105 +143,104 @@ class MicroTree(object):
 	# mainDef ::= def main ( args : Array _[ String _] ) _{ {varDef} statement {statement} _}
 	def mainDef(self, symbol):
 		prgm = None
-		stmt1 = stmt2 = None
+		stmts = []
 		argList = []
 		decVarList = []
 		arg = ''
 		typ = ''
 
 		# def
-		if self.token.symbol() == 'def':
+		if self.kind == DEF:
 			self.getToken()
 
 		# main
 		# Rejects identifier that is not main and raises error
-		if self.token.symbol() != 'main' and symbol != 'main':
-			ErrorMessage('{0} expected'.format('main'), self.lexer.position(), self.lexer.echo())
+		if self.kind != MAIN and symbol != 'main':
+			raise self.error('main')
 		
 		self.getToken()
 		
 		# (
-		if self.token.symbol() == 'leftparen':
+		if self.kind == LEFTPAREN:
 			self.getToken()
 
 			# args
-			if self.token.symbol() != 'args':
-				ErrorMessage('{0} expected'.format('Args'), self.lexer.position(), self.lexer.echo())
+			if self.kind != ARGS:
+				raise self.error('Args')
 			
 			# store args lexeme in args
-			arg = self.token.lexeme()
+			arg = self.lexeme()
 			self.getToken()
 			
 			# :
-			if self.token.symbol() != 'colon':
-				ErrorMessage('{0} expected'.format(':'), self.lexer.position(), self.lexer.echo())
+			if self.kind != COLON:
+				raise self.error(':')
 			
 			self.getToken()
 			
 			# Array
-			if self.token.symbol() != 'array':
-				ErrorMessage('{0} expected'.format('Array'), self.lexer.position(), self.lexer.echo())
+			if self.kind != ARRAY:
+				raise self.error('Array')
 			
 			# store type of args in typ
-			typ = self.token.lexeme()
+			typ = self.lexeme()
 			self.getToken()
 			
 			# [
-			if self.token.symbol() != 'leftbracket':
-				ErrorMessage('{0} expected'.format('['), self.lexer.position(), self.lexer.echo())
+			if self.kind != LEFTBRACKET:
+				raise self.error('[')
 			
-			typ += ' ' + self.token.lexeme()
+			typ += ' ' + self.lexeme()
 			self.getToken()
 			
 			# String
-			if self.token.symbol() != 'string':
-				ErrorMessage('{0} expected'.format('String'), self.lexer.position(), self.lexer.echo())
+			if self.kind != STRING:
+				raise self.error('String')
 			
-			typ += ' ' + self.token.lexeme()
+			typ += ' ' + self.lexeme()
 			self.getToken()
 			
 			# ]
-			if self.token.symbol() != 'rightbracket':
-				ErrorMessage('{0} expected'.format(']'), self.lexer.position(), self.lexer.echo())
+			if self.kind != RIGHTBRACKET:
+				raise self.error(']')
 			
-			typ += ' ' + self.token.lexeme()
+			typ += ' ' + self.lexeme()
 			self.getToken()
 			
 			# )
-			if self.token.symbol() != 'rightparen':
-				ErrorMessage('{0} expected'.format(')'), self.lexer.position(), self.lexer.echo())
+			if self.kind != RIGHTPAREN:
+				raise self.error(')')
 			
 			self.getToken()
 
 		# _{
-		if self.token.symbol() != 'leftbrace':
-			ErrorMessage('{0} expected'.format('{'), self.lexer.position(), self.lexer.echo())
+		if self.kind != LEFTBRACE:
+			raise self.error('{')
 		
 		self.getToken()
 
 		# {varDef}
-		while self.token.symbol() == 'var':
+		while self.kind == VAR:
 			var = self.varDef()
 			if var != None:
 				decVarList.append(var)
 
 		# statement
-		stmt1 = self.statement()
+		stmts.append(self.statement())
 
 		# {statement}
-		while self.token.symbol() != 'rightbrace':
-			stmt2 = self.statement()
-			stmt1 = AST.Statement(copy.deepcopy(stmt1), copy.deepcopy(stmt2))
+		while self.kind != RIGHTBRACE:
+			stmts.append(self.statement())
 
 		# _}
-		if self.token.symbol() != 'rightbrace':
-			ErrorMessage('{0} expected'.format('}'), self.lexer.position(), self.lexer.echo())
+		if self.kind != RIGHTBRACE:
+			raise self.error('}')
 
 		self.getToken()
 
 		argList.append(AST.DecVar(name = arg, typ = typ, value = AST.NilValue()))
 
-		prgm = AST.Program(name = 'main', stmt = copy.deepcopy(stmt1), argList = copy.deepcopy(argList), funcList = [], decVarList = copy.deepcopy(decVarList))
+		prgm = AST.Program(name = 'main', stmt = AST.Block(stmts = stmts), argList = argList, funcList = [], decVarList = decVarList)
 		
 		return prgm
 
@@ -216,7 +252,7 @@ class MicroTree(object):
 		symbol = 'def'
 		funcId = ''
 		expr = None
-		stmt1 = stmt2 = None
+		stmts = []
 		prgm = None
 		rtrn = None
 		decVarList = []
@@ -226,30 +262,30 @@ class MicroTree(object):
 		typ = ''
 
 		# def
-		if self.token.symbol() == 'def':
+		if self.kind == DEF:
 			self.getToken()
 
 			# identifier that is not main
-			if self.token.symbol() == 'identifier' and self.token.lexeme() != 'main':
+			if self.kind == IDENTIFIER and self.lexeme() != 'main':
 				# store lexeme in funcId
-				funcId = self.token.lexeme()
+				funcId = self.lexeme()
 				self.getToken()
 
 				# (
-				if self.token.symbol() != 'leftparen':
-					ErrorMessage('{0} expected'.format('('), self.lexer.position(), self.lexer.echo())
+				if self.kind != LEFTPAREN:
+					raise self.error('(')
 				
 				self.getToken()
 
 				# id -- identifier of 1st declared argument to pass to function
-				if self.token.symbol() == 'identifier':
+				if self.kind == IDENTIFIER:
 					# store argument id into name
-					name = self.token.lexeme()
+					name = self.lexeme()
 					self.getToken()
 
 					# :
-					if self.token.symbol() != 'colon':
-						ErrorMessage('{0} expected'.format(':'), self.lexer.position(), self.lexer.echo())
+					if self.kind != COLON:
+						raise self.error(':')
 					
 					self.getToken()
 
@@ -267,20 +303,20 @@ class MicroTree(object):
 					argList.append(arg)
 
 					# ,
-					while self.token.symbol() == 'comma':
+					while self.kind == COMMA:
 						self.getToken()
 
 						# id -- identifier of 2nd+ declared argument to pass to function
-						if self.token.symbol() != 'identifier':
-							ErrorMessage('{0} expected'.format('id'), self.lexer.position(), self.lexer.echo())
+						if self.kind != IDENTIFIER:
+							raise self.error('id')
 						
 						# store argument id into name
-						name = self.token.lexeme()
+						name = self.lexeme()
 						self.getToken()
 
 						# :
-						if self.token.symbol() != 'colon':
-							ErrorMessage('{0} expected'.format(':'), self.lexer.position(), self.lexer.echo())
+						if self.kind != COLON:
+							raise self.error(':')
 						
 						self.getToken()
 
@@ -298,14 +334,14 @@ class MicroTree(object):
 						argList.append(arg)
 
 				# )
-				if self.token.symbol() != 'rightparen':
-					ErrorMessage('{0} expected'.format(')'), self.lexer.position(), self.lexer.echo())
+				if self.kind != RIGHTPAREN:
+					raise self.error(')')
 				
 				self.getToken()
 
 				# :
-				if self.token.symbol() != 'colon':
-					ErrorMessage('{0} expected'.format(':'), self.lexer.position(), self.lexer.echo())
+				if self.kind != COLON:
+					raise self.error(':')
 				
 				self.getToken()
 
@@ -313,35 +349,30 @@ class MicroTree(object):
 				self.type()
 
 				# =
-				if self.token.symbol() != 'assign':
-					ErrorMessage('{0} expected'.format('='), self.lexer.position(), self.lexer.echo())
+				if self.kind != ASSIGN:
+					raise self.error('=')
 				
 				self.getToken()
 
 				# _{
-				if self.token.symbol() != 'leftbrace':
-					ErrorMessage('{0} expected'.format('{'), self.lexer.position(), self.lexer.echo())
+				if self.kind != LEFTBRACE:
+					raise self.error('{')
 				
 				self.getToken()
 
 				# {varDef}
-				while self.token.symbol() == 'var':
+				while self.kind == VAR:
 					var = self.varDef()
 					if var != None:
 						decVarList.append(var)
 
 				# {statement}
-				while self.token.symbol() != 'return':
-					stmt2 = self.statement()
-
-					if stmt1 == None:
-						stmt1 = stmt2
-					else:
-						stmt1 = AST.Statement(stmt = copy.deepcopy(stmt1), stmt2 = copy.deepcopy(stmt2))
+				while self.kind != RETURN:
+					stmts.append(self.statement())
 
 				# return
-				if self.token.symbol() != 'return':
-					ErrorMessage('{0} expected'.format('return'), self.lexer.position(), self.lexer.echo())
+				if self.kind != RETURN:
+					raise self.error('return')
 
 				self.getToken()
 				
@@ -349,26 +380,22 @@ class MicroTree(object):
 				expr = self.listExpr()
 
 				# Create instance of AST.Return() object
-				rtrn = AST.Return(expr = copy.deepcopy(expr))
-
-				if stmt1 == None:
-					stmt1 = rtrn
-				else:
-					stmt1 = AST.Statement(stmt = copy.deepcopy(stmt1), stmt2 = copy.deepcopy(rtrn))
+				rtrn = AST.Return(expr = expr)
+				stmts.append(rtrn)
 
 				# ;
-				if self.token.symbol() != 'semicolon':
-					ErrorMessage('{0} expected'.format(';'), self.lexer.position(), self.lexer.echo())
+				if self.kind != SEMICOLON:
+					raise self.error(';')
 
 				self.getToken()
 
 				# _}
-				if self.token.symbol() != 'rightbrace':
-					ErrorMessage('{0} expected'.format('}'), self.lexer.position(), self.lexer.echo())
+				if self.kind != RIGHTBRACE:
+					raise self.error('}')
 
 				self.getToken()
 
-				prgm = AST.Program(name = funcId, stmt = copy.deepcopy(stmt1), argList = copy.deepcopy(argList), funcList = [], decVarList = copy.deepcopy(decVarList))
+				prgm = AST.Program(name = funcId, stmt = AST.Block(stmts = stmts), argList = argList, funcList = [], decVarList = decVarList)
 
 			else:
 				symbol = 'main'
@@ -388,21 +415,21 @@ class MicroTree(object):
 		var = None
 
 		# var
-		if self.token.symbol() == 'var':
+		if self.kind == VAR:
 			self.getToken()
 
 			# id
-			if self.token.symbol() != 'identifier':
-				ErrorMessage('{0} expected'.format('id'), self.lexer.position(), self.lexer.echo())
+			if self.kind != IDENTIFIER:
+				raise self.error('id')
 
 			# store variable id in v_id
-			v_id = self.token.lexeme()
+			v_id = self.lexeme()
 
 			self.getToken()
 
 			# :
-			if self.token.symbol() != 'colon':
-				ErrorMessage('{0} expected'.format(':'), self.lexer.position(), self.lexer.echo())
+			if self.kind != COLON:
+				raise self.error(':')
 
 			self.getToken()
 
@@ -410,8 +437,8 @@ class MicroTree(object):
 			v_type = self.type()
 
 			# =
-			if self.token.symbol() != 'assign':
-				ErrorMessage('{0} expected'.format('='), self.lexer.position(), self.lexer.echo())
+			if self.kind != ASSIGN:
+				raise self.error('=')
 
 			self.getToken()
 
@@ -419,8 +446,8 @@ class MicroTree(object):
 			v_val = self.literal()
 
 			# ;
-			if self.token.symbol() != 'semicolon':
-				ErrorMessage('{0} expected'.format(';'), self.lexer.position(), self.lexer.echo())
+			if self.kind != SEMICOLON:
+				raise self.error(';')
 
 			self.getToken()
 
@@ -435,36 +462,36 @@ class MicroTree(object):
 		typ = None
 
 		# Int
-		if self.token.symbol() == 'int':
-			typ = self.token.lexeme()
+		if self.kind == INT:
+			typ = self.lexeme()
 			self.getToken()
 		
 		# List
-		elif self.token.symbol() == 'list':
-			typ = self.token.lexeme()
+		elif self.kind == LIST:
+			typ = self.lexeme()
 			self.getToken()
 
 			# _[
-			if self.token.symbol() != 'leftbracket':
-				ErrorMessage('{0} expected'.format('['), self.lexer.position(), self.lexer.echo())
+			if self.kind != LEFTBRACKET:
+				raise self.error('[')
 			
 			self.getToken()
 			
 			# Int
-			if self.token.symbol() != 'int':
-				ErrorMessage('{0} expected'.format('Int'), self.lexer.position(), self.lexer.echo())
+			if self.kind != INT:
+				raise self.error('Int')
 			
-			typ += ' [' + self.token.lexeme() + ']'
+			typ += ' [' + self.lexeme() + ']'
 			self.getToken()
 
 			# _]
-			if self.token.symbol() != 'rightbracket':
-				ErrorMessage('{0} expected'.format(']'), self.lexer.position(), self.lexer.echo())
+			if self.kind != RIGHTBRACKET:
+				raise self.error(']')
 			
 			self.getToken()
 
 		else:
-			ErrorMessage('{0} expected'.format('type'), self.lexer.position(), self.lexer.echo())
+			raise self.error('type')
 
 		return typ
 
@@ -481,12 +508,12 @@ class MicroTree(object):
 		v_id = None
 
 		# if
-		if self.token.symbol() == 'if':
+		if self.kind == IF:
 			self.getToken()
 
 			# (
-			if self.token.symbol() != 'leftparen':
-				ErrorMessage('{0} expected'.format('('), self.lexer.position(), self.lexer.echo())
+			if self.kind != LEFTPAREN:
+				raise self.error('(')
 			
 			self.getToken()
 
@@ -494,8 +521,8 @@ class MicroTree(object):
 			expr = self.expr()
 
 			# )
-			if self.token.symbol() != 'rightparen':
-				ErrorMessage('{0} expected'.format(')'), self.lexer.position(), self.lexer.echo())
+			if self.kind != RIGHTPAREN:
+				raise self.error(')')
 			
 			self.getToken()
 
@@ -503,19 +530,19 @@ class MicroTree(object):
 			stmt1 = self.statement()
 
 			# [ else Statement ]
-			if self.token.symbol() == 'else':
+			if self.kind == ELSE:
 				self.getToken()
 				stmt2 = self.statement()
 
-			stmt = AST.If(cond = copy.deepcopy(expr), term1 = copy.deepcopy(stmt1), term2 = copy.deepcopy(stmt2))
+			stmt = AST.If(cond = expr, term1 = stmt1, term2 = stmt2)
 
 		# while
-		elif self.token.symbol() == 'while':
+		elif self.kind == WHILE:
 			self.getToken()
 
 			# (
-			if self.token.symbol() != 'leftparen':
-				ErrorMessage('{0} expected'.format('('), self.lexer.position(), self.lexer.echo())
+			if self.kind != LEFTPAREN:
+				raise self.error('(')
 			
 			self.getToken()
 			
@@ -523,25 +550,25 @@ class MicroTree(object):
 			expr = self.expr()
 
 			# )
-			if self.token.symbol() != 'rightparen':
-				ErrorMessage('{0} expected'.format(')'), self.lexer.position(), self.lexer.echo())
+			if self.kind != RIGHTPAREN:
+				raise self.error(')')
 			
 			self.getToken()
 
 			# Statement
 			stmt1 = self.statement()
 
-			stmt = AST.While(cond = copy.deepcopy(expr), statement = copy.deepcopy(stmt1))
+			stmt = AST.While(cond = expr, statement = stmt1)
 
 		# id
-		elif self.token.symbol() == 'identifier':
-			v_id = AST.Variable(name = self.token.lexeme())
+		elif self.kind == IDENTIFIER:
+			v_id = AST.Variable(name = self.lexeme())
 
 			self.getToken()
 
 			# =
-			if self.token.symbol() != 'assign':
-				ErrorMessage('{0} expected'.format('='), self.lexer.position(), self.lexer.echo())
+			if self.kind != ASSIGN:
+				raise self.error('=')
 
 			self.getToken()
 
@@ -549,20 +576,20 @@ class MicroTree(object):
 			expr = self.listExpr()
 
 			# ;
-			if self.token.symbol() != 'semicolon':
-				ErrorMessage('{0} expected'.format(';'), self.lexer.position(), self.lexer.echo())
+			if self.kind != SEMICOLON:
+				raise self.error(';')
 			
 			self.getToken()
 
-			stmt = AST.Assignment(lhs = v_id, rhs = copy.deepcopy(expr))
+			stmt = AST.Assignment(lhs = v_id, rhs = expr)
 
 		# println
-		elif self.token.symbol() == 'println':
+		elif self.kind == PRINTLN:
 			self.getToken()
 
 			# (
-			if self.token.symbol() != 'leftparen':
-				ErrorMessage('{0} expected'.format('('), self.lexer.position(), self.lexer.echo())
+			if self.kind != LEFTPAREN:
+				raise self.error('(')
 			
 			self.getToken()
 
@@ -570,298 +597,233 @@ class MicroTree(object):
 			expr = self.listExpr()
 			
 			# )
-			if self.token.symbol() != 'rightparen':
-				ErrorMessage('{0} expected'.format(')'), self.lexer.position(), self.lexer.echo())
+			if self.kind != RIGHTPAREN:
+				raise self.error(')')
 			
 			self.getToken()
 
 			# ;
-			if self.token.symbol() != 'semicolon':
-				ErrorMessage('{0} expected'.format(';'), self.lexer.position(), self.lexer.echo())
+			if self.kind != SEMICOLON:
+				raise self.error(';')
 			
 			self.getToken()
 
-			stmt = AST.Println(expr = copy.deepcopy(expr))
+			stmt = AST.Println(expr = expr)
 
 		# _{
-		elif self.token.symbol() == 'leftbrace':
+		elif self.kind == LEFTBRACE:
 			self.getToken()
 
 			# Statement
-			stmt1 = self.statement()
+			stmts = [self.statement()]
 
 			# {Statement}
-			while self.token.symbol() != 'rightbrace':
-				stmt2 = self.statement()
-				stmt1 = AST.Statement(copy.deepcopy(stmt1), copy.deepcopy(stmt2))
+			while self.kind != RIGHTBRACE:
+				stmts.append(self.statement())
 
 			# _}
-			if self.token.symbol() != 'rightbrace':
-				ErrorMessage('{0} expected'.format('}'), self.lexer.position(), self.lexer.echo())
+			if self.kind != RIGHTBRACE:
+				raise self.error('}')
 
 			self.getToken()
 
-			stmt = stmt1
+			stmt = AST.Block(stmts = stmts)
 
 		return stmt
 
-	# expr() : input: None, output: instance of AST.Expr() object
-	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols	
+	# expr() : input: level -- int() lowest logical operator precedence to accept,
+	# output: instance of AST.Expr() object
+	# Precedence climbing over || and &&, both left associative, so that one call parses
+	# what used to take an expr/andExpr pair of levels
+	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
 	# expr ::= andExpr {|| andExpr}
-	def expr(self):
-		# andExpr
-		expr = self.andExpr()
-		term1 = None
-		term2 = None
-
-		# {|| andExpr}
-		while self.token.symbol() == 'or':
-			# ||
-			op = self.token.lexeme()
-			self.getToken()
-
-			# andExpr
-			andExpr = self.andExpr()
-
-			term1 = expr
-			term2 = andExpr
-			expr = AST.Expr(op = op, term1 = copy.deepcopy(expr), term2 = copy.deepcopy(andExpr))
-
-		return expr
-
-	# andExpr() : input: None, output: instance of AST.Expr() object
-	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols	
 	# andExpr ::= relExpr {&& relExpr}
-	def andExpr(self):
-		# relExpr -- store relExpr in expr
+	def expr(self, level=OR_LEVEL):
+		# relExpr
 		expr = self.relExpr()
 
-		# {&& relExpr}
-		while self.token.symbol() == 'and':
-			# &&
-			op = self.token.lexeme()
+		# {(|| | &&) relExpr}, binding tighter operators first
+		while True:
+			kind = self.kind
+			if kind == AND:
+				prec = AND_LEVEL
+			elif kind == OR:
+				prec = OR_LEVEL
+			else:
+				break
+
+			if prec < level:
+				break
+
+			op = self.lexeme()
 			self.getToken()
 
-			# relExpr
-			relExpr = self.relExpr()
-			expr = AST.Expr(op = op, term1 = copy.deepcopy(expr), term2 = copy.deepcopy(relExpr))
+			term2 = self.expr(prec + 1)
+			expr = AST.Expr(op = op, term1 = expr, term2 = term2)
 
 		return expr
 
 	# relExpr() : input: None, output: instance of AST.Expr() object
-	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols	
+	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
 	# relExpr ::= [!] listExpr [relOper listExpr]
+	# relOper ::= < | <= | > | >= | == | !=
 	def relExpr(self):
 		op = None
 
 		# [!] -- store in op if exists
-		if self.token.symbol() == 'not':
-			op = self.token.lexeme()
+		if self.kind == NOT:
+			op = self.lexeme()
 			self.getToken()
 
 		# listExpr -- store listExpr in expr
 		expr = self.listExpr()
 
-		# [relop listExpr]
-		# store relOper in relop
-		relop = self.relOper()
+		# [relOper listExpr] -- a single comparison, relational operators do not chain
+		if self.kind == RELOP:
+			relop = self.lexeme()
+			self.getToken()
 
-		if relop != None:
 			term2 = self.listExpr()
-			expr = AST.Expr(op = relop, term1 = copy.deepcopy(expr), term2 = copy.deepcopy(term2))
+			expr = AST.Expr(op = relop, term1 = expr, term2 = term2)
 
 		if op != None:
-			expr = AST.Expr(op = op, term1 = copy.deepcopy(expr), term2 = None)
+			expr = AST.Expr(op = op, term1 = expr, term2 = None)
 
 		return expr
 
-	# relOper() : input: None, output: op -- str()
-	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols	
-	# relOper ::= < | <= | > | >= | == | !=
-	def relOper(self):
-		op = None
-
-		# < | <= | > | >= | == | !=
-		if self.token.symbol() == 'relop':
-			op = self.token.lexeme()
-			self.getToken()
-
-		return op
-
-	# listExpr() : input: None, output: instance of AST.Expr() object
+	# listExpr() : input: level -- int() lowest operator precedence to accept,
+	# output: instance of AST.Expr() object
+	# Precedence climbing over ::, + | - and * | / by the precedence table, so that one
+	# call per operand replaces the listExpr/addExpr/mulExpr chain
+	# :: is right associative, + - * / are left associative
 	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
 	# listExpr ::= addExpr | addExpr :: listExpr
-	def listExpr(self):
-		# addExpr -- store addExpr to expr
-		expr = self.addExpr()
-
-		# :: listExpr
-		if self.token.symbol() == 'cons':
-			op = self.token.lexeme()
-			self.getToken()
-			term2 = self.listExpr()
-
-			expr = AST.Expr(op = op, term1 = copy.deepcopy(expr), term2 = copy.deepcopy(term2))
-
-		return expr
-
-	# addExpr() : input: None, output: instance of AST.Expr() object
-	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
 	# addExpr ::= mulExpr {addOper mulExpr}
-	def addExpr(self):
-		# mulExpr -- store mulExpr in expr
-		expr = self.mulExpr()
-		op = True
-
-		# {addOper mulExpr}
-		while op != None:
-			# addOper
-			op = self.addOper()
-
-			# mulExpr -- store in term2, store expr into term1
-			if op != None:
-				term1 = expr
-				term2 = self.mulExpr()
-				expr = AST.Expr(op = op, term1 = copy.deepcopy(term1), term2 = copy.deepcopy(term2))
-
-		return expr
-
-	# addOper() : input: None, output: op -- str()
-	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
-	#  addOper ::= + | -
-	def addOper(self):
-		op = None
-
-		# + | -
-		if self.token.symbol() == 'addop':
-			op = self.token.lexeme()
-			self.getToken()
-
-		return op
-
-	# mulExpr() : input: None, output: instance of AST.Expr() object
-	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
 	# mulExpr ::= prefixExpr {mulOper prefixExpr}
-	def mulExpr(self):
+	def listExpr(self, level=CONS_LEVEL):
 		# prefixExpr -- store prefixExpr in expr
 		expr = self.prefixExpr()
-		op = True
 
-		# {mulOper prefixExpr}
-		while op != None:
-			# mulOper
-			op = self.mulOper()
+		# {(:: | addOper | mulOper) listExpr}
+		while True:
+			kind = self.kind
+			prec = precedence[kind]
+			if prec < level:
+				break
 
-			# prefixExpr -- store in term2, store expr into term1
-			if op != None:
-				term1 = expr
-				term2 = self.prefixExpr()
-				expr = AST.Expr(op = op, term1 = copy.deepcopy(expr), term2 = copy.deepcopy(term2))
+			op = self.lexeme()
+			self.getToken()
 
-		return expr
+			# the right operand of :: takes further :: operators, of the others only tighter ones
+			if kind == CONS:
+				term2 = self.listExpr(prec)
+			else:
+				term2 = self.listExpr(prec + 1)
 
-	# addOper() : input: None, output: op -- str()
-	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
-	# mulOper ::= * | /
-	def mulOper(self):
-		op = None
+			expr = AST.Expr(op = op, term1 = expr, term2 = term2)
 
-		# * | /
-		if self.token.symbol() == 'multop':
-			op = self.token.lexeme()		
-			self.getToken()
-		
-		return op
+		return expr
 
 	# prefixExpr() : input: None, output: instance of AST.Expr() object
 	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
 	# prefixExpr ::= [addOper] simpleExpr {listMethodCall}
+	# listMethodCall ::= . head | . tail | . isEmpty | . listMethod [ ( listExpr ) ]
 	def prefixExpr(self):
+		addop = None
+
 		# [addOper]
-		addop = self.addOper()
+		if self.kind == ADDOP:
+			addop = self.lexeme()
+			self.getToken()
 
 		# simpleExpr -- store simpleExpr in expr
 		expr = self.simpleExpr()
-		listop = True
 
 		# {listMethodCall}
-		while listop != None:
-			listop = self.listMethodCall()
-			if listop != None:
-				expr = AST.Expr(op = listop, term1 = copy.deepcopy(expr), term2 = None)
+		while self.kind == PERIOD:
+			self.getToken()
 
-		if addop != None:
-			expr = AST.Expr(op = addop, term1 = copy.deepcopy(expr), term2 = None)
+			# head | tail | isEmpty
+			if self.kind != LISTOP:
+				raise self.error('(head | tail | isempty)')
 
-		return expr
+			op = self.lexeme()
+			self.getToken()
 
-	# listMethodCall() : input: None, output: op -- str()
-	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols
-	# listMethodCall ::= . head | . tail | . isEmpty
-	def listMethodCall(self):
-		op = None
+			# ( listExpr ) -- the argument of a list method taking one
+			term2 = None
+			if list_methods.get(op, 0) > 0:
+				if self.kind != LEFTPAREN:
+					raise self.error('(')
+				self.getToken()
 
-		# .
-		if self.token.symbol() == 'period':
-			self.getToken()
+				term2 = self.listExpr()
 
-			# head | tail | isEmpty -- store listOp into op
-			if self.token.symbol() == 'listop':
-				op = self.token.lexeme()
+				if self.kind != RIGHTPAREN:
+					raise self.error(')')
 				self.getToken()
-			else:
-				ErrorMessage('{0} expected'.format('(head | tail | isempty)'), self.lexer.position(), self.lexer.echo())
 
-		return op
+			expr = AST.Expr(op = op, term1 = expr, term2 = term2)
+
+		if addop != None:
+			expr = AST.Expr(op = addop, term1 = expr, term2 = None)
+
+		return expr
 
 	# simpleExpr() : input: None, output: instance of appropriate AST object
 	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols	
 	# simpleExpr ::= literal | ( expr ) | id [ ( [ listExpr {, listExpr} ] ) ]
 	def simpleExpr(self):
-		v_id = None
-		parameterList = []
+		kind = self.kind
+
+		# integer, the most common operand, without a call to literal()
+		if kind == INTEGER:
+			expr = AST.IntValue(value = self.lexeme())
+			self.getToken()
 
 		# id
-		if self.token.symbol() == 'identifier':
-			# store id lexeme into v_id
-			v_id = self.token.lexeme()
+		elif kind == IDENTIFIER:
+			# store id lexeme into v_id, and where it is for errors found in a call after parsing
+			v_id = self.lexeme()
+			line, position = self.lexer.lineno(), self.lexer.position()
 			self.getToken()
 
 			# [ ( ...
-			if self.token.symbol() == 'leftparen':
+			if self.kind == LEFTPAREN:
+				where = (line, position, self.lexer.echo())
 				self.getToken()
 
 				# listExpr -- store listExpr into parameterList
-				parameterList.append(copy.deepcopy(self.listExpr()))
+				parameterList = [self.listExpr()]
 
 				# { , ...
-				while self.token.symbol() == 'comma':
+				while self.kind == COMMA:
 					self.getToken()
 					# listExpr -- store listExpr into parameterList
-					parameterList.append(copy.deepcopy(self.listExpr()))
+					parameterList.append(self.listExpr())
 
 				# ) ]
-				if self.token.symbol() != 'rightparen':
-					ErrorMessage('{0} expected'.format(')'), self.lexer.position(), self.lexer.echo())					
-				
+				if self.kind != RIGHTPAREN:
+					raise self.error(')')
+
 				self.getToken()
 
-				expr = AST.FunctionCall(name = v_id, parameterList = copy.deepcopy(parameterList))
+				expr = AST.FunctionCall(name = v_id, parameterList = parameterList, position = where)
 
 			# no [ ( [ listExpr {, listExpr} ] ) ]
 			else:
 				expr = AST.Variable(name = v_id)
 
 		# (
-		elif self.token.symbol() == 'leftparen':
+		elif kind == LEFTPAREN:
 			self.getToken()
 
 			# expr -- store expr in expr
 			expr = self.expr()
 
 			# )
-			if self.token.symbol() != 'rightparen':
-				ErrorMessage('{0} expected'.format(')'), self.lexer.position(), self.lexer.echo())					
+			if self.kind != RIGHTPAREN:
+				raise self.error(')')
 
 			self.getToken()
 
@@ -875,18 +837,20 @@ class MicroTree(object):
 	# Recognizes the following BNF where symbols preceded with underscores are in-language symbols	
 	# literal ::= integer | Nil
 	def literal(self):
-		val = None
-
 		# integer
-		if self.token.symbol() == 'integer':
-			val = AST.IntValue(value = self.token.lexeme())
+		if self.kind == INTEGER:
+			val = AST.IntValue(value = self.lexeme())
 			self.getToken()				
 
 		# Nil -- a list
-		elif self.token.symbol() == 'nil':
+		elif self.kind == NIL:
 			val = AST.NilValue()
 			self.getToken()
 
+		# anything else, as after an operator with no operand following it
+		else:
+			raise self.error('operand')
+
 		return val		
 
 def main(file):
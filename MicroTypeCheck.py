@@ -0,0 +1,228 @@
+# MicroTypeCheck.py : Ahead-of-time type checking for the MicroScala project
+# TypeChecker checks every function call of a program before it runs: that the function
+# is declared, that it is passed as many arguments as it declares, and that every
+# argument whose type is known before running is an Int or a List as declared. Types are
+# named as the Python types of values, 'int', 'list', 'bool' or 'NoneType', so that the
+# errors read as the ones MicroInterp raises while running. A variable has its declared
+# type as long as every value stored into it has that type. An argument whose type is
+# only known while running is left to be checked when the call runs.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from ErrorMessage import TypeCheckError
+from MicroResolve import Resolver, GLOBAL
+from MicroRuntime import literal, type_name, declared_type, arity_error, arg_type_error, function_table
+from MicroIntrinsics import results as method_types
+import AST
+
+# Returns the type of the values of a variable or argument declared as var, or None for a
+# declared type other than Int or List
+def named_type(var):
+	typ = declared_type(var)
+	if typ in ['Int', 'int']:
+		return 'int'
+	if typ in ['List', 'list']:
+		return 'list'
+	return None
+
+# Returns the nodes of tree in source order, tree first
+def preorder(tree):
+	stack = [tree]
+	while len(stack) > 0:
+		node = stack.pop()
+		yield node
+		stack.extend(reversed(AST.children(node)))
+
+class TypeChecker(object):
+	def __init__(self, tree, resolver=None, filename=None):
+		self.tree = tree
+		self.resolver = resolver if resolver != None else Resolver(tree)
+		self.filename = filename
+		self.functions = function_table(tree.funcList)
+
+		# proven holds every parameter of a call whose type is known to match its argument,
+		# which needs no check when the call runs
+		self.proven = set()
+
+		# types maps each variable, as (GLOBAL, slot) or (function, slot), to its type or None
+		self.types = {}
+
+		# stores lists every store into a variable as (variable, rhs node or None, function,
+		# type stored when there is no rhs node)
+		self.stores = []
+
+		# the functions that can run: the first function of each name, and main
+		bodies = list(self.functions.values())
+		if tree.stmt != None:
+			bodies.append(tree.stmt)
+
+		for var in tree.decVarList:
+			self.Declare(var, None, literal(var.value))
+		calls = []
+		for func in bodies:
+			for arg in func.argList:
+				self.Declare(arg, func, None)
+			for var in func.decVarList:
+				self.Declare(var, func, literal(var.value))
+
+			if func.stmt != None:
+				for node in preorder(func.stmt):
+					if type(node) == AST.Assignment and type(node.lhs) == AST.Variable:
+						self.stores.append((self.variable(node.lhs, func), node.rhs, func, None))
+					elif type(node) == AST.FunctionCall:
+						calls.append((node, func))
+
+		self.Infer()
+
+		for (call, func) in sorted(calls, key=lambda pair: pair[0].position[:2] if pair[0].position != None else (0, 0)):
+			self.Call(call, func)
+
+	# Returns the variable node is bound to, as (GLOBAL, slot) or (func, slot), or None
+	def variable(self, node, func):
+		binding = self.resolver.bindings.get(node)
+		if binding == None:
+			return None
+
+		(scope, slot) = binding
+		if scope == GLOBAL:
+			return (GLOBAL, slot)
+		return (func, slot)
+
+	# Records the declaration of a variable or an argument of func, and the store of its
+	# initial value, or of the value an argument is bound to
+	def Declare(self, var, func, value):
+		key = self.variable(var, func)
+		if key == None:
+			return
+		if key not in self.types:
+			self.types[key] = named_type(var)
+
+		typ = type_name(value) if value != None else named_type(var)
+		if typ != None:
+			self.stores.append((key, None, func, typ))
+
+	# Drops the type of every variable that is stored a value of another type, or of an
+	# unknown type, until no type changes
+	def Infer(self):
+		changed = True
+		while changed:
+			changed = False
+			for (key, rhs, func, typ) in self.stores:
+				if rhs != None:
+					typ = self.Rhs(rhs, func)
+
+				# MicroInterp.update_env stores nothing but integers and lists
+				if typ in ['bool', 'NoneType']:
+					continue
+
+				if self.types.get(key) != None and self.types[key] != typ:
+					self.types[key] = None
+					changed = True
+
+	# Returns the type of the value MicroInterp.Var stores for the rhs of an assignment
+	def Rhs(self, tree, func):
+		if hasattr(tree, 'value'):
+			return type_name(literal(tree))
+		elif hasattr(tree, 'op'):
+			return self.Expr(tree, func)
+		elif type(tree) == AST.Variable:
+			return self.Read(tree, func)
+		elif type(tree) == AST.FunctionCall:
+			return None
+		return 'NoneType'
+
+	# Returns the type of a variable, or of an Int or Nil literal, read by MicroInterp.access_env
+	def Read(self, tree, func):
+		if tree.name == 'int':
+			return 'int'
+
+		key = self.variable(tree, func)
+		if key == None:
+			return 'NoneType'
+		return self.types.get(key)
+
+	# Returns the type of the value of an expression, as MicroInterp.Param evaluates it
+	def Expr(self, tree, func):
+		if type(tree) == AST.FunctionCall:
+			return None
+		if not hasattr(tree, 'op'):
+			return self.Read(tree, func)
+
+		term1 = self.Term(tree.term1, func)
+		term2 = self.Term(tree.term2, func)
+		op = tree.op
+
+		if op in ['+', '-', '*', '/']:
+			if term1 == 'int' and term2 == 'int':
+				return 'int'
+			if op == '+' and term1 == 'list' and term2 == 'list':
+				return 'list'
+
+		# term1 :: term2 is a list, except that appending to a list gives None
+		elif op == '::':
+			if term1 in ['bool', 'NoneType']:
+				return 'list'
+			if term1 in ['int', 'list'] and term2 in ['list', 'NoneType']:
+				return 'list'
+			if term1 in ['int', 'list'] and term2 in ['int', 'bool']:
+				return 'NoneType'
+
+		elif op in ['head', 'tail']:
+			if term1 == 'int':
+				return 'int'
+			if term1 == 'list' and op == 'tail':
+				return 'list'
+			if term1 in ['bool', 'NoneType']:
+				return 'list'
+
+		elif op == 'isEmpty':
+			if term1 == 'list':
+				return 'bool'
+
+		# a list method called on a list gives its value or raises an error
+		elif op in method_types:
+			if term1 == 'list':
+				return method_types[op]
+
+		elif op in ['!', '==']:
+			return 'bool'
+
+		elif op in ['&&', '||']:
+			if term1 == term2:
+				return term1
+
+		return None
+
+	# Returns the type of an operand of MicroInterp.Expr, a missing operand being an empty list
+	def Term(self, tree, func):
+		if tree == None:
+			return 'list'
+		return self.Expr(tree, func)
+
+	# Checks a call made in func, raising a TypeCheckError at the position of the call
+	def Call(self, tree, func):
+		name = tree.name
+		called = self.functions.get(name)
+		if called == None:
+			raise self.located(TypeCheckError('Function not found: {0}'.format(name)), tree)
+
+		error = arity_error(name, called, len(tree.parameterList))
+		if error != None:
+			raise self.located(error, tree)
+
+		for (param, arg) in zip(tree.parameterList, called.argList):
+			typ = self.Expr(param, func)
+			if typ != None:
+				error = arg_type_error(name, arg.name, declared_type(arg), typ)
+				if error != None:
+					raise self.located(error, tree)
+				self.proven.add(param)
+
+	# Returns error placed at the position of the call tree
+	def located(self, error, tree):
+		if tree.position != None:
+			(error.line, error.position, error.echo) = tree.position
+		error.filename = self.filename
+		return error
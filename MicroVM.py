@@ -0,0 +1,725 @@
+# MicroVM.py : Bytecode compiler and stack virtual machine for the MicroScala project
+# Compiler turns an AST.Program into a Module: one Code object per function, holding
+# its instructions as (opcode, argument) pairs of integers in an array, its constant
+# pool and the names of its local variable slots. MicroVM runs a Module with a single
+# dispatch loop over an operand stack shared by all calls and a stack of call records,
+# so deep recursion needs no Python recursion. Variables live in numbered slots: the
+# globals in one list, the locals of each call in a list of its own. The program
+# prints the same output as the tree-walking MicroInterp.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+from optparse import OptionParser
+from array import array
+import sys, pickle
+
+from MicroTree import MicroTree
+from ErrorMessage import ErrorMessage, EvaluationError
+from Sink import StreamSink, NullSink
+from MicroList import ConsList, NIL
+from MicroIntrinsics import methods as list_methods
+from MicroRuntime import literal, cons, head, tail, is_empty, equal, not_equal
+from MicroRuntime import declared_type, check_arg, arity_error, function_table
+from MicroTypeCheck import TypeChecker
+
+# OPCODES lists every instruction; the index of an instruction is its opcode
+OPCODES = ['LOAD_LOCAL', 'LOAD_CONST', 'STORE_LOCAL', 'LOAD_GLOBAL', 'STORE_GLOBAL',
+	'ADD', 'SUB', 'MUL', 'DIV', 'JUMP_IF_NOT_TRUE', 'JUMP', 'GE', 'GT', 'LE', 'LT',
+	'CEQ', 'CNE', 'EQ', 'NOT', 'AND', 'OR', 'CONS', 'HEAD', 'TAIL', 'IS_EMPTY', 'LIST_METHOD', 'NEW_LIST',
+	'STORE_LOCAL_RAW', 'STORE_GLOBAL_RAW', 'LOAD_LOCAL_SET', 'JUMP_IF_UNSET',
+	'NEW_FRAME', 'BIND_LOCAL', 'BIND_GLOBAL', 'CHECK_ARG', 'CALL', 'RETURN', 'PRINT', 'POP', 'RAISE']
+
+(LOAD_LOCAL, LOAD_CONST, STORE_LOCAL, LOAD_GLOBAL, STORE_GLOBAL,
+	ADD, SUB, MUL, DIV, JUMP_IF_NOT_TRUE, JUMP, GE, GT, LE, LT,
+	CEQ, CNE, EQ, NOT, AND, OR, CONS, HEAD, TAIL, IS_EMPTY, LIST_METHOD, NEW_LIST,
+	STORE_LOCAL_RAW, STORE_GLOBAL_RAW, LOAD_LOCAL_SET, JUMP_IF_UNSET,
+	NEW_FRAME, BIND_LOCAL, BIND_GLOBAL, CHECK_ARG, CALL, RETURN, PRINT, POP, RAISE) = range(len(OPCODES))
+
+# JUMPS holds the opcodes whose argument is the offset of an instruction
+JUMPS = (JUMP_IF_NOT_TRUE, JUMP, JUMP_IF_UNSET)
+
+# UNSET fills the slots of variables that have not been given a value
+class Unset(object):
+	def __repr__(self):
+		return 'UNSET'
+
+UNSET = Unset()
+
+# The compiled form of one function, of main, or of the global declarations
+class Code(object):
+	def __init__(self, name):
+		self.name = name
+		# instructions as opcode, argument pairs
+		self.ops = array('i')
+		# constants loaded by LOAD_CONST and the operands of DIV, CHECK_ARG and RAISE
+		self.consts = []
+		# names of the local variable slots, and the slot of each name
+		self.names = []
+		self.slots = {}
+
+	# Returns the slot of the local variable name, adding one for a new name
+	def local(self, name):
+		if name not in self.slots:
+			self.slots[name] = len(self.names)
+			self.names.append(name)
+		return self.slots[name]
+
+	# Returns the index of value in the constant pool, adding it when new
+	def const(self, value):
+		for index, const in enumerate(self.consts):
+			if type(const) == type(value) and const == value:
+				return index
+		self.consts.append(value)
+		return len(self.consts) - 1
+
+	# Appends an instruction, returning its offset
+	def emit(self, op, arg=0):
+		self.ops.append(op)
+		self.ops.append(arg)
+		return len(self.ops) - 2
+
+	# Points the jump at offset to the next instruction
+	def patch(self, offset):
+		self.ops[offset + 1] = len(self.ops)
+
+# A compiled program: the Code objects, the global slots and the Code run first
+class Module(object):
+	def __init__(self, name):
+		self.name = name
+		self.codes = []
+		self.globalNames = []
+		self.globalSlots = {}
+		self.entry = None
+
+	# Returns the pickled form of the module
+	def dumps(self):
+		return pickle.dumps(self, pickle.HIGHEST_PROTOCOL)
+
+# Returns the module pickled by Module.dumps
+def loads(data):
+	return pickle.loads(data)
+
+class Compiler(object):
+	def __init__(self, tree, types=None):
+		self.tree = tree
+		self.module = Module(tree.name)
+
+		# the parameters of calls whose types the TypeChecker proved, which are not checked again
+		self.proven = (types if types != None else TypeChecker(tree)).proven
+
+		for var in tree.decVarList:
+			if var.name not in self.module.globalSlots:
+				self.module.globalSlots[var.name] = len(self.module.globalNames)
+				self.module.globalNames.append(var.name)
+
+		# table maps each function name to its function, and functions maps it to the index
+		# of its Code; a function's arguments take its first slots so that callers can bind them
+		self.table = function_table(tree.funcList)
+		self.functions = {}
+		for func in self.table.values():
+			code = self.add(Code(func.name))
+			for arg in func.argList:
+				code.local(arg.name)
+			self.functions[func.name] = len(self.module.codes) - 1
+
+		self.Prog(tree)
+		for func in self.table.values():
+			self.Func(func, self.module.codes[self.functions[func.name]])
+
+	# Adds a Code object to the module
+	def add(self, code):
+		self.module.codes.append(code)
+		return code
+
+	# Emits an instruction raising error
+	def fail(self, code, error):
+		code.emit(RAISE, code.const(error))
+
+	# Compiles an operator MicroInterp does not support, evaluating the operands, as MicroInterp
+	# does, before raising the error
+	def Unsupported(self, code, tree):
+		if tree.term1 != None:
+			self.Term(code, tree.term1, 'LHS')
+		if tree.term2 != None:
+			self.Term(code, tree.term2, 'RHS')
+		self.fail(code, EvaluationError('Operand not supported: {0}'.format(repr(tree.op))))
+
+	# Compiles AST.Program tree object into the entry Code, which declares the globals and calls main
+	def Prog(self, tree):
+		code = self.add(Code('<' + tree.name + '>'))
+		self.module.entry = len(self.module.codes) - 1
+
+		if tree.stmt == None:
+			self.fail(code, EvaluationError('empty file'))
+			return
+
+		for var in tree.decVarList:
+			self.InitVar(code, var)
+
+		main = self.add(Code(tree.stmt.name))
+		index = len(self.module.codes) - 1
+		code.emit(NEW_FRAME, index)
+		code.emit(CALL, index)
+		code.emit(RETURN)
+
+		self.Main(tree.stmt, main)
+
+	# Compiles AST.Program tree object of main
+	def Main(self, tree, code):
+		if tree.stmt == None:
+			self.fail(code, EvaluationError(repr(tree)))
+			return
+
+		for var in tree.decVarList:
+			self.InitVar(code, var)
+
+		self.Stmt(code, tree.stmt)
+		code.emit(LOAD_CONST, code.const(None))
+		code.emit(RETURN)
+
+	# Compiles a function of funcList, which returns the value of its closing return statement
+	def Func(self, tree, code):
+		for var in tree.decVarList:
+			self.InitVar(code, var)
+
+		stmts = tree.stmt.stmts if hasattr(tree.stmt, 'stmts') else [tree.stmt]
+		for stmt in stmts[:-1]:
+			self.Stmt(code, stmt)
+
+		if len(stmts) > 0 and hasattr(stmts[-1], 'name') and stmts[-1].name == 'return':
+			self.Expr(code, stmts[-1].expr)
+		else:
+			if len(stmts) > 0:
+				self.Stmt(code, stmts[-1])
+			code.emit(LOAD_CONST, code.const(None))
+		code.emit(RETURN)
+
+	# Compiles the declaration of a variable, initialized as MicroInterp.InitVar
+	def InitVar(self, code, tree):
+		self.Literal(code, tree.value)
+		self.Store(code, tree.name, raw=True)
+
+	# Compiles a literal value, the empty list for Nil
+	def Literal(self, code, tree):
+		value = literal(tree)
+		if type(value) is ConsList:
+			code.emit(NEW_LIST)
+		else:
+			code.emit(LOAD_CONST, code.const(value))
+
+	# Compiles a store of the value on top of the stack into the global when there is one,
+	# otherwise into the local; raw stores skip the Int or List check of MicroInterp.update_env
+	def Store(self, code, name, raw=False):
+		if name in self.module.globalSlots:
+			code.emit(STORE_GLOBAL_RAW if raw else STORE_GLOBAL, self.module.globalSlots[name])
+		else:
+			code.emit(STORE_LOCAL_RAW if raw else STORE_LOCAL, code.local(name))
+
+	# Compiles a read of a variable or literal as MicroInterp.access_env, the global before the local
+	def Access(self, code, tree):
+		if tree.name == 'int':
+			code.emit(LOAD_CONST, code.const(literal(tree)))
+		elif tree.name in self.module.globalSlots:
+			code.emit(LOAD_GLOBAL, self.module.globalSlots[tree.name])
+		else:
+			code.emit(LOAD_LOCAL, code.local(tree.name))
+
+	# Compiles a statement tree object, leaving nothing on the stack
+	def Stmt(self, code, tree):
+		# Block of statements, run in order
+		if hasattr(tree, 'stmts'):
+			for stmt in tree.stmts:
+				self.Stmt(code, stmt)
+
+		# Variable assignment
+		elif hasattr(tree, 'lhs'):
+			if tree.lhs != None and tree.rhs != None:
+				self.Var(code, tree)
+			else:
+				self.fail(code, EvaluationError('Broken assignment {0}'.format(repr(tree))))
+
+		# While-loop
+		elif hasattr(tree, 'cond') and tree.name == 'while':
+			if tree.cond != None and tree.statement != None:
+				start = len(code.ops)
+				self.Cond(code, tree.cond)
+				exit = code.emit(JUMP_IF_NOT_TRUE)
+				self.Stmt(code, tree.statement)
+				code.emit(JUMP, start)
+				code.patch(exit)
+			else:
+				self.fail(code, EvaluationError('Broken while-loop {0}'.format(repr(tree))))
+
+		# If-statement
+		elif hasattr(tree, 'cond') and tree.name == 'if':
+			if tree.cond != None and tree.term1 != None:
+				self.Cond(code, tree.cond)
+				skip = code.emit(JUMP_IF_NOT_TRUE)
+				self.Stmt(code, tree.term1)
+				code.patch(skip)
+			else:
+				self.fail(code, EvaluationError('Broken if statement {0}'.format(repr(tree))))
+
+		# If-Else-statement
+		elif hasattr(tree, 'cond') and tree.name == 'if-else':
+			if tree.cond != None and tree.term1 != None and tree.term2 != None:
+				self.Cond(code, tree.cond)
+				other = code.emit(JUMP_IF_NOT_TRUE)
+				self.Stmt(code, tree.term1)
+				skip = code.emit(JUMP)
+				code.patch(other)
+				self.Stmt(code, tree.term2)
+				code.patch(skip)
+			else:
+				self.fail(code, EvaluationError('Broken if-else statement {0}'.format(repr(tree))))
+
+		elif hasattr(tree, 'cond'):
+			pass
+
+		# Expression evaluation
+		elif hasattr(tree, 'op'):
+			self.Expr(code, tree)
+			code.emit(POP)
+
+		# Println
+		elif hasattr(tree, 'name') and tree.name == 'println':
+			self.Param(code, tree.expr)
+			code.emit(PRINT)
+
+		# Return, which does not end the function
+		elif hasattr(tree, 'name') and tree.name == 'return':
+			self.Expr(code, tree.expr)
+			code.emit(POP)
+
+		elif hasattr(tree, 'name'):
+			pass
+
+		else:
+			self.fail(code, EvaluationError(repr(tree)))
+
+	# Compiles AST.Assignment tree object
+	def Var(self, code, tree):
+		if not hasattr(tree.lhs, 'name'):
+			self.fail(code, EvaluationError('LHS not a variable: {0}'.format(repr(tree.lhs))))
+			return
+
+		name = tree.lhs.name
+
+		# rhs is a value
+		if hasattr(tree.rhs, 'value'):
+			self.Literal(code, tree.rhs)
+			self.Store(code, name, raw=True)
+
+		# rhs is a variable, copied from the global before the local, and nothing stored without one
+		elif hasattr(tree.rhs, 'name') and not hasattr(tree.rhs, 'parameterList'):
+			source = tree.rhs.name
+			if source in self.module.globalSlots:
+				code.emit(LOAD_GLOBAL, self.module.globalSlots[source])
+				self.Store(code, name, raw=True)
+			else:
+				code.emit(LOAD_LOCAL_SET, code.local(source))
+				skip = code.emit(JUMP_IF_UNSET)
+				self.Store(code, name, raw=True)
+				code.patch(skip)
+
+		# rhs is an expression
+		elif hasattr(tree.rhs, 'op'):
+			self.Expr(code, tree.rhs)
+			self.Store(code, name)
+
+		# rhs is a function
+		elif hasattr(tree.rhs, 'name'):
+			self.FuncHead(code, tree.rhs)
+			self.Store(code, name)
+
+		# rhs is empty
+		else:
+			code.emit(LOAD_CONST, code.const(None))
+			self.Store(code, name)
+
+	# Compiles AST.FunctionCall tree object
+	# The arguments are checked against the function declaration as MicroInterp.ArgCheck, then
+	# evaluated again and bound in a new frame as MicroInterp.FuncBody
+	def FuncHead(self, code, tree):
+		name = tree.name
+		called = self.table.get(name)
+		if called == None:
+			self.fail(code, EvaluationError('Function not found: {0}'.format(name)))
+			return
+
+		error = arity_error(name, called, len(tree.parameterList))
+		if error != None:
+			self.fail(code, error)
+			return
+
+
+		index = self.functions[called.name]
+		callee = self.module.codes[index]
+		code.emit(NEW_FRAME, index)
+		for (param, arg) in zip(tree.parameterList, called.argList):
+			self.Param(code, param)
+			if param not in self.proven:
+				code.emit(CHECK_ARG, code.const((name, arg.name, declared_type(arg))))
+			if arg.name in self.module.globalSlots:
+				code.emit(BIND_GLOBAL, self.module.globalSlots[arg.name])
+			else:
+				code.emit(BIND_LOCAL, callee.local(arg.name))
+		code.emit(CALL, index)
+
+	# Compiles a parameter passed to a function or println, a function call or an expression
+	def Param(self, code, tree):
+		if hasattr(tree, 'parameterList'):
+			self.FuncHead(code, tree)
+		else:
+			self.Expr(code, tree)
+
+	# Compiles an operand of an expression or condition
+	def Term(self, code, tree, side):
+		# a variable with a stored value
+		if hasattr(tree, 'name') and not hasattr(tree, 'parameterList'):
+			self.Access(code, tree)
+
+		# a functionCall
+		elif hasattr(tree, 'name') and hasattr(tree, 'parameterList'):
+			self.FuncHead(code, tree)
+
+		# an expression
+		elif hasattr(tree, 'op'):
+			self.Expr(code, tree)
+
+		# malformed
+		else:
+			self.fail(code, EvaluationError('{0} is malformed: {1}'.format(side, repr(tree))))
+
+	# Compiles AST.Expr tree object which is a conditional statement, leaving the
+	# output of MicroInterp.Cond on the stack
+	def Cond(self, code, tree):
+		if not hasattr(tree, 'term1'):
+			self.fail(code, EvaluationError('LHS is malformed: {0}'.format(repr(tree))))
+			return
+
+		ops = {'>=': GE, '>': GT, '<=': LE, '<': LT, '==': CEQ, '!=': CNE, '&&': AND, '||': OR}
+		if tree.op == '!':
+			self.Term(code, tree.term1, 'LHS')
+			if tree.term2 != None:
+				self.Term(code, tree.term2, 'RHS')
+				code.emit(POP)
+			code.emit(NOT)
+		elif tree.op in ops and tree.term2 != None:
+			self.Term(code, tree.term1, 'LHS')
+			self.Term(code, tree.term2, 'RHS')
+			code.emit(ops[tree.op])
+		else:
+			self.Unsupported(code, tree)
+
+	# Compiles AST.Expr tree object which is a non-conditional statement, leaving the
+	# output of MicroInterp.Expr on the stack
+	def Expr(self, code, tree):
+		# Expression contains only a single variable, or the name of a function read as one
+		if not hasattr(tree, 'term1'):
+			if hasattr(tree, 'name'):
+				self.Access(code, tree)
+			else:
+				self.fail(code, EvaluationError('Expression not supported: {0}'.format(repr(tree))))
+			return
+
+		binary = {'+': ADD, '-': SUB, '*': MUL, '::': CONS, '==': EQ, '&&': AND, '||': OR}
+		unary = {'head': HEAD, 'tail': TAIL, 'isEmpty': IS_EMPTY, '!': NOT}
+		if tree.op not in binary and tree.op not in unary and tree.op not in list_methods and tree.op != '/':
+			self.Unsupported(code, tree)
+			return
+
+		if tree.term1 != None:
+			self.Term(code, tree.term1, 'LHS')
+		else:
+			code.emit(NEW_LIST)
+
+		# unary operators evaluate a second operand only for its side effects
+		if tree.op in unary:
+			if tree.term2 != None:
+				self.Term(code, tree.term2, 'RHS')
+				code.emit(POP)
+			code.emit(unary[tree.op])
+			return
+
+		if tree.term2 != None:
+			self.Term(code, tree.term2, 'RHS')
+		else:
+			code.emit(NEW_LIST)
+
+		if tree.op == '/':
+			code.emit(DIV, code.const('Divide by zero error: {0}'.format(repr(tree))))
+		elif tree.op in list_methods:
+			code.emit(LIST_METHOD, code.const(tree.op))
+		else:
+			code.emit(binary[tree.op])
+
+class MicroVM(object):
+	def __init__(self, tree, output=None, types=None, module=None, counts=None):
+		self.output = output if output != None else StreamSink()
+		self.module = module if module != None else Compiler(tree, types).module
+		# counts, when given, maps each opcode to the number of times it was run
+		self.counts = counts
+
+	# Runs the module from its entry Code until the entry returns
+	def run(self):
+		codes = self.module.codes
+		output = self.output
+		counts = self.counts
+
+		g = [UNSET] * len(self.module.globalNames)
+		stack = []
+		push = stack.append
+		pop = stack.pop
+		calls = []
+
+		code = codes[self.module.entry]
+		ops = code.ops
+		consts = code.consts
+		frame = []
+		pc = 0
+
+		while True:
+			op = ops[pc]
+			arg = ops[pc + 1]
+			pc += 2
+
+			if counts != None:
+				counts[op] = counts.get(op, 0) + 1
+
+			if op == LOAD_LOCAL:
+				value = frame[arg]
+				push(None if value is UNSET else value)
+
+			elif op == LOAD_CONST:
+				push(consts[arg])
+
+			elif op == STORE_LOCAL:
+				value = pop()
+				if type(value) is int or type(value) is ConsList:
+					frame[arg] = value
+
+			elif op == LOAD_GLOBAL:
+				push(g[arg])
+
+			elif op == STORE_GLOBAL:
+				value = pop()
+				if type(value) is int or type(value) is ConsList:
+					g[arg] = value
+
+			elif op == ADD:
+				value = pop()
+				stack[-1] = stack[-1] + value
+
+			elif op == SUB:
+				value = pop()
+				stack[-1] = stack[-1] - value
+
+			elif op == MUL:
+				value = pop()
+				stack[-1] = stack[-1] * value
+
+			elif op == DIV:
+				value = pop()
+				if value != 0:
+					stack[-1] = stack[-1] // value
+				else:
+					raise EvaluationError(consts[arg])
+
+			elif op == JUMP_IF_NOT_TRUE:
+				if pop() is not True:
+					pc = arg
+
+			elif op == JUMP:
+				pc = arg
+
+			elif op == GE:
+				value = pop()
+				stack[-1] = stack[-1] >= value
+
+			elif op == GT:
+				value = pop()
+				stack[-1] = stack[-1] > value
+
+			elif op == LE:
+				value = pop()
+				stack[-1] = stack[-1] <= value
+
+			elif op == LT:
+				value = pop()
+				stack[-1] = stack[-1] < value
+
+			elif op == CEQ:
+				value = pop()
+				stack[-1] = equal(stack[-1], value)
+
+			elif op == CNE:
+				value = pop()
+				stack[-1] = not_equal(stack[-1], value)
+
+			elif op == EQ:
+				value = pop()
+				stack[-1] = stack[-1] == value
+
+			elif op == NOT:
+				stack[-1] = not stack[-1]
+
+			elif op == AND:
+				value = pop()
+				stack[-1] = stack[-1] and value
+
+			elif op == OR:
+				value = pop()
+				stack[-1] = stack[-1] or value
+
+			elif op == CONS:
+				value = pop()
+				stack[-1] = cons(stack[-1], value)
+
+			elif op == HEAD:
+				stack[-1] = head(stack[-1])
+
+			elif op == TAIL:
+				stack[-1] = tail(stack[-1])
+
+			elif op == LIST_METHOD:
+				value = pop()
+				stack[-1] = list_methods[consts[arg]](stack[-1], value)
+
+			elif op == IS_EMPTY:
+				stack[-1] = is_empty(stack[-1])
+
+			elif op == NEW_LIST:
+				push(NIL)
+
+			elif op == STORE_LOCAL_RAW:
+				frame[arg] = pop()
+
+			elif op == STORE_GLOBAL_RAW:
+				g[arg] = pop()
+
+			elif op == LOAD_LOCAL_SET:
+				push(frame[arg])
+
+			elif op == JUMP_IF_UNSET:
+				if stack[-1] is UNSET:
+					pop()
+					pc = arg
+
+			elif op == NEW_FRAME:
+				push([UNSET] * len(codes[arg].names))
+
+			elif op == BIND_LOCAL:
+				value = pop()
+				if type(value) is int or type(value) is ConsList:
+					stack[-1][arg] = value
+
+			elif op == BIND_GLOBAL:
+				value = pop()
+				if type(value) is int or type(value) is ConsList:
+					g[arg] = value
+
+			elif op == CHECK_ARG:
+				name, argName, check1 = consts[arg]
+				check_arg(name, argName, check1, stack[-1])
+
+			elif op == CALL:
+				calls.append((code, pc, frame))
+				frame = pop()
+				code = codes[arg]
+				ops = code.ops
+				consts = code.consts
+				pc = 0
+
+			elif op == RETURN:
+				if len(calls) == 0:
+					return
+				code, pc, frame = calls.pop()
+				ops = code.ops
+				consts = code.consts
+
+			elif op == PRINT:
+				output.write(pop())
+
+			elif op == POP:
+				pop()
+
+			elif op == RAISE:
+				raise consts[arg]
+
+			else:
+				raise EvaluationError('Bad opcode {0} at {1} in {2}'.format(op, pc - 2, code.name))
+
+# Returns the lines listing every instruction of the module, with constants and slot names
+def disassemble(module):
+	lines = []
+	for index, code in enumerate(module.codes):
+		title = 'code {0} {1}'.format(index, code.name)
+		if index == module.entry:
+			title += ' (entry)'
+		lines.append(title)
+		lines.append('  locals: ' + ', '.join(code.names))
+
+		for offset in range(0, len(code.ops), 2):
+			op, arg = code.ops[offset], code.ops[offset + 1]
+			line = '  {0:>5} {1:<18}'.format(offset, OPCODES[op])
+
+			if op in (LOAD_CONST, DIV, LIST_METHOD, CHECK_ARG, RAISE):
+				line += '{0:<5} ({1!r})'.format(arg, code.consts[arg])
+			elif op in (LOAD_LOCAL, STORE_LOCAL, STORE_LOCAL_RAW, LOAD_LOCAL_SET):
+				line += '{0:<5} ({1})'.format(arg, code.names[arg])
+			elif op in (LOAD_GLOBAL, STORE_GLOBAL, STORE_GLOBAL_RAW, BIND_GLOBAL):
+				line += '{0:<5} ({1})'.format(arg, module.globalNames[arg])
+			elif op in (NEW_FRAME, CALL):
+				line += '{0:<5} ({1})'.format(arg, module.codes[arg].name)
+			elif op == BIND_LOCAL:
+				line += str(arg)
+			elif op in JUMPS:
+				line += 'to {0}'.format(arg)
+
+			lines.append(line.rstrip())
+		lines.append('')
+
+	return lines
+
+# Compiles a file and prints its disassembly, or with run runs it and prints how often each
+# instruction ran
+def main(file, run=False):
+	try:
+		tree = MicroTree(_input=file, echo=NullSink()).tree
+		module = Compiler(tree).module
+
+		if not run:
+			for line in disassemble(module):
+				print(line)
+			return
+
+		counts = {}
+		MicroVM(tree, module=module, counts=counts).run()
+
+		print('')
+		total = sum(counts.values())
+		for op, count in sorted(counts.items(), key=lambda item: -item[1]):
+			print('{0:<18} {1:>12}'.format(OPCODES[op], count))
+		print('{0:<18} {1:>12}'.format('total', total))
+	except ErrorMessage as error:
+		if error.filename == None:
+			error.filename = file
+		error.report()
+		sys.exit(1)
+
+if __name__ == '__main__':
+	usage = "usage: %prog [options] SCALA_FILE"
+	parser = OptionParser(usage=usage)
+
+	parser.add_option("-r", "--run", action="store_true", default=False,
+					  help="run the program and count the instructions run instead of disassembling it")
+
+	(options, args) = parser.parse_args()
+
+	if len(args) != 1:
+		parser.error("Please provide required arguments: Location of scala file")
+
+	main(file=args[0], run=options.run)
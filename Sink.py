@@ -0,0 +1,92 @@
+# Sink.py : Output sinks for the MicroScala project
+# A sink receives the lines of one output channel: the source echo of MicroScalaLexer,
+# the diagnostics of ErrorMessage, or the output of the program run by MicroInterp.
+# Every sink has write(line), flush() and close(), and an enabled flag that lets
+# producers skip formatting lines nobody will see.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+import sys
+
+# Writes each line to a stream as soon as it arrives
+# The stream defaults to whatever sys.stdout is at the time of writing
+class StreamSink(object):
+	enabled = True
+
+	def __init__(self, stream=None):
+		self.stream = stream
+
+	def write(self, line):
+		stream = self.stream if self.stream != None else sys.stdout
+		stream.write(str(line) + '\n')
+
+	def flush(self):
+		stream = self.stream if self.stream != None else sys.stdout
+		stream.flush()
+
+	def close(self):
+		self.flush()
+
+# Discards every line, used for quiet mode
+class NullSink(object):
+	enabled = False
+
+	def write(self, line):
+		pass
+
+	def flush(self):
+		pass
+
+	def close(self):
+		pass
+
+# Forwards every line to another sink and also keeps a copy in self.lines
+class TeeSink(object):
+	enabled = True
+
+	def __init__(self, sink):
+		self.sink = sink
+		self.lines = []
+
+	def write(self, line):
+		self.lines.append(str(line))
+		self.sink.write(line)
+
+	def flush(self):
+		self.sink.flush()
+
+	def close(self):
+		self.sink.close()
+
+# Collects lines in memory and writes them to a stream in one go when flushed,
+# or whenever limit lines have been collected
+class BufferedSink(StreamSink):
+	def __init__(self, stream=None, limit=4096):
+		StreamSink.__init__(self, stream)
+		self.limit = limit
+		self.lines = []
+
+	def write(self, line):
+		self.lines.append(str(line))
+		if self.limit != None and len(self.lines) >= self.limit:
+			self.flush()
+
+	# return the text collected since the last flush
+	def getvalue(self):
+		return ''.join(line + '\n' for line in self.lines)
+
+	def flush(self):
+		if len(self.lines) > 0:
+			stream = self.stream if self.stream != None else sys.stdout
+			stream.write(self.getvalue())
+			self.lines = []
+		StreamSink.flush(self)
+
+# Writes lines to a file, buffered
+class FileSink(BufferedSink):
+	def __init__(self, path, limit=4096):
+		BufferedSink.__init__(self, open(path, 'w'), limit)
+
+	def close(self):
+		self.flush()
+		self.stream.close()
@@ -2,10 +2,28 @@
 # Author : Jo
 # License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
 
+from array import array
+
 # UNDEFINED holds the value of an undefined integer
 
 UNDEFINED = -32768
 
+# SYMBOLS lists every token symbol; the index of a symbol is its integer kind code
+SYMBOLS = ['EOF', 'UNK', 'e', 'comment', 'semicolon', 'cons', 'colon', 'period', 'comma',
+	'leftbrace', 'rightbrace', 'leftbracket', 'rightbracket', 'or', 'and', 'relop', 'not',
+	'leftparen', 'rightparen', 'addop', 'multop', 'assign', 'args', 'array', 'def', 'else',
+	'listop', 'if', 'int', 'list', 'main', 'nil', 'object', 'println', 'return', 'string',
+	'var', 'while', 'identifier', 'integer', 'space']
+
+(EOF, UNK, EPSILON, COMMENT, SEMICOLON, CONS, COLON, PERIOD, COMMA,
+	LEFTBRACE, RIGHTBRACE, LEFTBRACKET, RIGHTBRACKET, OR, AND, RELOP, NOT,
+	LEFTPAREN, RIGHTPAREN, ADDOP, MULTOP, ASSIGN, ARGS, ARRAY, DEF, ELSE,
+	LISTOP, IF, INT, LIST, MAIN, NIL, OBJECT, PRINTLN, RETURN, STRING,
+	VAR, WHILE, IDENTIFIER, INTEGER, SPACE) = range(len(SYMBOLS))
+
+# KINDS maps each token symbol to its integer kind code
+KINDS = dict((symbol, kind) for kind, symbol in enumerate(SYMBOLS))
+
 class Token(object):
 	def __init__(self, symbol, lexeme=None):
 		self.__symbol = str(symbol)
@@ -19,3 +37,33 @@ class Token(object):
 
 	def __repr__(self):
 		return "({0}, {1})".format(self.__symbol, self.__lexeme)
+
+# TokenBuffer stores a token stream as parallel arrays of kind codes and start/end
+# offsets into the source buffer; lexemes are only sliced from the source when asked for
+class TokenBuffer(object):
+	def __init__(self, source):
+		self.source = source
+		self.kinds = array('i')
+		self.starts = array('i')
+		self.ends = array('i')
+
+	def append(self, kind, start, end):
+		self.kinds.append(kind)
+		self.starts.append(start)
+		self.ends.append(end)
+
+	def symbol(self, i):
+		return SYMBOLS[self.kinds[i]]
+
+	def lexeme(self, i):
+		return self.source[self.starts[i]:self.ends[i]]
+
+	def token(self, i):
+		return Token(symbol=self.symbol(i), lexeme=self.lexeme(i))
+
+	def __len__(self):
+		return len(self.kinds)
+
+	def __iter__(self):
+		for i in range(len(self.kinds)):
+			yield self.token(i)
@@ -0,0 +1,33 @@
+# tests : Test suite for the MicroScala project
+# Run with python -m pytest tests, or python -m unittest discover -s tests -t . from the
+# directory above. The programs run by the tests are kept in tests/programs.
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+import os
+from MicroInterp import MicroInterp
+from ErrorMessage import ErrorMessage, EvaluationError
+from Sink import NullSink, TeeSink
+
+# PROGRAMS is the directory of the programs run by the tests
+PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'programs')
+
+# Returns the path of a program of tests/programs
+def program(name):
+	return os.path.join(PROGRAMS, name)
+
+# Runs a program as MicroInterp.main does, on a stack deep enough for recursion, but never using
+# the parse cache, with a RecursionError reported as main reports it
+# Returns (lines printed, lines of the error reported or None)
+def run(path, engine='tree', optimize=0, memo=256):
+	output = TeeSink(NullSink())
+	diagnostics = TeeSink(NullSink())
+	try:
+		MicroInterp(_input=path, echo=NullSink(), diagnostics=diagnostics, output=output, engine=engine, memo=memo, optimize=optimize, deep=True)
+	except ErrorMessage:
+		return (output.lines, diagnostics.lines)
+	except RecursionError as error:
+		return (output.lines, EvaluationError('{0}: {1}'.format(type(error).__name__, error)).lines())
+	return (output.lines, None)
@@ -0,0 +1,28 @@
+// Bump.scala
+
+// A loop stepping a global that a function called in the loop also steps.
+
+ object Bump
+{
+  var i : Int = 0 ;
+
+ def bump ( x : Int ) : Int =
+  {
+i = i + 100 ;
+return x ;
+  }
+
+ def main ( args : Array [ String ] ) {
+var s : Int = 0 ;
+var t : Int = 0 ;
+var k : Int = 0 ;
+k = 3 ;
+while ( i < 500 ) {
+i = i + 1 ;
+s = s + i * k + i * k + i * k ;
+t = bump ( 0 ) ;
+}
+println ( s ) ;
+println ( i ) ;
+  }
+}
@@ -0,0 +1,14 @@
+object Deep {
+def down ( n : Int ) : Int = {
+var r : Int = 0 ;
+r = down ( n + 1 ) ;
+r = r + 1 ;
+return r ;
+}
+def main ( args : Array [ String ] ) {
+var x : Int = 0 ;
+println ( x ) ;
+x = down ( 0 ) ;
+println ( x ) ;
+}
+}
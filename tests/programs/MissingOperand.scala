@@ -0,0 +1,7 @@
+object MissingOperand {
+def main ( args : Array [ String ] ) {
+var x : Int = 0 ;
+x = 3 + ;
+println ( x ) ;
+}
+}
@@ -0,0 +1,25 @@
+object Store {
+var g : Int = 7 ;
+def keep ( a : Int , l : List [ Int ] ) : Int = {
+var r : Int = 3 ;
+r = l . isEmpty ;
+g = ( a == 2 ) ;
+a = ( 1 == 1 ) ;
+r = r + a ;
+return r ;
+}
+def main ( args : Array [ String ] ) {
+var x : Int = 5 ;
+var l : List [ Int ] = Nil ;
+x = l . isEmpty ;
+println ( x ) ;
+x = keep ( 2 , l ) ;
+println ( x ) ;
+println ( g ) ;
+x = ( 1 == 2 || 1 == 1 ) ;
+println ( x ) ;
+l = 4 :: l ;
+l = l . isEmpty ;
+println ( l . head ) ;
+}
+}
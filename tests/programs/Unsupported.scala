@@ -0,0 +1,10 @@
+object Unsupported {
+var g : Int = 0 ;
+def main ( args : Array [ String ] ) {
+var l : List [ Int ] = Nil ;
+println ( g ) ;
+if ( g < l . head && g == 0 ) {
+println ( 1 ) ;
+}
+}
+}
@@ -0,0 +1,10 @@
+object Unsupported2 {
+var g : Int = 0 ;
+def main ( args : Array [ String ] ) {
+var l : List [ Int ] = Nil ;
+l = 1 :: l ;
+if ( g < l . head && g == 0 ) {
+println ( 1 ) ;
+}
+}
+}
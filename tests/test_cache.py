@@ -0,0 +1,57 @@
+# test_cache.py : Tests of the MicroCache parse cache
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+import os, sys, stat, shutil, tempfile, subprocess, unittest
+from unittest import mock
+import MicroCache
+from Sink import NullSink
+from tests import program
+
+class ParseCacheTest(unittest.TestCase):
+	def setUp(self):
+		self.parent = tempfile.mkdtemp()
+		self.directory = os.path.join(self.parent, 'cache')
+		self.cache = MicroCache.ParseCache(directory=self.directory)
+
+	def tearDown(self):
+		shutil.rmtree(self.parent)
+
+	# The directory is created private to the user and a stored tree loads back
+	def test_store(self):
+		tree = MicroCache.parse(program('Test1.scala'), self.cache, echo=NullSink())
+		self.assertEqual(stat.S_IMODE(os.stat(self.directory).st_mode), 0o700)
+		cached = MicroCache.parse(program('Test1.scala'), self.cache, echo=NullSink())
+		self.assertIsInstance(cached, MicroCache.CachedTree)
+		self.assertEqual(repr(cached.tree), repr(tree.tree))
+
+	# An entry owned by another user is a miss, and is left in place
+	@unittest.skipUnless(hasattr(os, 'getuid'), 'no user ids')
+	def test_other_user(self):
+		MicroCache.parse(program('Test1.scala'), self.cache, echo=NullSink())
+		with open(program('Test1.scala')) as f:
+			text = f.read()
+		with mock.patch('os.getuid', return_value=os.getuid() + 1):
+			self.assertEqual(self.cache.load(text), None)
+		self.assertTrue(os.path.exists(self.cache.path(text)))
+		self.assertNotEqual(self.cache.load(text), None)
+
+class OptionTest(unittest.TestCase):
+	# MicroInterp uses the cache only when asked to with --cache
+	def test_opt_in(self):
+		parent = tempfile.mkdtemp()
+		directory = os.path.join(parent, 'cache')
+		script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'MicroInterp.py')
+		env = dict(os.environ, MICROSCALA_CACHE=directory)
+		try:
+			subprocess.check_call([sys.executable, script, '-q', program('Test1.scala')], env=env, stdout=subprocess.DEVNULL)
+			self.assertFalse(os.path.exists(directory))
+			subprocess.check_call([sys.executable, script, '-q', '--cache', program('Test1.scala')], env=env, stdout=subprocess.DEVNULL)
+			self.assertEqual(len(MicroCache.ParseCache(directory=directory).entries()), 1)
+		finally:
+			shutil.rmtree(parent)
+
+if __name__ == '__main__':
+	unittest.main()
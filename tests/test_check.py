@@ -0,0 +1,26 @@
+# test_check.py : Tests of MicroCheck batch checking
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+import json, unittest
+import MicroCheck
+from tests import PROGRAMS
+
+class ResultsTest(unittest.TestCase):
+	# With several workers results come in completion order, each with the index of its file
+	# among the files a single job checks in order
+	def test_index(self):
+		ordered = list(MicroCheck.files([PROGRAMS]))
+		found = list(MicroCheck.results([PROGRAMS], jobs=2, chunksize=1))
+		self.assertEqual(sorted((index, file) for index, file, seconds, error in found), list(enumerate(ordered)))
+
+	def test_record(self):
+		for index, file, seconds, error in MicroCheck.results([PROGRAMS]):
+			entry = json.loads(MicroCheck.record(index, file, seconds, error))
+			self.assertEqual((entry['index'], entry['file']), (index, file))
+			self.assertEqual(entry['status'], 'ok' if error == None else 'error')
+
+if __name__ == '__main__':
+	unittest.main()
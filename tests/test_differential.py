@@ -0,0 +1,59 @@
+# test_differential.py : Differential tests of every engine, optimization level and memo size
+# Every program is run by every engine at -O 0 to 3, with and without the memo caches, and
+# must print the same lines and fail with the same error as the tree-walker at -O 0
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+import os, unittest
+from MicroInterp import engines
+from tests import PROGRAMS, program, run
+
+# The sample programs and the regression programs added with fixes
+SAMPLES = ['Test{0}.scala'.format(number) for number in range(1, 7)]
+REGRESSIONS = ['Bump.scala', 'Unsupported.scala', 'Unsupported2.scala', 'MissingOperand.scala', 'Store.scala']
+
+# Programs run by other tests only: Deep recurses until the Python stack runs out, which
+# the vm engine, running calls on a stack of its own, takes minutes to reach
+OTHERS = ['Deep.scala']
+
+ENGINES = ['tree'] + sorted(engines)
+LEVELS = [0, 1, 2, 3]
+MEMOS = [0, 256]
+
+class DifferentialTest(unittest.TestCase):
+	def assertAgrees(self, name):
+		expected = run(program(name))
+		for engine in ENGINES:
+			for optimize in LEVELS:
+				for memo in MEMOS:
+					with self.subTest(engine=engine, optimize=optimize, memo=memo):
+						self.assertEqual(run(program(name), engine, optimize, memo), expected)
+
+	# The tree-walker prints what each sample program is known to print
+	def test_expected(self):
+		for name in SAMPLES:
+			with open(program(name[:-len('.scala')] + '.out')) as f:
+				self.assertEqual(run(program(name)), (f.read().splitlines(), None), name)
+
+	def test_samples(self):
+		for name in SAMPLES:
+			self.assertAgrees(name)
+
+	def test_regressions(self):
+		for name in REGRESSIONS:
+			self.assertAgrees(name)
+
+	# MicroInterp.Expr evaluates the operands of < before rejecting it, so Unsupported fails
+	# taking the head of an empty list, which every engine must do before reaching the <
+	def test_unsupported_operands(self):
+		self.assertEqual(run(program('Unsupported.scala')), (['0'], ['***** Error Head: List is empty *****']))
+
+	# Every program of the directory is one of the above, so that none is left out
+	def test_all_programs(self):
+		names = [name for name in os.listdir(PROGRAMS) if name.endswith('.scala')]
+		self.assertEqual(sorted(names), sorted(SAMPLES + REGRESSIONS + OTHERS))
+
+if __name__ == '__main__':
+	unittest.main()
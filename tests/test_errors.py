@@ -0,0 +1,68 @@
+# test_errors.py : Tests of the errors reported for malformed and failing programs
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+import os, sys, tempfile, subprocess, unittest
+from unittest import mock
+from MicroTree import MicroTree
+from MicroScalaLexer import MicroScalaLexer
+from ErrorMessage import LexError, ParseError
+from Sink import NullSink
+from tests import program
+
+class ParseErrorTest(unittest.TestCase):
+	# An operator with no operand following it is a parse error, not an operand of None
+	def test_missing_operand(self):
+		with self.assertRaises(ParseError) as raised:
+			MicroTree(_input=program('MissingOperand.scala'), echo=NullSink())
+		self.assertEqual(raised.exception.message, 'operand expected')
+
+	# A declaration must be initialized with a literal
+	def test_missing_literal(self):
+		text = 'object A {\ndef main ( args : Array [ String ] ) {\nvar x : Int = ;\n}\n}\n'
+		with self.assertRaises(ParseError):
+			MicroTree(text=text, echo=NullSink())
+
+class StreamTest(unittest.TestCase):
+	def setUp(self):
+		self.files = []
+
+	# Opens files as open does, keeping each to check it is closed
+	def open(self, *args, **kwargs):
+		f = open(*args, **kwargs)
+		self.files.append(f)
+		return f
+
+	# A lexical error before the last line closes the file read line by line
+	def test_lex_error_closes(self):
+		with tempfile.NamedTemporaryFile('w', suffix='.scala', delete=False) as f:
+			f.write('object A {\ndef main ( args : Array [ String ] ) {\nprintln ( 1 # 2 ) ;\n}\n}\n')
+		self.addCleanup(os.remove, f.name)
+
+		with mock.patch('MicroScalaLexer.open', self.open, create=True):
+			lexer = MicroScalaLexer(_input=f.name, stream=True, echo=NullSink())
+			with self.assertRaises(LexError):
+				for kind in lexer.kinds():
+					pass
+		self.assertEqual([file.closed for file in self.files], [True])
+
+	# So does a parse error
+	def test_parse_error_closes(self):
+		with mock.patch('MicroScalaLexer.open', self.open, create=True):
+			with self.assertRaises(ParseError):
+				MicroTree(_input=program('MissingOperand.scala'), stream=True, echo=NullSink())
+		self.assertEqual([file.closed for file in self.files], [True])
+
+class MainTest(unittest.TestCase):
+	# A program recursing without end is reported by main as a runtime error, with no traceback
+	def test_recursion_error(self):
+		script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'MicroInterp.py')
+		run = subprocess.run([sys.executable, script, '-q', program('Deep.scala')], stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+		self.assertEqual(run.returncode, 1)
+		self.assertEqual(run.stderr, '')
+		self.assertEqual(run.stdout.splitlines(), ['0', '***** Error RecursionError: maximum recursion depth exceeded *****'])
+
+if __name__ == '__main__':
+	unittest.main()
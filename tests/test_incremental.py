@@ -0,0 +1,94 @@
+# test_incremental.py : Tests of MicroIncremental.IncrementalTree and RegionTree
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+import unittest
+import AST
+from MicroIncremental import IncrementalTree, RegionTree
+from Sink import NullSink
+from tests import program
+
+class RegionTreeTest(unittest.TestCase):
+	# A region starting with an indented line parses as it does unindented
+	def test_indented(self):
+		for text in ['def f ( x : Int ) : Int = {\nreturn x ;\n}', '  def f ( x : Int ) : Int = {\nreturn x ;\n}']:
+			region = RegionTree(text=text, name='T', echo=NullSink())
+			self.assertEqual([node.name for line, first, node in region.definitions], ['f'])
+
+class IncrementalTreeTest(unittest.TestCase):
+	# Editing a line of the first function of Test6, whose definitions are indented, re-parses
+	# that function only: the other function and main are the same nodes as before
+	def test_edit_reuses_definitions(self):
+		with open(program('Test6.scala')) as f:
+			text = f.read()
+		tree = IncrementalTree(text=text, echo=NullSink())
+		(cons, equal) = tree.tree.funcList
+		main = tree.tree.stmt
+
+		line = text.split('\n').index('my_list = r :: my_list ;')
+		edited = tree.edit(line, line + 1, ['my_list = r :: ( my_list ) ;'])
+
+		self.assertEqual([func.name for func in edited.funcList], ['cons_a_list', 'equal'])
+		self.assertIsNot(edited.funcList[0], cons)
+		self.assertIs(edited.funcList[1], equal)
+		self.assertIs(edited.stmt, main)
+
+	# Replacing the whole source with update re-parses only the function whose lines differ
+	def test_update_reuses_definitions(self):
+		with open(program('Test6.scala')) as f:
+			text = f.read()
+		tree = IncrementalTree(text=text, echo=NullSink())
+		(cons, equal) = tree.tree.funcList
+
+		updated = tree.update(text.replace('my_flag = 1 ;\n else', 'my_flag = 2 ;\n else'))
+		self.assertIs(updated.funcList[0], cons)
+		self.assertIsNot(updated.funcList[1], equal)
+
+	# Editing a line of main re-parses main only, and an edit of the object header re-parses
+	# every definition
+	def test_edit_main_and_header(self):
+		with open(program('Test6.scala')) as f:
+			text = f.read()
+		tree = IncrementalTree(text=text, echo=NullSink())
+		funcs = list(tree.tree.funcList)
+		main = tree.tree.stmt
+
+		line = text.split('\n').index('println ( h ) ;')
+		edited = tree.edit(line, line + 1, ['println ( h + 1 ) ;'])
+		self.assertIsNot(edited.stmt, main)
+		for (func, old) in zip(edited.funcList, funcs):
+			self.assertIs(func, old)
+
+		line = text.split('\n').index(' object Test6 {')
+		edited = tree.edit(line, line + 1, ['object Test6 {'])
+		for (func, old) in zip(edited.funcList, funcs):
+			self.assertIsNot(func, old)
+
+	# The calls of a re-parsed definition keep the lines they have in a parse of the whole program
+	def test_edit_call_positions(self):
+		with open(program('Test6.scala')) as f:
+			text = f.read()
+		tree = IncrementalTree(text=text, echo=NullSink())
+
+		lines = text.split('\n')
+		line = lines.index('println ( h ) ;')
+		edited = tree.edit(line, line + 1, ['println ( h + 1 ) ;'])
+		lines[line] = 'println ( h + 1 ) ;'
+		parsed = IncrementalTree(text='\n'.join(lines), echo=NullSink()).tree
+
+		self.assertEqual(calls(edited.stmt), calls(parsed.stmt))
+		self.assertNotEqual(calls(edited.stmt), [])
+
+# Returns the (name, line, position) of every call below node
+def calls(node):
+	out = []
+	if type(node) == AST.FunctionCall:
+		out.append((node.name, node.position[0], node.position[1]))
+	for child in AST.children(node):
+		out.extend(calls(child))
+	return out
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,78 @@
+# test_loop.py : Tests of MicroLoop.Loops
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+import os, tempfile, unittest
+from MicroInterp import engines
+from MicroTree import MicroTree
+from MicroLoop import Loops
+from Sink import NullSink
+from tests import program, run
+
+# Returns a program counting i from start to bound with the operator op of its condition by
+# step, a literal or read from the variable k, and printing i and the number of trips taken
+def counting(op, start, bound, step, literal=True):
+	direction = '+' if op in ['<', '<='] else '-'
+	return '\n'.join([
+		'object Counting {',
+		'def main ( args : Array [ String ] ) {',
+		'var i : Int = {0} ;'.format(start),
+		'var k : Int = 0 ;',
+		'var n : Int = 0 ;',
+		'k = {0} ;'.format(step),
+		'while ( i {0} {1} ) {{'.format(op, bound),
+		'i = i {0} {1} ;'.format(direction, step if literal else 'k'),
+		'n = n + 1 ;',
+		'}',
+		'println ( i ) ;',
+		'println ( n ) ;',
+		'}',
+		'}',
+		''])
+
+# Returns the lines the counting program prints, found by running its loop
+def counted(op, start, bound, step):
+	compare = {'<': int.__lt__, '<=': int.__le__, '>': int.__gt__, '>=': int.__ge__}[op]
+	(i, n) = (start, 0)
+	while compare(i, bound):
+		i = i + step if op in ['<', '<='] else i - step
+		n += 1
+	return [str(i), str(n)]
+
+class ReduceTest(unittest.TestCase):
+	# A product of a global stepped by the loop is not reduced when a function called in the
+	# loop steps the global too
+	def test_global_stored_by_call(self):
+		expected = run(program('Bump.scala'))
+		self.assertEqual(expected, (['9135', '505'], None))
+		for engine in ['tree'] + sorted(engines):
+			self.assertEqual(run(program('Bump.scala'), engine, optimize=2), expected, engine)
+
+class ClosedTest(unittest.TestCase):
+	# A counting loop stepping by more than 1 is replaced by its final stores, taking as many
+	# trips as the loop for every comparison, whether or not the step divides the distance
+	def test_trip_counts(self):
+		ranges = {'<': [(0, 10), (1, 10), (0, 9), (10, 10), (11, 10)], '>': [(10, 0), (10, 1), (9, 0), (10, 10), (10, 11)]}
+		ranges['<='] = ranges['<']
+		ranges['>='] = ranges['>']
+
+		fd, path = tempfile.mkstemp(suffix='.scala')
+		os.close(fd)
+		try:
+			for op in ['<', '<=', '>', '>=']:
+				for (start, bound) in ranges[op]:
+					for step in [2, 3, 7]:
+						for literal in [True, False]:
+							text = counting(op, start, bound, step, literal)
+							with self.subTest(op=op, start=start, bound=bound, step=step, literal=literal):
+								self.assertEqual(Loops(MicroTree(text=text, echo=NullSink()).tree).closed, 1)
+								with open(path, 'w') as f:
+									f.write(text)
+								self.assertEqual(run(path, optimize=2), (counted(op, start, bound, step), None))
+		finally:
+			os.remove(path)
+
+if __name__ == '__main__':
+	unittest.main()
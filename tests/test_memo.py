@@ -0,0 +1,33 @@
+# test_memo.py : Tests of MicroMemo.Purity
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+import unittest
+from MicroTree import MicroTree
+from MicroMemo import Purity
+from Sink import NullSink
+from tests import program
+
+# Returns the names of the pure functions of a program with the slots of the globals each reads
+def pure(name):
+	tree = MicroTree(_input=program(name), echo=NullSink()).tree
+	return dict((func.name, reads) for (func, reads) in Purity(tree).reads.items())
+
+class PurityTest(unittest.TestCase):
+	# cons_my_list of Test5 stores the global my_list, so its calls are never cached
+	def test_stores_global(self):
+		self.assertEqual(pure('Test5.scala'), {})
+
+	# area of Test3 reads the global h, whose value keys its cached calls
+	def test_reads_global(self):
+		self.assertEqual(pure('Test3.scala'), {'area': [0]})
+
+	# Functions storing only their arguments and locals are pure
+	def test_locals(self):
+		self.assertEqual(pure('Test4.scala'), {'facto': []})
+		self.assertEqual(pure('Test6.scala'), {'cons_a_list': [], 'equal': []})
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,37 @@
+# test_runtime.py : Tests of the deep stack programs run on
+# Author : Jo
+# License : Attribution-NonCommercial-ShareAlike 4.0 International (CC BY-NC-SA 4.0)
+
+#!/usr/bin/env python
+
+import sys, threading, unittest
+from MicroInterp import MicroInterp
+from MicroRuntime import run_deep, RECURSION_LIMIT, STACK_SIZE
+from Sink import NullSink
+from tests import program
+
+class RunDeepTest(unittest.TestCase):
+	# run() sees the deep limit and stack, and both are put back after it fails
+	def test_restores(self):
+		limit = sys.getrecursionlimit()
+		size = threading.stack_size()
+		seen = []
+		def run():
+			seen.append((sys.getrecursionlimit(), threading.stack_size()))
+			raise ValueError('failed')
+
+		with self.assertRaises(ValueError):
+			run_deep(run)
+		self.assertEqual(seen, [(max(limit, RECURSION_LIMIT), STACK_SIZE)])
+		self.assertEqual((sys.getrecursionlimit(), threading.stack_size()), (limit, size))
+
+	# A library caller runs a program under its own recursion limit unless it asks for deep
+	def test_library_default(self):
+		limit = sys.getrecursionlimit()
+		size = threading.stack_size()
+		with self.assertRaises(RecursionError):
+			MicroInterp(_input=program('Deep.scala'), echo=NullSink(), diagnostics=NullSink(), output=NullSink())
+		self.assertEqual((sys.getrecursionlimit(), threading.stack_size()), (limit, size))
+
+if __name__ == '__main__':
+	unittest.main()